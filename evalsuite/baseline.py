@@ -0,0 +1,167 @@
+# evalsuite/baseline.py
+"""
+Differential re-evaluation against a previous run.
+
+Every row carries a `fingerprint`: a hash of the case inputs, the extractor/metric code
+and the judge configuration. A case whose fingerprint appears in the baseline's
+per_case.jsonl is copied from there instead of being rescored; everything else is scored
+and compared with the baseline row of the same id to build delta.json.
+"""
+import hashlib, json, os, tempfile
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from .cache import content_key
+from .extractors import rules_version
+
+_METRIC_MODULES = ("matchers.py", "metrics.py", "lcs.py", "overlap.py", "soap.py")
+
+@lru_cache(maxsize=1)
+def _metrics_hash() -> str:
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _METRIC_MODULES:
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def eval_version() -> str:
+    return f"{rules_version()}/{_metrics_hash()}"
+
+def case_fingerprint(ex: Dict[str, Any], llm_backend: str = "none", llm_model: str = "", judge_tag: str = "",
+                     sections: bool = False) -> str:
+    backend = (llm_backend or "none").lower()
+    # only the openrouter backend takes a model name; openai uses a fixed one
+    judge = backend if backend in ("none", "openai") else f"{backend}:{llm_model}"
+    if judge_tag and backend != "none":
+        # triage rules / prompt budget: which cases get judged, and on what text
+        judge += f"|{judge_tag}"
+    if sections:
+        # rows of a --sections run carry an extra field, so they are not interchangeable
+        judge += "|sections"
+    return content_key(eval_version(), judge, ex.get("transcript", ""), ex.get("generated_note", ""),
+                       ex.get("reference_note", ""))[:32]
+
+# (name in delta.json, getter on a per_case row)
+DELTA_METRICS = (
+    ("missing_count", lambda r: r.get("missing_count")),
+    ("hallucinated_count", lambda r: r.get("hallucinated_count")),
+    ("contradictions_count", lambda r: r.get("contradictions_count")),
+    ("ref_f1", lambda r: (r.get("ref_align") or {}).get("f1")),
+    ("bleu", lambda r: (r.get("text_overlap") or {}).get("bleu")),
+    ("rouge_l_f", lambda r: (r.get("text_overlap") or {}).get("rouge_l_f")),
+    ("llm_completeness", lambda r: (r.get("llm_judge") or {}).get("completeness")),
+    ("llm_grounding", lambda r: (r.get("llm_judge") or {}).get("grounding")),
+    ("llm_clinical_accuracy", lambda r: (r.get("llm_judge") or {}).get("clinical_accuracy")),
+)
+
+def _judge_failed(row: Dict[str, Any]) -> bool:
+    if row.get("llm_judge") is not None:
+        return False
+    tri = row.get("triage")
+    return not (tri and tri.get("reason") == "skipped")
+
+class Baseline:
+    """
+    Byte-offset index over a previous run's per_case.jsonl, by fingerprint and by id. With
+    `snapshot` the rows are read back from a temp copy made while indexing, so the run may
+    overwrite the baseline's own per_case.jsonl as it goes (--stream into the baseline dir).
+    When the new run has a judge (`judged`), rows whose judge call failed are not offered for
+    reuse, so they get another try; cases the triage chose not to judge still are.
+    """
+
+    def __init__(self, out_dir: str, snapshot: bool = False, judged: bool = False):
+        self.dir = out_dir
+        self.path = os.path.join(out_dir, "per_case.jsonl")
+        self.by_fp: Dict[str, int] = {}
+        self.by_id: Dict[Any, int] = {}
+        copy = tempfile.TemporaryFile() if snapshot else None
+        pos = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if copy is not None:
+                    copy.write(line)
+                if line.strip():
+                    r = json.loads(line)
+                    if r.get("fingerprint") and not (judged and _judge_failed(r)):
+                        self.by_fp.setdefault(r["fingerprint"], pos)
+                    self.by_id.setdefault(r.get("id"), pos)
+                pos += len(line)
+        self.summary: Dict[str, Any] = {}
+        spath = os.path.join(out_dir, "summary.json")
+        if os.path.exists(spath):
+            with open(spath, "r", encoding="utf-8") as f:
+                self.summary = json.load(f)
+        self._f = copy if copy is not None else open(self.path, "rb")
+
+    def row_at(self, offset: int) -> Dict[str, Any]:
+        self._f.seek(offset)
+        return json.loads(self._f.readline())
+
+    def reuse(self, fingerprint: str, cid: Any) -> Optional[Dict[str, Any]]:
+        off = self.by_fp.get(fingerprint)
+        if off is None:
+            return None
+        row = self.row_at(off)
+        row["id"] = cid  # same content may sit under a different id in the new input
+        return row
+
+    def close(self) -> None:
+        self._f.close()
+
+class DeltaReport:
+    """Tracks which cases were reused / rescored / new and how rescored ones moved."""
+
+    def __init__(self, baseline: Baseline):
+        self.baseline = baseline
+        self.reused = 0
+        self.rescored = 0
+        self.new: List[Any] = []
+        self.moved: List[Dict[str, Any]] = []
+        self._seen_ids = set()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        cid = row.get("id")
+        self._seen_ids.add(cid)
+        if row.get("fingerprint") in self.baseline.by_fp:
+            self.reused += 1
+            return
+        self.rescored += 1
+        off = self.baseline.by_id.get(cid)
+        if off is None:
+            self.new.append(cid)
+            return
+        old = self.baseline.row_at(off)
+        deltas: Dict[str, Any] = {}
+        for name, get in DELTA_METRICS:
+            a, b = get(old), get(row)
+            if a == b:
+                continue
+            if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+                deltas[name] = {"baseline": a, "current": b, "delta": b - a}
+            else:
+                deltas[name] = {"baseline": a, "current": b, "delta": None}
+        if deltas:
+            self.moved.append({"id": cid, "deltas": deltas})
+
+    def write(self, out_dir: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+        summary_delta: Dict[str, Any] = {}
+        for k, v in summary.items():
+            b = self.baseline.summary.get(k)
+            if isinstance(v, (int, float)) and isinstance(b, (int, float)) and not isinstance(v, bool):
+                summary_delta[k] = {"baseline": b, "current": v, "delta": v - b}
+        removed = sum(1 for cid in self.baseline.by_id if cid not in self._seen_ids)
+        delta = {
+            "baseline": os.path.abspath(self.baseline.dir),
+            "reused": self.reused,
+            "rescored": self.rescored,
+            "new": self.new,
+            "removed": removed,
+            "moved_count": len(self.moved),
+            "summary_delta": summary_delta,
+            # biggest movers first
+            "moved": sorted(self.moved, key=lambda m: -max(
+                (abs(d["delta"]) for d in m["deltas"].values() if d["delta"] is not None), default=0)),
+        }
+        with open(os.path.join(out_dir, "delta.json"), "w", encoding="utf-8") as f:
+            json.dump(delta, f, indent=2, ensure_ascii=False)
+        return delta
@@ -0,0 +1,138 @@
+# evalsuite/cache.py
+"""
+On-disk, content-addressed caches shared across runs and worker processes.
+
+Storage is a single SQLite file in WAL mode: readers never block, writers serialize on
+SQLite's own lock, so any number of `--workers` processes can share one cache path.
+Entries are evicted least-recently-used once the stored payload exceeds `max_bytes`, and
+(optionally) once they have not been read for `max_age` seconds. A hit records its read
+time only when the stored one is a few minutes old, so most hits take no write lock.
+"""
+import hashlib, json, os, sqlite3, threading, time
+from typing import Dict, List, Optional, Tuple
+from .extractors import Fact, extract_all, rules_version
+
+def content_key(*parts: str) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        b = (p or "").encode("utf-8")
+        h.update(len(b).to_bytes(8, "little")); h.update(b)
+    return h.hexdigest()
+
+class DiskCache:
+    # re-check the total size every N puts rather than on each one
+    EVICT_EVERY = 64
+    # a hit rewrites `accessed` only once it is this stale (or 10% of max_age), so reads of hot
+    # entries stay reads instead of each taking the write lock; LRU order is this coarse
+    TOUCH_AFTER = 300.0
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._touch_after = self.TOUCH_AFTER if max_age is None else min(self.TOUCH_AFTER, max_age * 0.1)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # one handle may be used from a helper thread (e.g. the async judge loop); serialize it
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT value, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or (self.max_age is not None and row[1] < now - self.max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+            if row[1] < now - self._touch_after:
+                self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries(key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._puts += 1
+            if (self.max_bytes is not None or self.max_age is not None) and self._puts % self.EVICT_EVERY == 1:
+                self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None, max_age: Optional[float] = None) -> int:
+        """Drops entries older than max_age seconds, then LRU entries until under max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            return self._evict(limit, max_age)
+
+    def _evict(self, limit: Optional[int], max_age: Optional[float]) -> int:
+        removed = 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            if max_age is not None:
+                removed += self._db.execute("DELETE FROM entries WHERE accessed < ?",
+                                            (time.time() - max_age,)).rowcount
+            if limit is not None:
+                total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > limit:
+                    # free down to 90% so we don't evict again on the next put
+                    excess = total - int(limit * 0.9)
+                    freed = 0; doomed: List[str] = []
+                    for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                        if freed >= excess:
+                            break
+                        doomed.append(key); freed += size
+                    self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in doomed])
+                    removed += len(doomed)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            n, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": n, "bytes": size}
+
+    def close(self) -> None:
+        self._db.close()
+
+    @classmethod
+    def shared(cls, path: str, max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        """Per-process handle for `path`; sqlite connections must not be carried across a fork."""
+        k = (os.getpid(), cls.__name__, os.path.abspath(path))
+        c = _OPEN.get(k)
+        if c is None:
+            c = _OPEN[k] = cls(path, max_bytes=max_bytes, max_age=max_age)
+        return c
+
+_OPEN: Dict[Tuple[int, str, str], DiskCache] = {}
+
+# ------------ Extracted facts ------------
+
+class FactCache(DiskCache):
+    """Caches extract_all() output keyed by hash(extractor rules version, text)."""
+
+    def extract(self, text: str) -> List[Fact]:
+        key = content_key(rules_version(), text)
+        blob = self.get(key)
+        if blob is not None:
+            # entries written before offsets were cached have no sixth field
+            return [Fact(*e[:5], start=e[5] if len(e) > 5 else None) for e in json.loads(blob)]
+        facts = extract_all(text)
+        payload = [[f.type, f.key, f.value, f.negated, f.raw, f.start] for f in facts]
+        self.put(key, json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        return facts
@@ -0,0 +1,113 @@
+# evalsuite/checkpoint.py
+"""
+Crash-safe progress log for main.run.
+
+Finished rows are appended to <out>/.checkpoint/rows.jsonl as {"i": ordinal, "id": ..., "row": ...}.
+Every few cases (or seconds) the file is fsync'ed and state.json -- which records how many
+bytes of rows.jsonl are known-good, and the run settings -- is replaced atomically. A resumed
+run truncates anything past that mark (a half-written line from the crash), reuses every
+committed row whose id and fingerprint still match its input case, and only scores the rest.
+Row offsets are only indexed on resume; while writing, just a count is kept.
+"""
+import json, os, shutil, time
+from typing import Any, Dict, Optional, Tuple
+
+class CheckpointMismatch(RuntimeError):
+    """--resume with run settings other than the checkpointed run's."""
+
+class Checkpoint:
+    def __init__(self, out_dir: str, every: int = 100, interval: float = 30.0):
+        self.dir = os.path.join(out_dir, ".checkpoint")
+        self.rows_path = os.path.join(self.dir, "rows.jsonl")
+        self.state_path = os.path.join(self.dir, "state.json")
+        self.every = every
+        self.interval = interval
+        self._offsets: Dict[int, Tuple[Any, Optional[str], int]] = {}  # ordinal -> (id, fingerprint, offset)
+        self._f = None
+        self._rf = None
+        self.rows = 0
+        self.last_ordinal: Optional[int] = None
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self.config: Dict[str, Any] = {}
+
+    # ---- resume side ----
+    def load(self) -> int:
+        """Indexes committed rows (dropping any uncommitted tail); returns how many there are."""
+        if not os.path.exists(self.state_path):
+            return 0
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.config = state.get("config") or {}
+        good = int(state.get("bytes", 0))
+        with open(self.rows_path, "r+b") as f:
+            f.truncate(good)
+            pos = 0
+            for line in f:
+                rec = json.loads(line)
+                self._offsets[rec["i"]] = (rec["id"], rec["row"].get("fingerprint"), pos)
+                pos += len(line)
+        self.rows = len(self._offsets)
+        return self.rows
+
+    def check(self, config: Dict[str, Any], force: bool = False) -> None:
+        """Raises CheckpointMismatch if the loaded checkpoint was written with other settings."""
+        if self.config and self.config != config and not force:
+            diff = sorted(k for k in set(self.config) | set(config) if self.config.get(k) != config.get(k))
+            raise CheckpointMismatch(f"run settings differ from the checkpoint in {self.dir} ({', '.join(diff)}); "
+                                     f"rerun with the original settings, or pass --force to reuse only the rows "
+                                     f"whose inputs are unchanged")
+
+    def done(self, ordinal: int, cid: Any, fingerprint: Optional[str] = None) -> bool:
+        """Whether `ordinal` is checkpointed for this case; a stale row (other fingerprint) is not."""
+        hit = self._offsets.get(ordinal)
+        return hit is not None and hit[0] == cid and (fingerprint is None or hit[1] == fingerprint)
+
+    def get(self, ordinal: int) -> Dict[str, Any]:
+        if self._rf is None:
+            self._rf = open(self.rows_path, "rb")
+        self._rf.seek(self._offsets[ordinal][2])
+        return json.loads(self._rf.readline())["row"]
+
+    # ---- writing side ----
+    def open(self, config: Optional[Dict[str, Any]] = None, resume: bool = False) -> None:
+        os.makedirs(self.dir, exist_ok=True)
+        if config is not None:
+            self.config = config
+        self._f = open(self.rows_path, "ab" if resume else "wb")
+        if not resume:
+            self._offsets.clear()
+            self.rows = 0
+        self.commit()
+
+    def add(self, ordinal: int, row: Dict[str, Any]) -> None:
+        line = json.dumps({"i": ordinal, "id": row.get("id"), "row": row}, ensure_ascii=False) + "\n"
+        self._f.write(line.encode("utf-8"))
+        self.rows += 1
+        self.last_ordinal = ordinal
+        self._pending += 1
+        if self._pending >= self.every or time.monotonic() - self._last_commit >= self.interval:
+            self.commit()
+
+    def commit(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"bytes": self._f.tell(), "rows": self.rows, "last_ordinal": self.last_ordinal,
+                       "config": self.config, "updated": time.time()}, f)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.state_path)
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def close(self, remove: bool = False) -> None:
+        if self._f is not None:
+            self.commit()
+            self._f.close()
+            self._f = None
+        if self._rf is not None:
+            self._rf.close()
+            self._rf = None
+        if remove:
+            shutil.rmtree(self.dir, ignore_errors=True)
@@ -0,0 +1,319 @@
+# evalsuite/columnar.py
+"""
+Columnar per-case output for notebooks: one array per metric instead of nested JSON rows.
+
+  parquet:  <out>/cases.parquet, <out>/facts.parquet           (needs pyarrow)
+  npy:      <out>/columns/<col>.npy, <out>/facts/<col>.npy     (needs numpy)
+
+`cases` has one entry per case (missing values are NaN); `facts` has one entry per missing /
+hallucinated fact or contradiction message, tied back to its case by `case` (row number in
+`cases`). Rows are gathered in blocks of BLOCK and converted with one numpy call per column,
+so writing costs little more than the JSONL it sits next to, and summary.json is reduced
+from the finished arrays with numpy sums. Those are pairwise, not exact like
+SummaryAccumulator's, so a float average may differ from a JSON-only run in the last bit.
+
+String columns (id, kind, type, key, value, raw) are Arrow string arrays in Parquet. In npy they
+are stored as <col>.offsets.npy (int64, one more entry than there are rows) plus
+<col>.data.npy (the UTF-8 bytes of all values back to back), since a fixed-width numpy
+string array pads every value to the longest one. The loaders return Parquet strings as
+object arrays and npy strings as a StringColumn that decodes values only when asked.
+"""
+import os
+from typing import Any, Dict, List
+from .metrics import bleu_from_stats
+
+FORMATS = ("parquet", "npy")
+
+INT_COLUMNS = ("missing_count", "hallucinated_count", "contradictions_count") + tuple(
+    f"bleu_{k}_{i}" for k in ("match", "total") for i in range(1, 5)) + ("bleu_cand_len", "bleu_ref_len")
+FLOAT_COLUMNS = ("ref_precision", "ref_recall", "ref_f1", "bleu", "rouge_l_f",
+                 "llm_completeness", "llm_grounding", "llm_clinical_accuracy")
+FACT_COLUMNS = ("case", "kind", "type", "key", "value", "negated", "raw")
+STRING_COLUMNS = ("id", "kind", "type", "key", "value", "raw")
+
+# summary.json key -> column, in SummaryAccumulator.METRICS order
+SUMMARY_COLUMNS = (
+    ("avg_missing", "missing_count"), ("avg_hallucinated", "hallucinated_count"),
+    ("avg_contradictions", "contradictions_count"), ("avg_ref_precision", "ref_precision"),
+    ("avg_ref_recall", "ref_recall"), ("avg_ref_f1", "ref_f1"), ("avg_bleu", "bleu"),
+    ("avg_rouge_l_f", "rouge_l_f"),
+)
+LLM_COLUMNS = ("llm_completeness", "llm_grounding", "llm_clinical_accuracy")
+
+def _numpy():
+    try:
+        import numpy  # type: ignore
+    except Exception as e:
+        raise RuntimeError(f"numpy is required for columnar output: {e}")
+    return numpy
+
+def _pyarrow():
+    try:
+        import pyarrow, pyarrow.parquet  # type: ignore  # noqa: F401
+    except Exception as e:
+        raise RuntimeError(f"pyarrow is required for --columnar parquet: {e}")
+    return pyarrow
+
+def _float(x: Any) -> float:
+    return float("nan") if x is None else float(x)
+
+class ColumnarWriter:
+    BLOCK = 65536
+
+    def __init__(self, out_dir: str, fmt: str = "parquet"):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown columnar format {fmt!r}; expected one of {FORMATS}")
+        self.np = _numpy()
+        self.pa = _pyarrow() if fmt == "parquet" else None
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.num_cases = 0
+        self._cases: Dict[str, List[Any]] = self._empty_cases()
+        self._facts: Dict[str, List[Any]] = {c: [] for c in FACT_COLUMNS}
+        # finished blocks go straight to disk: parquet row groups, or appended to the npy files
+        self._pq: Dict[str, Any] = {}
+        self._npy: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _empty_cases() -> Dict[str, List[Any]]:
+        return {c: [] for c in ("id", "judged") + INT_COLUMNS + FLOAT_COLUMNS}
+
+    def add(self, r: Dict[str, Any]) -> None:
+        c = self._cases
+        case = self.num_cases
+        c["id"].append(str(r.get("id")))
+        for k in ("missing_count", "hallucinated_count", "contradictions_count"):
+            c[k].append(r[k])
+        a = r["ref_align"]
+        c["ref_precision"].append(_float(a["precision"]))
+        c["ref_recall"].append(_float(a["recall"]))
+        c["ref_f1"].append(_float(a["f1"]))
+        t = r.get("text_overlap") or {}
+        c["bleu"].append(_float(t.get("bleu")))
+        c["rouge_l_f"].append(_float(t.get("rouge_l_f")))
+        s = t.get("bleu_stats") or {}
+        for i in range(4):
+            c[f"bleu_match_{i + 1}"].append(s["match"][i] if s else 0)
+            c[f"bleu_total_{i + 1}"].append(s["total"][i] if s else 0)
+        c["bleu_cand_len"].append(s.get("cand_len", 0))
+        c["bleu_ref_len"].append(s.get("ref_len", 0))
+        j = r.get("llm_judge")
+        c["judged"].append(isinstance(j, dict))
+        j = j if isinstance(j, dict) else {}
+        for k in LLM_COLUMNS:
+            c[k].append(_float(j.get(k[len("llm_"):])))
+
+        f = self._facts
+        for kind in ("missing", "hallucinated"):
+            for fact in r.get(kind) or ():
+                f["case"].append(case); f["kind"].append(kind)
+                f["type"].append(fact.get("type") or ""); f["key"].append(fact.get("key") or "")
+                v = fact.get("value")
+                f["value"].append("" if v is None else str(v))
+                f["negated"].append(bool(fact.get("negated"))); f["raw"].append(fact.get("raw") or "")
+        for msg in r.get("contradictions") or ():
+            f["case"].append(case); f["kind"].append("contradiction")
+            f["type"].append(""); f["key"].append(""); f["value"].append("")
+            f["negated"].append(False); f["raw"].append(str(msg))
+
+        self.num_cases += 1
+        if len(c["id"]) >= self.BLOCK:
+            self._flush()
+
+    def _arrays(self, cols: Dict[str, List[Any]]) -> Dict[str, Any]:
+        np = self.np
+        out = {}
+        for k, v in cols.items():
+            if k in INT_COLUMNS or k == "case":
+                out[k] = np.asarray(v, dtype=np.int64)
+            elif k in FLOAT_COLUMNS:
+                out[k] = np.asarray(v, dtype=np.float64)
+            elif k in ("judged", "negated"):
+                out[k] = np.asarray(v, dtype=bool)
+            else:
+                out[k] = np.asarray(v, dtype=object)  # not dtype=str: that pads to the longest value
+        return out
+
+    def _flush(self) -> None:
+        for name, cols in (("cases", self._cases), ("facts", self._facts)):
+            arrays = self._arrays(cols)
+            if self.pa is None:
+                self._write_npy(name, arrays)
+            elif name == "cases" or len(arrays["case"]):
+                self._write_parquet(name, arrays)
+        self._cases = self._empty_cases()
+        self._facts = {c: [] for c in FACT_COLUMNS}
+
+    def _write_npy(self, name: str, arrays: Dict[str, Any]) -> None:
+        files = self._npy.get(name)
+        if files is None:
+            d = os.path.join(self.out_dir, "columns" if name == "cases" else name)
+            os.makedirs(d, exist_ok=True)
+            files = self._npy[name] = {
+                k: _NpyStrings(d, k) if k in STRING_COLUMNS else _NpyAppender(os.path.join(d, f"{k}.npy"), a.dtype)
+                for k, a in arrays.items()}
+        for k, a in arrays.items():
+            files[k].append(a)
+
+    def _write_parquet(self, name: str, arrays: Dict[str, Any]) -> None:
+        import pyarrow.parquet as pq  # type: ignore
+        pa = self.pa
+        table = pa.table({k: pa.array(v, type=pa.string()) if k in STRING_COLUMNS else pa.array(v)
+                          for k, v in arrays.items()})
+        if name not in self._pq:
+            self._pq[name] = pq.ParquetWriter(os.path.join(self.out_dir, f"{name}.parquet"), table.schema)
+        self._pq[name].write_table(table)
+
+    def close(self) -> Dict[str, Any]:
+        """Writes the remaining rows and returns the summary.json metrics reduced from the arrays."""
+        self._flush()
+        if self.pa is not None:
+            if "facts" not in self._pq:
+                self._write_parquet("facts", self._arrays({c: [] for c in FACT_COLUMNS}))
+            for w in self._pq.values():
+                w.close()
+        else:
+            for files in self._npy.values():
+                for f in files.values():
+                    f.close()
+        return summarize_columns(_load(self.out_dir, "cases", "columns", skip=("id",)))
+
+class _NpyAppender:
+    """
+    A 1-d .npy file written block by block: the header is reserved up front and filled in
+    with the final length by close(), so no block has to stay in memory.
+    """
+    HEADER = 128
+
+    def __init__(self, path: str, dtype):
+        np = _numpy()
+        self.dtype = np.dtype(dtype)
+        self.descr = np.lib.format.dtype_to_descr(self.dtype)
+        self.n = 0
+        self._f = open(path, "wb")
+        self._f.write(b"\0" * self.HEADER)
+
+    def append(self, a) -> None:
+        self._f.write(_numpy().ascontiguousarray(a, dtype=self.dtype).tobytes())
+        self.n += len(a)
+
+    def close(self) -> None:
+        header = repr({"descr": self.descr, "fortran_order": False, "shape": (self.n,)}).encode("latin1")
+        size = self.HEADER - 10  # magic (6), version (2), header length (2)
+        self._f.seek(0)
+        self._f.write(b"\x93NUMPY\x01\x00" + size.to_bytes(2, "little") + header.ljust(size - 1) + b"\n")
+        self._f.close()
+
+class _NpyStrings:
+    """<col>.offsets.npy + <col>.data.npy, appended block by block."""
+
+    def __init__(self, d: str, col: str):
+        np = _numpy()
+        self.offsets = _NpyAppender(os.path.join(d, f"{col}.offsets.npy"), np.int64)
+        self.data = _NpyAppender(os.path.join(d, f"{col}.data.npy"), np.uint8)
+        self.offsets.append(np.zeros(1, dtype=np.int64))
+        self.size = 0
+
+    def append(self, values) -> None:
+        offsets, data = _encode_strings(_numpy(), values)
+        self.offsets.append(offsets[1:] + self.size)
+        self.data.append(data)
+        self.size += len(data)
+
+    def close(self) -> None:
+        self.offsets.close(); self.data.close()
+
+def _encode_strings(np, values) -> tuple:
+    """(offsets, utf-8 bytes) for a sequence of str: value i is data[offsets[i]:offsets[i + 1]]."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+class StringColumn:
+    """
+    An npy string column, read on access: value i is data[offsets[i]:offsets[i + 1]] decoded.
+    Both arrays stay memory-mapped, so loading costs nothing per row. Indexing with an int
+    gives a str, with a slice a list; to_numpy() decodes everything into an object array.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets, self.data = offsets, data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        buf = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        for a, b in zip(offsets, offsets[1:]):
+            yield buf[a:b].decode("utf-8")
+
+    def to_numpy(self) -> Any:
+        out = _numpy().empty(len(self), dtype=object)
+        out[:] = list(self)
+        return out
+
+    def __array__(self, dtype=None, copy=None) -> Any:
+        a = self.to_numpy()
+        return a if dtype is None else a.astype(dtype)
+
+def summarize_columns(cols: Dict[str, Any]) -> Dict[str, Any]:
+    """summary.json metrics from case columns (as written by ColumnarWriter or load_cases)."""
+    np = _numpy()
+
+    def avg(a) -> float:
+        a = np.asarray(a, dtype=np.float64)
+        vals = a[~np.isnan(a)]
+        return float(vals.sum()) / len(vals) if len(vals) else 0.0
+
+    out: Dict[str, Any] = {"num_cases": int(len(cols["missing_count"]))}
+    for key, col in SUMMARY_COLUMNS:
+        out[key] = avg(cols[col])
+    match = [int(cols[f"bleu_match_{i}"].sum()) for i in range(1, 5)]
+    total = [int(cols[f"bleu_total_{i}"].sum()) for i in range(1, 5)]
+    cand_len, ref_len = int(cols["bleu_cand_len"].sum()), int(cols["bleu_ref_len"].sum())
+    out["corpus_bleu"] = bleu_from_stats(match, total, cand_len, ref_len) if cand_len and ref_len else None
+    judged = bool(cols["judged"].any())
+    for col in LLM_COLUMNS:
+        out[f"avg_{col}"] = avg(cols[col]) if judged else None
+    return out
+
+def _load(out_dir: str, table: str, npy_dir: str, skip: tuple = ()) -> Dict[str, Any]:
+    path = os.path.join(out_dir, f"{table}.parquet")
+    if os.path.exists(path):
+        _pyarrow()
+        import pyarrow.parquet as pq  # type: ignore
+        names = [k for k in pq.read_schema(path).names if k not in skip]
+        t = pq.read_table(path, columns=names)
+        return {k: t.column(k).to_numpy() for k in t.column_names}
+    np = _numpy()
+    d = os.path.join(out_dir, npy_dir)
+    out: Dict[str, Any] = {}
+    for name in sorted(os.listdir(d)):
+        if name.split(".")[0] in skip:
+            continue
+        if name.endswith(".offsets.npy"):
+            k = name[:-len(".offsets.npy")]
+            out[k] = StringColumn(np.load(os.path.join(d, name), mmap_mode="r"),
+                                  np.load(os.path.join(d, f"{k}.data.npy"), mmap_mode="r"))
+        elif name.endswith(".npy") and not name.endswith(".data.npy"):
+            out[name[:-len(".npy")]] = np.load(os.path.join(d, name), mmap_mode="r")
+    return out
+
+def load_cases(out_dir: str) -> Dict[str, Any]:
+    """Case columns of a --columnar run as numpy arrays (npy columns are memory-mapped)."""
+    return _load(out_dir, "cases", "columns")
+
+def load_facts(out_dir: str) -> Dict[str, Any]:
+    """Missing/hallucinated facts and contradiction messages of a --columnar run, one entry per item."""
+    return _load(out_dir, "facts", "facts")
@@ -1,14 +1,20 @@
 \
-import re
-from dataclasses import dataclass
-from typing import List, Optional
+import re, hashlib, sys
+from dataclasses import FrozenInstanceError
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 from .matchers import extract_number
+from .lexicon import Lexicon
+
+# bump when extraction semantics change in a way the source hash below can't see
+EXTRACTOR_VERSION = "1"
 
 DIAG_SYMPTOMS = [
     "fever", "cough", "sore throat", "shortness of breath", "chest pain",
     "headache", "nausea", "vomiting", "diarrhea", "fatigue", "dizziness",
     "hypertension", "diabetes", "asthma", "covid", "influenza", "otitis",
 ]
+DIAGNOSES = ("hypertension", "diabetes", "asthma", "covid", "influenza", "otitis")
 NEGATION_CUES = ["no", "denies", "without", "not", "negative for", "nkda", "no known drug allergies"]
 
 VITAL_PATTERNS = {
@@ -20,32 +26,113 @@ VITAL_PATTERNS = {
     "bp": r"(?:bp|blood pressure)[:\s]*(\d{2,3})\s*/\s*(\d{2,3})\b",
 }
 
-@dataclass(frozen=True)
 class Fact:
-    type: str
-    key: str
-    value: Optional[str]
-    negated: bool
-    raw: str
+    """
+    One extracted fact; immutable and slotted, since long transcripts produce many of them.
+    `type` and `key` are interned so repeats share one string. `raw` may be given as a
+    (text, start, end) span into the source text, or (text, start, end, True) for the
+    lowercased slice, and is only sliced out when read. Vitals carry their parsed number in
+    `num` (float, or (systolic, diastolic) for bp) so matching does not re-parse `value`;
+    facts built without it (e.g. from the fact cache) parse lazily. `start` is the offset of
+    the match in the original source text (taken from a raw span), used to place the fact in
+    a note section. Equality, hashing and repr are those of the former frozen dataclass.
+    """
+    __slots__ = ("type", "key", "value", "negated", "_raw", "num", "start")
+    FIELDS = ("type", "key", "value", "negated", "raw")
+
+    def __init__(self, type: str, key: str, value: Optional[str], negated: bool,
+                 raw: Union[str, Tuple], num: Any = None, start: Optional[int] = None):
+        init = object.__setattr__
+        init(self, "type", sys.intern(type)); init(self, "key", sys.intern(key))
+        init(self, "value", value); init(self, "negated", negated)
+        init(self, "_raw", raw); init(self, "num", num)
+        init(self, "start", raw[1] if start is None and raw.__class__ is tuple else start)
+
+    @property
+    def raw(self) -> str:
+        r = self._raw
+        if r.__class__ is tuple:
+            r = r[0][r[1]:r[2]].lower() if len(r) == 4 else r[0][r[1]:r[2]]
+            object.__setattr__(self, "_raw", r)
+        return r
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    __delattr__ = __setattr__
+
+    def astuple(self) -> Tuple[str, str, Optional[str], bool, str]:
+        return (self.type, self.key, self.value, self.negated, self.raw)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The per_case.jsonl form of this fact."""
+        return {"type": self.type, "key": self.key, "value": self.value, "negated": self.negated, "raw": self.raw}
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        return (f"Fact(type={self.type!r}, key={self.key!r}, value={self.value!r}, "
+                f"negated={self.negated!r}, raw={self.raw!r})")
+
+    def __reduce__(self):
+        return (Fact, self.astuple() + (self.num, self.start))
 
 def _negated(text: str, start: int) -> bool:
     window = text[max(0, start-30):start].lower()
     return any(cue in window for cue in NEGATION_CUES)
 
+class _Lowered:
+    """
+    text.lower() for matching, with match offsets mapped back to `text`. Lowercasing can
+    change the length ("İ" becomes two code points), so offsets are only shared when it did
+    not; otherwise each lowered position is mapped to the character it came from. Raw spans
+    point into the original text, so facts do not keep the lowered copy alive; only for
+    non-ASCII text, where slicing then lowering may not reproduce the lowered slice (final
+    sigma), is raw sliced eagerly.
+    """
+    __slots__ = ("text", "lowered", "ascii", "_pos")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lowered = text.lower()
+        self.ascii = text.isascii()
+        self._pos: Optional[List[int]] = None
+        if len(self.lowered) != len(text):
+            pos: List[int] = []
+            for i, ch in enumerate(text):
+                pos.extend([i] * len(ch.lower()))
+            pos.append(len(text))
+            self._pos = pos
+
+    def fact(self, type: str, key: str, value: Optional[str], negated: bool, start: int, end: int,
+             num: Any = None) -> Fact:
+        """A Fact for the match [start, end) of the lowered text."""
+        if self.ascii:
+            return Fact(type, key, value, negated, (self.text, start, end, True), num)
+        orig = self._pos[start] if self._pos is not None else start
+        return Fact(type, key, value, negated, self.lowered[start:end], num, start=orig)
+
 def extract_vitals(text: str) -> List[Fact]:
     out: List[Fact] = []
-    lowered = text.lower()
+    low = _Lowered(text)
     for k, pat in VITAL_PATTERNS.items():
-        for m in re.finditer(pat, lowered):
+        for m in re.finditer(pat, low.lowered):
+            s, e = m.start(), m.end()
             if k == "bp":
-                sys, dia = m.group(1), m.group(2)
-                out.append(Fact("vital", "bp", f"{sys}/{dia}", False, m.group(0)))
+                sys_, dia = m.group(1), m.group(2)
+                out.append(low.fact("vital", "bp", f"{sys_}/{dia}", False, s, e, (float(sys_), float(dia))))
             elif k == "temperature_f":
-                t = m.group(1); out.append(Fact("vital", "temperature_f", f"{t} F", False, m.group(0)))
+                t = m.group(1); out.append(low.fact("vital", "temperature_f", f"{t} F", False, s, e, float(t)))
             elif k == "temperature_c":
-                t = m.group(1); out.append(Fact("vital", "temperature_c", f"{t} C", False, m.group(0)))
+                t = m.group(1); out.append(low.fact("vital", "temperature_c", f"{t} C", False, s, e, float(t)))
             else:
-                val = m.group(1); out.append(Fact("vital", k, val, False, m.group(0)))
+                val = m.group(1); out.append(low.fact("vital", k, val, False, s, e, float(val)))
     return out
 
 def extract_allergies(text: str) -> List[Fact]:
@@ -55,7 +142,7 @@ def extract_allergies(text: str) -> List[Fact]:
         return out
     for m in re.finditer(r"allergic to\s+([a-zA-Z0-9\-\s]+?)([\.,;\n]|$)", text, flags=re.I):
         drug = m.group(1).strip().lower()
-        out.append(Fact("allergy", drug, "present", False, m.group(0)))
+        out.append(Fact("allergy", drug, "present", False, (text, m.start(), m.end())))
     return out
 
 def extract_meds(text: str) -> List[Fact]:
@@ -64,17 +151,32 @@ def extract_meds(text: str) -> List[Fact]:
         name = m.group(1).lower()
         dose = m.group(2) + " " + m.group(3).lower()
         tail = " ".join(m.group(4).split()[:4])
-        out.append(Fact("medication", name, (dose + " " + tail).strip(), False, m.group(0)))
+        out.append(Fact("medication", name, (dose + " " + tail).strip(), False, (text, m.start(), m.end())))
     return out
 
-def extract_diags_symptoms(text: str) -> List[Fact]:
+_lexicon: Optional[Lexicon] = None
+
+def default_lexicon() -> Lexicon:
+    return Lexicon((t, "diagnosis" if t in DIAGNOSES else "symptom") for t in DIAG_SYMPTOMS)
+
+def set_lexicon(lexicon: Optional[Lexicon]) -> None:
+    """Swaps the term list used by extract_diags_symptoms (None restores DIAG_SYMPTOMS)."""
+    global _lexicon
+    _lexicon = lexicon
+
+def active_lexicon() -> Lexicon:
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = default_lexicon()
+    return _lexicon
+
+def extract_diags_symptoms(text: str, lexicon: Optional[Lexicon] = None) -> List[Fact]:
     out: List[Fact] = []
-    lowered = text.lower()
-    for term in DIAG_SYMPTOMS:
-        for m in re.finditer(rf"\b{re.escape(term)}\b", lowered):
-            neg = _negated(lowered, m.start())
-            out.append(Fact("diagnosis" if term in ('hypertension','diabetes','asthma','covid','influenza','otitis')
-                            else "symptom", term, "present" if not neg else "absent", neg, m.group(0)))
+    lex = lexicon or active_lexicon()
+    low = _Lowered(text)
+    for tid, start, end in lex.find(low.lowered):
+        neg = _negated(low.lowered, start)
+        out.append(low.fact(lex.categories[tid], lex.terms[tid], "present" if not neg else "absent", neg, start, end))
     return out
 
 def extract_all(text: str) -> List[Fact]:
@@ -84,3 +186,12 @@ def extract_all(text: str) -> List[Fact]:
     facts.extend(extract_meds(text))
     facts.extend(extract_diags_symptoms(text))
     return facts
+
+@lru_cache(maxsize=1)
+def _source_hash() -> str:
+    with open(__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def rules_version() -> str:
+    """Fingerprint of the extraction rules (this module's source + active lexicon); keys persistent fact caches."""
+    return f"{EXTRACTOR_VERSION}:{_source_hash()}:{active_lexicon().fingerprint}"
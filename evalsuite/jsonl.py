@@ -0,0 +1,152 @@
+# evalsuite/jsonl.py
+"""
+JSONL ingestion: sequential reading with the fastest available decoder, and random access
+through a sidecar byte-offset index.
+
+The index (`<input>.idx`) is built with one pass over the file and rebuilt whenever the
+input's size or mtime changes. It holds the byte span of every non-blank line plus each
+row's "id", so any case can be fetched by position or id by slicing one line out of an
+mmap of the input and decoding just that line.
+
+Sequential reads (and writes, via open_compressed) also accept `.gz` and `.zst` files;
+random access needs an uncompressed input.
+"""
+import gzip, io, json, mmap, os, sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import orjson  # type: ignore
+
+    def loads(b):
+        return orjson.loads(b)
+except Exception:  # orjson is optional; json.loads takes bytes as well
+    loads = json.loads
+
+INDEX_VERSION = 1
+COMPRESSED = (".gz", ".gzip", ".zst")
+
+def open_compressed(path: str, mode: str = "rb"):
+    """
+    Binary file object for `path` ("rb" or "wb"), transparently (de)compressing by suffix:
+    `.gz`/`.gzip` with gzip, `.zst` with zstandard (optional dependency), anything else as-is.
+    """
+    if path.endswith((".gz", ".gzip")):
+        return gzip.open(path, mode)
+    if path.endswith(".zst"):
+        try:
+            import zstandard  # type: ignore
+        except Exception as e:
+            raise RuntimeError(f"zstandard is required for .zst files: {e}")
+        raw = open(path, mode)
+        if "w" in mode:
+            return zstandard.ZstdCompressor().stream_writer(raw)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    return open(path, mode)
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Every non-blank line of `path`, decoded, in order."""
+    with open_compressed(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield loads(line)
+
+class JsonlIndex:
+    def __init__(self, path: str, sidecar: bool = True):
+        if path.endswith(COMPRESSED):
+            raise ValueError(f"{path}: random access (--start/--ids/--shard) needs an uncompressed input")
+        self.path = path
+        self.idx_path = path + ".idx"
+        st = os.stat(path)
+        self._stamp = {"version": INDEX_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        self.ids: List[Any] = []
+        self._spans = array("Q")  # start, end per row
+        self._by_id: Optional[Dict[str, int]] = None
+        if not (sidecar and self._load()):
+            self._build()
+            if sidecar:
+                self._save()
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+
+    # ---- sidecar ----
+    def _load(self) -> bool:
+        try:
+            with open(self.idx_path, "rb") as f:
+                header = json.loads(f.readline())
+                if {k: header.get(k) for k in self._stamp} != self._stamp:
+                    return False
+                self.ids = json.loads(f.readline())
+                self._spans.frombytes(f.read())
+        except (OSError, ValueError):
+            return False
+        return len(self._spans) == 2 * len(self.ids) == 2 * header.get("count", -1)
+
+    def _build(self) -> None:
+        self.ids, self._spans = [], array("Q")  # drop whatever a rejected sidecar left behind
+        pos = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                start, end = pos, pos + len(line)
+                pos = end
+                body = line.strip()
+                if not body:
+                    continue
+                lead = len(line) - len(line.lstrip())
+                self._spans.append(start + lead); self._spans.append(start + lead + len(body))
+                self.ids.append(loads(body).get("id"))
+
+    def _save(self) -> None:
+        tmp = self.idx_path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(dict(self._stamp, count=len(self.ids))).encode("utf-8") + b"\n")
+                f.write(json.dumps(self.ids, ensure_ascii=False).encode("utf-8") + b"\n")
+                self._spans.tofile(f)
+            os.replace(tmp, self.idx_path)
+        except OSError as e:
+            # read-only input dir: keep the in-memory index for this run
+            sys.stderr.write(f"[jsonl] could not write {self.idx_path}: {e}\n")
+
+    # ---- access ----
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def raw(self, i: int) -> bytes:
+        return self._mm[self._spans[2 * i]:self._spans[2 * i + 1]]
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self.ids)
+        if not 0 <= i < len(self.ids):
+            raise IndexError(i)
+        return loads(self.raw(i))
+
+    def ordinal(self, cid: Any) -> Optional[int]:
+        """Position of the first row whose id is `cid` (compared as strings), or None."""
+        if self._by_id is None:
+            self._by_id = {}
+            for i, x in enumerate(self.ids):
+                self._by_id.setdefault(str(x), i)
+        return self._by_id.get(str(cid))
+
+    def rows(self, ordinals: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        for i in ordinals:
+            yield self[i]
+
+    def split(self, n: int) -> List[range]:
+        """`n` contiguous, near-equal ranges of row positions covering the file."""
+        total = len(self.ids)
+        return [range(k * total // n, (k + 1) * total // n) for k in range(n)]
+
+    def close(self) -> None:
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._f.close()
+
+    def __enter__(self) -> "JsonlIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
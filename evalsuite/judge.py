@@ -1,6 +1,9 @@
 # evalsuite/judge.py
-import os, json, re, sys
-from typing import Optional, Dict, Any
+import os, json, re, sys, time, random, asyncio, threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Optional, Dict, Any, Iterable, Iterator, List, Tuple, Union
+from .cache import DiskCache, content_key
 
 PROMPT = """You are a clinical documentation auditor. Given a transcript, a generated SOAP note, and the clinician reference,
 rate the note on:
@@ -12,6 +15,9 @@ Respond as strict JSON ONLY (no prose, no markdown), exactly:
 {"completeness": <int 1..5>, "grounding": <int 1..5>, "clinical_accuracy": <int 1..5>, "rationale": "<short reason>"}
 """
 
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
 def _safe_parse_json(s: str) -> Optional[Dict[str, Any]]:
     s = s.strip()
     try:
@@ -25,8 +31,49 @@ def _safe_parse_json(s: str) -> Optional[Dict[str, Any]]:
                 return None
     return None
 
+def _judge_content(transcript: str, note: str, reference: str) -> str:
+    return f"TRANSCRIPT:\n{transcript}\n\nNOTE:\n{note}\n\nREFERENCE:\n{reference}\n\nRubric:\n{PROMPT}"
+
+Content = Union[str, List[Dict[str, str]]]
+
+def _as_messages(content: Content) -> List[Dict[str, str]]:
+    """A prompt string becomes one user message; built message lists (evalsuite.prompt) pass through."""
+    return content if isinstance(content, list) else [{"role": "user", "content": content}]
+
+def _build_content(transcript: str, note: str, reference: str, prompt=None, facts=None,
+                   info: Optional[Dict[str, int]] = None, evidence=None) -> Tuple[Content, str]:
+    """(what to send, transcript as sent). With a JudgePrompt, its token stats go into `info`."""
+    if prompt is None:
+        return _judge_content(transcript, note, reference), transcript
+    messages, sent, stats = prompt.build(transcript, note, reference, facts, evidence)
+    if info is not None:
+        info.update(stats)
+    return messages, sent
+
+def _coerce_scores(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    for k in ("completeness","grounding","clinical_accuracy"):
+        if k in parsed:
+            try: parsed[k] = int(parsed[k])
+            except Exception: pass
+    return parsed
+
+def _parse_reply(txt: Optional[str], label: str) -> Optional[Dict[str, Any]]:
+    if txt is None:
+        return None
+    parsed = _safe_parse_json(txt)
+    if not isinstance(parsed, dict):
+        sys.stderr.write(f"[judge] {label} returned non-JSON; skipping.\n")
+        return None
+    return _coerce_scores(parsed)
+
+def _judge_model(backend: str, model_name: Optional[str]) -> str:
+    if backend == "openai":
+        return "gpt-4o-mini"
+    # pick a reasonable instruct model; you can override via --llm-model
+    return model_name or "meta-llama/llama-3.1-8b-instruct"
+
 # ------------ OpenAI backend ------------
-def judge_with_openai(transcript: str, note: str, reference: str):
+def _openai_reply(content: Content) -> Optional[str]:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         sys.stderr.write("[judge] OPENAI_API_KEY not set; skipping OpenAI judge.\n")
@@ -39,28 +86,21 @@ def judge_with_openai(transcript: str, note: str, reference: str):
 
     try:
         client = openai.OpenAI(api_key=api_key)
-        content = f"TRANSCRIPT:\n{transcript}\n\nNOTE:\n{note}\n\nREFERENCE:\n{reference}\n\nRubric:\n{PROMPT}"
         resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": content}],
+            model=_judge_model("openai", None),
+            messages=_as_messages(content),
             temperature=0.0,
         )
-        txt = resp.choices[0].message.content.strip()
-        parsed = _safe_parse_json(txt)
-        if not isinstance(parsed, dict):
-            sys.stderr.write("[judge] OpenAI returned non-JSON; skipping.\n")
-            return None
-        for k in ("completeness","grounding","clinical_accuracy"):
-            if k in parsed:
-                try: parsed[k] = int(parsed[k])
-                except Exception: pass
-        return parsed
+        return resp.choices[0].message.content.strip()
     except Exception as e:
         sys.stderr.write(f"[judge] OpenAI exception: {e}\n")
         return None
 
+def judge_with_openai(transcript: str, note: str, reference: str):
+    return _parse_reply(_openai_reply(_judge_content(transcript, note, reference)), "OpenAI")
+
 # ------------ OpenRouter backend ------------
-def judge_with_openrouter(transcript: str, note: str, reference: str, model_name: Optional[str]):
+def _openrouter_reply(content: Content, model_name: Optional[str]) -> Optional[str]:
     """
     Calls OpenRouter's /chat/completions endpoint.
     Docs: https://openrouter.ai/docs
@@ -76,13 +116,6 @@ def judge_with_openrouter(transcript: str, note: str, reference: str, model_name
         sys.stderr.write("[judge] OPENROUTER_API_KEY not set; skipping OpenRouter judge.\n")
         return None
 
-    if not model_name:
-        # pick a reasonable instruct model; you can override via --llm-model
-        model_name = "meta-llama/llama-3.1-8b-instruct"
-
-    # compose prompt
-    content = f"TRANSCRIPT:\n{transcript}\n\nNOTE:\n{note}\n\nREFERENCE:\n{reference}\n\nRubric:\n{PROMPT}"
-
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
@@ -91,37 +124,329 @@ def judge_with_openrouter(transcript: str, note: str, reference: str, model_name
         "X-Title": os.getenv("OPENROUTER_APP_NAME", "DeepScribe Evals"),
     }
     payload = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": content}],
+        "model": _judge_model("openrouter", model_name),
+        "messages": _as_messages(content),
         "temperature": 0.0,
     }
 
     try:
-        resp = requests.post("https://openrouter.ai/api/v1/chat/completions",
+        resp = requests.post(f"{OPENROUTER_BASE_URL}/chat/completions",
                              headers=headers, json=payload, timeout=120)
         resp.raise_for_status()
         data = resp.json()
         txt = (data.get("choices") or [{}])[0].get("message", {}).get("content", "") or ""
-        txt = txt.strip()
-        parsed = _safe_parse_json(txt)
-        if not isinstance(parsed, dict):
-            sys.stderr.write("[judge] OpenRouter returned non-JSON; skipping.\n")
-            return None
-        for k in ("completeness","grounding","clinical_accuracy"):
-            if k in parsed:
-                try: parsed[k] = int(parsed[k])
-                except Exception: pass
-        return parsed
+        return txt.strip()
     except Exception as e:
         sys.stderr.write(f"[judge] OpenRouter error: {e}\n")
         return None
 
+def judge_with_openrouter(transcript: str, note: str, reference: str, model_name: Optional[str]):
+    return _parse_reply(_openrouter_reply(_judge_content(transcript, note, reference), model_name), "OpenRouter")
+
+# ------------ Response cache ------------
+class JudgeCache(DiskCache):
+    """
+    Parsed judge replies (plus the raw text) keyed by hash(backend, model, rubric, transcript,
+    note, reference). Only replies that parsed are stored, so transient failures are retried.
+    """
+
+    def key(self, backend: str, model: str, transcript: str, note: str, reference: str, layout: str = "") -> str:
+        if layout:
+            # compacted prompts: rubric as system prefix, `transcript` is the excerpt actually sent
+            return content_key("judge", backend, model, PROMPT, layout, transcript, note, reference)
+        return content_key("judge", backend, model, PROMPT, transcript, note, reference)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        blob = self.get(key)
+        return None if blob is None else json.loads(blob)["parsed"]
+
+    def store(self, key: str, parsed: Dict[str, Any], raw: str) -> None:
+        self.put(key, json.dumps({"parsed": parsed, "raw": raw}, ensure_ascii=False).encode("utf-8"))
+
 # ------------ Dispatcher ------------
-def judge_dispatch(transcript: str, note: str, reference: str, backend: str, model_name: Optional[str] = None):
+def judge_dispatch(transcript: str, note: str, reference: str, backend: str, model_name: Optional[str] = None,
+                   cache: Optional[JudgeCache] = None, prompt=None, facts=None, info: Optional[Dict[str, int]] = None,
+                   evidence=None):
+    """
+    One blocking judge call. `prompt` (an evalsuite.prompt.JudgePrompt) compacts the transcript
+    to its token budget, reusing `evidence` (its evidence_lines()) or `facts` = (transcript
+    facts, missing, hallucinated) if given, and reports its token counts in `info`.
+    """
     backend = (backend or "none").lower()
+    if backend not in ("openai", "openrouter"):
+        # 'hf' (local) removed per your request to avoid CUDA/local setup
+        return None
+    content, sent = _build_content(transcript, note, reference, prompt, facts, info, evidence)
+    key = None
+    if cache is not None:
+        key = cache.key(backend, _judge_model(backend, model_name), sent, note, reference,
+                        prompt.tag() if prompt is not None else "")
+        hit = cache.lookup(key)
+        if hit is not None:
+            return hit
     if backend == "openai":
-        return judge_with_openai(transcript, note, reference)
-    if backend == "openrouter":
-        return judge_with_openrouter(transcript, note, reference, model_name)
-    # 'hf' (local) removed per your request to avoid CUDA/local setup
-    return None
+        txt = _openai_reply(content); label = "OpenAI"
+    else:
+        txt = _openrouter_reply(content, model_name); label = "OpenRouter"
+    parsed = _parse_reply(txt, label)
+    if key is not None and parsed is not None:
+        cache.store(key, parsed, txt)
+    return parsed
+
+# ------------ Async engine ------------
+#
+# One event loop in a background thread owns a pooled aiohttp session. Callers submit
+# cases and get concurrent.futures.Future objects back, so the (synchronous) scoring
+# pipeline can keep up to `concurrency` judge calls in flight and still emit rows in
+# input order. Both backends speak the OpenAI chat-completions protocol, which is also
+# what lets tests point `base_url` at a local stand-in server.
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for rate limiting
+    return max(1, len(text) // 4)
+
+class RateLimiter:
+    """Token buckets for requests/minute and tokens/minute; either may be None (unlimited)."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        # [capacity, level, refill per second]
+        self._req = [float(rpm), float(rpm), rpm / 60.0] if rpm else None
+        self._tok = [float(tpm), float(tpm), tpm / 60.0] if tpm else None
+        self._last = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, tokens: int = 1) -> None:
+        wants = [(b, min(b[0], float(n))) for b, n in ((self._req, 1), (self._tok, tokens)) if b]
+        if not wants:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic(); dt = now - self._last; self._last = now
+                for b, _ in wants:
+                    b[1] = min(b[0], b[1] + dt * b[2])
+                wait = max((need - b[1]) / b[2] for b, need in wants)
+                if wait <= 0:
+                    for b, need in wants:
+                        b[1] -= need
+                    return
+                await asyncio.sleep(wait)
+
+class AsyncJudge:
+    """
+    Async LLM judge with bounded in-flight concurrency, rate limiting and jittered
+    exponential backoff on 429/5xx/transport errors. Returns the same parsed dicts (or
+    None) as judge_dispatch.
+    """
+
+    def __init__(self, backend: str, model_name: Optional[str] = None, concurrency: int = 8,
+                 rpm: Optional[float] = None, tpm: Optional[float] = None, max_retries: int = 5,
+                 timeout: float = 120.0, base_url: Optional[str] = None,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0, cache: Optional[JudgeCache] = None,
+                 prompt=None):
+        self.backend = (backend or "none").lower()
+        if self.backend == "openai":
+            self.model_name = model_name or _judge_model("openai", None)
+            self.base_url = (base_url or OPENAI_BASE_URL).rstrip("/")
+            self.api_key = os.getenv("OPENAI_API_KEY")
+        elif self.backend == "openrouter":
+            self.model_name = _judge_model("openrouter", model_name)
+            self.base_url = (base_url or OPENROUTER_BASE_URL).rstrip("/")
+            self.api_key = os.getenv("OPENROUTER_API_KEY")
+        else:
+            raise ValueError(f"async judge does not support backend {backend!r}")
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.cache = cache
+        self.prompt = prompt  # evalsuite.prompt.JudgePrompt, or None for the full-text prompt
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "parse_failures": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session = None
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    # ---- lifecycle ----
+    def start(self) -> "AsyncJudge":
+        if self._loop is not None:
+            return self
+        try:
+            import aiohttp  # type: ignore  # noqa: F401
+        except Exception as e:
+            raise RuntimeError(f"aiohttp is required for the async judge: {e}")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-judge", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self._loop).result()
+        return self
+
+    async def _open(self) -> None:
+        import aiohttp  # type: ignore
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": os.getenv("OPENROUTER_SITE_URL", "https://openrouter.ai/api/v1"),
+                "X-Title": os.getenv("OPENROUTER_APP_NAME", "DeepScribe Evals"),
+            },
+        )
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = self._session = None
+
+    def __enter__(self) -> "AsyncJudge":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- calls ----
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_cap, float(retry_after))
+            except ValueError:
+                pass
+        # "full jitter": uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def _call(self, content: Content) -> Tuple[Optional[str], Optional[str]]:
+        """(assistant text, error) for one judged case, retrying transient failures."""
+        payload = {
+            "model": self.model_name,
+            "messages": _as_messages(content),
+            "temperature": 0.0,
+        }
+        url = f"{self.base_url}/chat/completions"
+        tokens = sum(estimate_tokens(m["content"]) for m in payload["messages"])
+        err = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+            retry_after = None
+            await self.limiter.acquire(tokens)
+            try:
+                async with self._sem:
+                    self.stats["requests"] += 1
+                    async with self._session.post(url, json=payload) as resp:
+                        if resp.status in RETRY_STATUS:
+                            retry_after = resp.headers.get("Retry-After")
+                            err = f"HTTP {resp.status}"
+                        elif resp.status >= 400:
+                            return None, f"HTTP {resp.status}: {(await resp.text())[:200]}"
+                        else:
+                            data = await resp.json(content_type=None)
+                            txt = (data.get("choices") or [{}])[0].get("message", {}).get("content", "") or ""
+                            return txt.strip(), None
+            except Exception as e:  # connection reset, timeout, bad JSON envelope ...
+                err = f"{type(e).__name__}: {e}"
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        return None, err
+
+    async def _judge_case(self, transcript: str, note: str, reference: str, info: Optional[Dict[str, int]] = None,
+                          evidence=None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(parsed reply, "hit" | "miss" | None when no cache is configured)."""
+        content, sent = _build_content(transcript, note, reference, self.prompt, None, info, evidence)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.backend, self.model_name, sent, note, reference,
+                                 self.prompt.tag() if self.prompt is not None else "")
+            hit = self.cache.lookup(key)
+            if hit is not None:
+                return hit, "hit"
+        if not self.api_key:
+            return None, key and "miss"
+        txt, err = await self._call(content)
+        if txt is None:
+            self.stats["failures"] += 1
+            sys.stderr.write(f"[judge] async {self.backend} error: {err}\n")
+            return None, key and "miss"
+        parsed = _safe_parse_json(txt)
+        if not isinstance(parsed, dict):
+            self.stats["parse_failures"] += 1
+            sys.stderr.write(f"[judge] async {self.backend} returned non-JSON; skipping.\n")
+            return None, key and "miss"
+        parsed = _coerce_scores(parsed)
+        if key is not None:
+            self.cache.store(key, parsed, txt)
+        return parsed, key and "miss"
+
+    async def ajudge(self, transcript: str, note: str, reference: str) -> Optional[Dict[str, Any]]:
+        return (await self._judge_case(transcript, note, reference))[0]
+
+    def _submit(self, coro) -> Future:
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit(self, transcript: str, note: str, reference: str) -> Future:
+        return self._submit(self.ajudge(transcript, note, reference))
+
+    def judge_many(self, items: Iterable[Tuple[str, str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """Judges (transcript, note, reference) triples concurrently; results in input order."""
+        return [f.result() for f in [self.submit(*it) for it in items]]
+
+    def judge_in_order(self, pairs: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+                       window: Optional[int] = None,
+                       want: Optional[Callable[[Dict[str, Any], Dict[str, Any]], bool]] = None
+                       ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Fills row["llm_judge"] for a stream of (example, row) pairs, keeping up to `window`
+        cases in flight and yielding them in the order they came in. With a cache, the row
+        also gets a run-internal "_judge_cache" hit/miss marker. `want(ex, row)`, if given,
+        picks the cases to judge; the rest pass through unjudged. A row's run-internal
+        "_evidence" (the prompt's evidence_lines(), from scoring) is used and removed.
+        """
+        if not self.api_key:
+            sys.stderr.write(f"[judge] API key for {self.backend} not set; skipping async judge.\n")
+        window = window or self.concurrency * 4
+        pending: "deque[Tuple[Dict[str, Any], Dict[str, Any], Optional[Future]]]" = deque()
+        for ex, row in pairs:
+            fut = None
+            evidence = row.pop("_evidence", None)
+            if want is None or want(ex, row):
+                info = None
+                if self.prompt is not None:
+                    info = row["_judge_prompt"] = {}
+                fut = self._submit(self._timed(self._judge_case(
+                    ex.get("transcript", ""), ex.get("generated_note", ""), ex.get("reference_note", ""), info,
+                    evidence)))
+            pending.append((ex, row, fut))
+            while pending and (len(pending) >= window or pending[0][2] is None or pending[0][2].done()):
+                yield self._finish(*pending.popleft())
+        while pending:
+            yield self._finish(*pending.popleft())
+
+    @staticmethod
+    async def _timed(coro):
+        t0 = time.perf_counter()
+        out = await coro
+        return out, time.perf_counter() - t0
+
+    @staticmethod
+    def _finish(ex: Dict[str, Any], row: Dict[str, Any], fut: Optional[Future]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        if fut is None:
+            return ex, row
+        (row["llm_judge"], status), elapsed = fut.result()
+        if status:
+            row["_judge_cache"] = status
+        if "_timings" in row:
+            # time from submission to reply, including any wait for a concurrency/rate-limit slot
+            row["_timings"]["judge"] = elapsed
+        return ex, row
@@ -0,0 +1,44 @@
+# evalsuite/lcs.py
+"""
+Longest-common-subsequence length via the bit-parallel algorithm (Hyyro 2004).
+
+One sequence is turned into per-symbol bitmasks; the DP row over it lives in a single
+Python int, and each symbol of the other sequence updates the whole row with a few
+big-int operations. Time is O(m * n / wordsize) with the loop in C, and the state is
+one n-bit integer instead of an (m+1) x (n+1) table.
+"""
+from typing import Dict, Hashable, Sequence
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+class LcsReference:
+    """Bitmasks for one side, reusable against any number of other sequences."""
+    __slots__ = ("n", "masks", "full")
+
+    def __init__(self, seq: Sequence[Hashable]):
+        self.n = len(seq)
+        masks: Dict[Hashable, int] = {}
+        bit = 1
+        for sym in seq:
+            masks[sym] = masks.get(sym, 0) | bit
+            bit <<= 1
+        self.masks = masks
+        self.full = (1 << self.n) - 1
+
+    def lcs(self, other: Sequence[Hashable]) -> int:
+        masks = self.masks; full = self.full
+        v = full
+        for sym in other:
+            m = masks.get(sym)
+            if m:
+                u = v & m
+                v = ((v + u) | (v - u)) & full
+        return self.n - _popcount(v)
+
+def lcs_length(a: Sequence[Hashable], b: Sequence[Hashable]) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return 0
+    return LcsReference(b).lcs(a)
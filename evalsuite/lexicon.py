@@ -0,0 +1,130 @@
+# evalsuite/lexicon.py
+"""
+Multi-pattern term matcher for diagnosis/symptom extraction.
+
+Terms are compiled into an Aho-Corasick automaton whose alphabet is *tokens*: maximal
+runs of word characters or of non-word characters, i.e. what `re`'s \\w / \\b see. A term
+that begins and ends with a word character matches `\\bterm\\b` exactly when its token
+sequence occurs in the text's token stream, so one pass over the tokens finds every
+term at once and the cost no longer grows with the size of the vocabulary.
+
+Terms that begin or end with a non-word character (rare in clinical vocabularies) have
+different \\b semantics and are matched with their own regex instead.
+"""
+import hashlib, json, re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_TOKEN = re.compile(r"\w+|\W+")
+_WORD = re.compile(r"\w")
+
+CATEGORIES = ("diagnosis", "symptom")
+
+class Lexicon:
+    """
+    Picklable (plain lists/dicts) so a prebuilt automaton can be shipped to worker
+    processes instead of being rebuilt there.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.terms: List[str] = []
+        self.categories: List[str] = []
+        seen = set()
+        for term, cat in entries:
+            term = (term or "").lower()
+            if not term.strip() or term in seen:
+                continue
+            if cat not in CATEGORIES:
+                raise ValueError(f"unknown lexicon category {cat!r} for term {term!r}")
+            seen.add(term)
+            self.terms.append(term); self.categories.append(cat)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (term id, length in chars)
+        self._odd: List[Tuple[int, "re.Pattern[str]"]] = []
+        for tid, term in enumerate(self.terms):
+            if _WORD.match(term[0]) and _WORD.match(term[-1]):
+                self._insert(tid, term)
+            else:
+                self._odd.append((tid, re.compile(rf"\b{re.escape(term)}\b")))
+        self._link()
+        self.fingerprint = hashlib.sha256(
+            json.dumps([self.terms, self.categories]).encode("utf-8")).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _insert(self, tid: int, term: str) -> None:
+        node = 0
+        for tok in _TOKEN.findall(term):
+            nxt = self._goto[node].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][tok] = nxt
+                self._goto.append({}); self._fail.append(0); self._out.append([])
+            node = nxt
+        self._out[node].append((tid, len(term)))
+
+    def _link(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+        q = deque(goto[0].values())
+        while q:
+            node = q.popleft()
+            for tok, nxt in goto[node].items():
+                f = fail[node]
+                while f and tok not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(tok, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                q.append(nxt)
+
+    def find(self, lowered: str) -> List[Tuple[int, int, int]]:
+        """
+        (term id, start, end) for every match in already-lowercased text, ordered by term id
+        then position, with each term's matches non-overlapping -- the same spans
+        `re.finditer(rf"\\b{term}\\b", lowered)` yields term by term.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: List[Tuple[int, int, int]] = []
+        node = 0; pos = 0
+        for tok in _TOKEN.findall(lowered):
+            pos += len(tok)
+            while node and tok not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(tok, 0)
+            for tid, n in out[node]:
+                hits.append((tid, pos - n, pos))
+        for tid, pat in self._odd:
+            for m in pat.finditer(lowered):
+                hits.append((tid, m.start(), m.end()))
+        hits.sort()
+        kept: List[Tuple[int, int, int]] = []
+        last_tid = -1; last_end = 0
+        for tid, s, e in hits:
+            if tid == last_tid and s < last_end:
+                continue
+            kept.append((tid, s, e)); last_tid, last_end = tid, e
+        return kept
+
+def load_lexicon(path: str) -> Lexicon:
+    """
+    Reads a term list from disk:
+      *.json  -- {"diagnosis": [...], "symptom": [...]}
+      other   -- one term per line, optionally `term<TAB>category` (default: symptom); '#' comments
+    """
+    entries: List[Tuple[str, str]] = []
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for cat in CATEGORIES:
+            entries.extend((t, cat) for t in data.get(cat, []))
+        return Lexicon(entries)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            term, _, cat = line.partition("\t")
+            entries.append((term.strip(), cat.strip() or "symptom"))
+    return Lexicon(entries)
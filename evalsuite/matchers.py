@@ -1,6 +1,7 @@
 \
 import re
-from typing import Set
+from functools import lru_cache
+from typing import FrozenSet
 
 def normalize(s: str) -> str:
     s = (s or "").lower()
@@ -8,9 +9,15 @@ def normalize(s: str) -> str:
     s = re.sub(r"\s+", " ", s).strip()
     return s
 
+@lru_cache(maxsize=65536)
+def token_set(s: str) -> FrozenSet[str]:
+    """normalize()d token set; cached because the same keys/values are compared over and over."""
+    return frozenset(normalize(s).split())
+
 def jaccard(a: str, b: str) -> float:
-    A: Set[str] = set(normalize(a).split())
-    B: Set[str] = set(normalize(b).split())
+    return jaccard_sets(token_set(a or ""), token_set(b or ""))
+
+def jaccard_sets(A: FrozenSet[str], B: FrozenSet[str]) -> float:
     if not A and not B:
         return 1.0
     if not A or not B:
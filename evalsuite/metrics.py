@@ -1,7 +1,8 @@
 # evalsuite/metrics.py
-from typing import List, Dict, Tuple
+from typing import Any, Iterable, List, Dict, Optional, Tuple
 from .extractors import Fact
-from .matchers import jaccard, approx_equal_num, extract_number
+from .lcs import LcsReference
+from .matchers import jaccard, jaccard_sets, token_set, approx_equal_num, extract_number
 
 RANGES = {
     "temperature_f": (95.0, 107.0),
@@ -41,51 +42,157 @@ def _fact_match(a: Fact, b: Fact) -> bool:
         return jaccard(a.value or "", b.value or "") >= 0.8
     return jaccard(a.value or "", b.value or "") >= 0.8
 
-def find_missing(transcript_facts: List[Fact], note_facts: List[Fact]) -> List[Fact]:
-    missing: List[Fact] = []
-    for tf in transcript_facts:
-        critical = (tf.type in ("vital","allergy","medication")) or \
-                   (tf.type in ("symptom","diagnosis") and tf.key in CRITICAL_TERMS and not tf.negated)
-        if not critical: continue
-        if not any(_fact_match(tf, nf) for nf in note_facts):
-            missing.append(tf)
-    return missing
-
-def find_hallucinated(transcript_facts: List[Fact], note_facts: List[Fact]) -> List[Fact]:
-    halluc: List[Fact] = []
-    for nf in note_facts:
-        if not any(_fact_match(nf, tf) for tf in transcript_facts):
-            halluc.append(nf)
-    return halluc
+# ---------------------------------------------------------------
+# Fact index: same answers as _fact_match, without the all-pairs scan
+# ---------------------------------------------------------------
+
+_FLAG_TYPES = ("symptom", "diagnosis", "allergy")
+_BAD = object()  # vital with a "/" that doesn't parse as two numbers
+
+def _parse_vital(v: str) -> Tuple[str, bool, Any, Optional[float]]:
+    """(value, has '/', (sys, dia) | _BAD, extract_number) -- everything _vital_equal looks at."""
+    bp: Any = None
+    if "/" in v:
+        try:
+            sys_, dia = v.split("/"); bp = (float(sys_), float(dia))
+        except Exception:
+            bp = _BAD
+    return (v, "/" in v, bp, extract_number(v))
+
+def _vital_equal_parsed(a, b) -> bool:
+    if a[1] and b[1]:
+        if a[2] is _BAD or b[2] is _BAD:
+            return a[0] == b[0]
+        return approx_equal_num(a[2][0], b[2][0]) and approx_equal_num(a[2][1], b[2][1])
+    if a[3] is None or b[3] is None:
+        return a[0] == b[0]
+    return approx_equal_num(a[3], b[3])
+
+def _vital_sig(f: Fact):
+    """_parse_vital(f.value), from the number the extractor already parsed when there is one."""
+    num = f.num
+    if num is None:
+        return _parse_vital(f.value or "")
+    if isinstance(num, tuple):
+        return (f.value, True, num, num[0])
+    return (f.value, False, None, num)
+
+def _value_sig(f: Fact):
+    if f.type in _FLAG_TYPES:
+        return f.negated
+    if f.type == "vital":
+        return _vital_sig(f)
+    return token_set(f.value or "")
+
+def _value_match(t: str, a, b) -> bool:
+    if t in _FLAG_TYPES:
+        return a == b
+    if t == "vital":
+        return _vital_equal_parsed(a, b)
+    return jaccard_sets(a, b) >= 0.8
+
+class FactIndex:
+    """
+    Buckets facts by (type, normalized key-token set). Two *different* token sets can only
+    reach jaccard >= 0.8 when both have at least 4 tokens, so most lookups are one dict
+    probe plus a value check; the rare long keys fall back to a scan over long keys only.
+    Key token sets and parsed vital values are computed once per fact.
+    """
+
+    def __init__(self, facts: List[Fact]):
+        self.facts = facts
+        # type -> key token set -> [(position, value signature)]
+        self._buckets: Dict[str, Dict[frozenset, List[Tuple[int, Any]]]] = {}
+        self._long: Dict[str, List[frozenset]] = {}
+        for i, f in enumerate(facts):
+            keys = self._buckets.setdefault(f.type, {})
+            ks = token_set(f.key)
+            if ks not in keys:
+                keys[ks] = []
+                if len(ks) >= 4:
+                    self._long.setdefault(f.type, []).append(ks)
+            keys[ks].append((i, _value_sig(f)))
+
+    def _candidates(self, f: Fact):
+        keys = self._buckets.get(f.type)
+        if not keys:
+            return
+        ks = token_set(f.key)
+        if ks in keys:
+            yield keys[ks]
+        if len(ks) >= 4:
+            for other in self._long.get(f.type, ()):
+                if other != ks and jaccard_sets(ks, other) >= 0.8:
+                    yield keys[other]
+
+    def has_match(self, f: Fact) -> bool:
+        sig = _value_sig(f)
+        for bucket in self._candidates(f):
+            for _, other in bucket:
+                if _value_match(f.type, sig, other):
+                    return True
+        return False
+
+    def same_key(self, f: Fact) -> List[int]:
+        """Positions of facts with f's type and (near-)same key, whatever their value."""
+        return sorted(j for bucket in self._candidates(f) for j, _ in bucket)
+
+    def first_match(self, f: Fact, used) -> Optional[int]:
+        """Lowest position not in `used` that matches f, i.e. what a left-to-right scan would pick."""
+        sig = _value_sig(f); best: Optional[int] = None
+        for bucket in self._candidates(f):
+            for j, other in bucket:
+                if best is not None and j >= best:
+                    break
+                if j not in used and _value_match(f.type, sig, other):
+                    best = j
+                    break
+        return best
+
+def _is_critical(tf: Fact) -> bool:
+    return (tf.type in ("vital","allergy","medication")) or \
+           (tf.type in ("symptom","diagnosis") and tf.key in CRITICAL_TERMS and not tf.negated)
+
+def find_missing(transcript_facts: List[Fact], note_facts: List[Fact],
+                 note_index: Optional[FactIndex] = None) -> List[Fact]:
+    index = note_index or FactIndex(note_facts)
+    return [tf for tf in transcript_facts if _is_critical(tf) and not index.has_match(tf)]
+
+def find_hallucinated(transcript_facts: List[Fact], note_facts: List[Fact],
+                      transcript_index: Optional[FactIndex] = None) -> List[Fact]:
+    index = transcript_index or FactIndex(transcript_facts)
+    return [nf for nf in note_facts if not index.has_match(nf)]
 
 def find_contradictions(note_facts: List[Fact]) -> List[str]:
     issues: List[str] = []
+    polarity = {(g.type, g.key, bool(g.negated)) for g in note_facts if g.type in ("symptom","diagnosis")}
     for f in note_facts:
         if f.type == "vital":
             if f.key == "bp" and isinstance(f.value, str) and "/" in f.value:
-                try:
-                    sys, dia = f.value.split("/"); sys, dia = float(sys), float(dia)
+                _, _, bp, _ = _vital_sig(f)
+                if bp is _BAD:
+                    issues.append(f"Malformed BP: {f.value}")
+                else:
+                    sys, dia = bp
                     lo_s, hi_s = RANGES["bp_sys"]; lo_d, hi_d = RANGES["bp_dia"]
                     if not (lo_s <= sys <= hi_s and lo_d <= dia <= hi_d):
                         issues.append(f"Implausible BP: {f.value}")
-                except Exception:
-                    issues.append(f"Malformed BP: {f.value}")
             elif f.key in ("temperature_f","temperature_c","hr","rr","spo2"):
-                rng = RANGES[f.key]; val = extract_number(f.value or "")
+                rng = RANGES[f.key]; val = _vital_sig(f)[3]
                 if val is None or not (rng[0] <= val <= rng[1]):
                     issues.append(f"Implausible {f.key}: {f.value}")
         if f.type in ("symptom","diagnosis"):
-            if any(g for g in note_facts if g.type == f.type and g.key == f.key and g.negated != f.negated):
+            if (f.type, f.key, not f.negated) in polarity:
                 issues.append(f"Contradiction for {f.type} '{f.key}': both present and absent")
     return issues
 
-def prf1(pred_facts: List[Fact], ref_facts: List[Fact]) -> Dict[str, float]:
+def prf1(pred_facts: List[Fact], ref_facts: List[Fact], ref_index: Optional[FactIndex] = None) -> Dict[str, float]:
+    index = ref_index or FactIndex(ref_facts)
     matched = 0; used = set()
     for p in pred_facts:
-        for j, r in enumerate(ref_facts):
-            if j in used: continue
-            if _fact_match(p, r):
-                matched += 1; used.add(j); break
+        j = index.first_match(p, used)
+        if j is not None:
+            matched += 1; used.add(j)
     P = matched / max(1, len(pred_facts))
     R = matched / max(1, len(ref_facts))
     F1 = 0.0 if (P == 0.0 and R == 0.0) else (2 * P * R) / (P + R)
@@ -99,31 +206,27 @@ def _tok(s: str) -> List[str]:
     # simple whitespace tokenization; could be replaced with smarter tokenizer
     return [t for t in s.strip().split() if t]
 
-def _ngram_counts(tokens: List[str], n: int) -> Dict[Tuple[str, ...], int]:
+def _ngram_counts(tokens: List[Any], n: int) -> Dict[Tuple[Any, ...], int]:
     from collections import Counter
     return Counter(tuple(tokens[i:i+n]) for i in range(0, max(0, len(tokens)-n+1)))
 
-def bleu(candidate: str, reference: str, max_n: int = 4) -> float:
-    """
-    Corpus BLEU (single ref) with uniform n-gram weights and brevity penalty.
-    Deterministic, dependency-free. Range ~[0,1].
-    """
-    import math
-    c = _tok(candidate)
-    r = _tok(reference)
-    if not c or not r:
-        return 0.0
-
-    precisions = []
-    for n in range(1, max_n+1):
-        c_counts = _ngram_counts(c, n)
-        r_counts = _ngram_counts(r, n)
+def clipped_ngram_stats(c_counts: List[Dict], r_counts: List[Dict]) -> Tuple[List[int], List[int]]:
+    """Per-order (clipped matches, candidate n-grams) from per-order n-gram Counters."""
+    matches: List[int] = []; totals: List[int] = []
+    for cc, rc in zip(c_counts, r_counts):
         match = 0
         total = 0
-        for ng, cnt in c_counts.items():
+        for ng, cnt in cc.items():
             total += cnt
-            match += min(cnt, r_counts.get(ng, 0))
-        precisions.append((match / total) if total > 0 else 0.0)
+            match += min(cnt, rc.get(ng, 0))
+        matches.append(match); totals.append(total)
+    return matches, totals
+
+def bleu_from_stats(matches: List[int], totals: List[int], c_len: int, r_len: int) -> float:
+    """BLEU from (summed) clipped counts; sentence BLEU for one case, corpus BLEU for a sum."""
+    import math
+    max_n = len(matches)
+    precisions = [(m / t) if t > 0 else 0.0 for m, t in zip(matches, totals)]
 
     # geometric mean of precisions
     if any(p == 0.0 for p in precisions):
@@ -132,33 +235,64 @@ def bleu(candidate: str, reference: str, max_n: int = 4) -> float:
         geo = math.exp(sum((1.0/max_n) * math.log(p) for p in precisions))
 
     # brevity penalty
-    c_len = len(c); r_len = len(r)
     bp = 1.0 if c_len > r_len else math.exp(1.0 - r_len / max(1, c_len))
     return bp * geo
 
-def rouge_l_f(candidate: str, reference: str) -> float:
+def bleu(candidate: str, reference: str, max_n: int = 4) -> float:
     """
-    ROUGE-L F-measure (LCS-based), single-ref, deterministic, no deps.
-    Range ~[0,1].
+    Corpus BLEU (single ref) with uniform n-gram weights and brevity penalty.
+    Deterministic, dependency-free. Range ~[0,1].
     """
     c = _tok(candidate)
     r = _tok(reference)
     if not c or not r:
         return 0.0
+    orders = range(1, max_n+1)
+    matches, totals = clipped_ngram_stats([_ngram_counts(c, n) for n in orders],
+                                          [_ngram_counts(r, n) for n in orders])
+    return bleu_from_stats(matches, totals, len(c), len(r))
+
+def _token_ids(*seqs: List[str]) -> List[List[int]]:
+    vocab: Dict[str, int] = {}
+    return [[vocab.setdefault(t, len(vocab)) for t in seq] for seq in seqs]
 
-    # LCS length via DP
-    m, n = len(c), len(r)
-    dp = [[0]*(n+1) for _ in range(m+1)]
-    for i in range(m):
-        for j in range(n):
-            if c[i] == r[j]:
-                dp[i+1][j+1] = dp[i][j] + 1
-            else:
-                dp[i+1][j+1] = max(dp[i][j+1], dp[i+1][j])
-
-    lcs = dp[m][n]
+def _rouge_from_lcs(lcs: int, m: int, n: int) -> float:
     prec = lcs / m
     rec  = lcs / n
     if prec == 0.0 or rec == 0.0:
         return 0.0
     return (2 * prec * rec) / (prec + rec)
+
+def rouge_l_f(candidate: str, reference: str) -> float:
+    """
+    ROUGE-L F-measure (LCS-based), single-ref, deterministic, no deps.
+    Range ~[0,1].
+    """
+    c = _tok(candidate)
+    r = _tok(reference)
+    if not c or not r:
+        return 0.0
+
+    # LCS length, bit-parallel over the shorter side (see evalsuite/lcs.py)
+    c_ids, r_ids = _token_ids(c, r)
+    long_, short = (c_ids, r_ids) if len(c_ids) >= len(r_ids) else (r_ids, c_ids)
+    lcs = LcsReference(short).lcs(long_)
+    return _rouge_from_lcs(lcs, len(c), len(r))
+
+def rouge_l_f_batch(pairs: Iterable[Tuple[str, str]]) -> List[float]:
+    """rouge_l_f over many (candidate, reference) pairs; each distinct reference is prepared once."""
+    vocab: Dict[str, int] = {}
+    prepared: Dict[str, Tuple[int, LcsReference]] = {}
+    out: List[float] = []
+    for candidate, reference in pairs:
+        c = _tok(candidate)
+        ref = prepared.get(reference)
+        if ref is None:
+            r_ids = [vocab.setdefault(t, len(vocab)) for t in _tok(reference)]
+            ref = prepared[reference] = (len(r_ids), LcsReference(r_ids))
+        n, lcs_ref = ref
+        if not c or not n:
+            out.append(0.0); continue
+        lcs = lcs_ref.lcs([vocab.setdefault(t, len(vocab)) for t in c])
+        out.append(_rouge_from_lcs(lcs, len(c), n))
+    return out
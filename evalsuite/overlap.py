@@ -0,0 +1,111 @@
+# evalsuite/overlap.py
+"""
+Tokenize-once text overlap: each note becomes one token-ID list that both BLEU and
+ROUGE-L read, references are prepared once (n-gram counts + LCS bitmasks) and reused
+for every candidate scored against them, and corpus BLEU is accumulated from clipped
+n-gram counts rather than averaged from sentence scores.
+
+Scores are identical to metrics.bleu / metrics.rouge_l_f.
+"""
+import hashlib
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+from .lcs import LcsReference
+from .metrics import _tok, _rouge_from_lcs, bleu_from_stats, clipped_ngram_stats
+
+def _ngrams(ids: List[int], n: int) -> Counter:
+    if n == 1:
+        return Counter((t,) for t in ids)
+    return Counter(zip(*(ids[i:] for i in range(n))))
+
+class PreparedReference:
+    __slots__ = ("ids", "ngrams", "lcs")
+
+    def __init__(self, ids: List[int], max_n: int):
+        self.ids = ids
+        self.ngrams = [_ngrams(ids, n) for n in range(1, max_n + 1)]
+        self.lcs = LcsReference(ids)
+
+class OverlapScorer:
+    """
+    One per process. Token IDs come from a vocabulary private to the scorer; they only
+    need to agree between a candidate and its reference, so workers never share it.
+
+    Memory is bounded: prepared references sit in a small LRU keyed by a digest of the text
+    (note variants of one case usually arrive together, so a few dozen entries catch the
+    repeats), and once the vocabulary passes max_vocab entries it is dropped together with
+    the references encoded against it, between two score() calls.
+    """
+
+    def __init__(self, max_n: int = 4, cache_size: int = 32, max_vocab: int = 1 << 18):
+        self.max_n = max_n
+        self.cache_size = cache_size
+        self.max_vocab = max_vocab
+        self.vocab: Dict[str, int] = {}
+        self._refs: "OrderedDict[bytes, PreparedReference]" = OrderedDict()
+        self.ref_hits = 0
+        self.ref_misses = 0
+        self.vocab_resets = 0
+
+    def _bound_vocab(self) -> None:
+        if len(self.vocab) > self.max_vocab:
+            self.vocab = {}
+            self._refs.clear()
+            self.vocab_resets += 1
+
+    def encode(self, text: str) -> List[int]:
+        vocab = self.vocab
+        return [vocab.setdefault(t, len(vocab)) for t in _tok(text or "")]
+
+    def reference(self, text: str) -> PreparedReference:
+        if self.cache_size <= 0:
+            self.ref_misses += 1
+            return PreparedReference(self.encode(text), self.max_n)
+        key = hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+        ref = self._refs.get(key)
+        if ref is not None:
+            self.ref_hits += 1
+            self._refs.move_to_end(key)
+            return ref
+        self.ref_misses += 1
+        ref = self._refs[key] = PreparedReference(self.encode(text), self.max_n)
+        if len(self._refs) > self.cache_size:
+            self._refs.popitem(last=False)
+        return ref
+
+    def score(self, candidate: str, reference: str) -> Dict[str, Any]:
+        """{"bleu", "rouge_l_f", "bleu_stats"}; bleu_stats feeds CorpusBleu."""
+        self._bound_vocab()
+        c = self.encode(candidate)
+        ref = self.reference(reference)
+        c_ngrams = [_ngrams(c, n) for n in range(1, self.max_n + 1)]
+        matches, totals = clipped_ngram_stats(c_ngrams, ref.ngrams)
+        stats = {"match": matches, "total": totals, "cand_len": len(c), "ref_len": len(ref.ids)}
+        if not c or not ref.ids:
+            return {"bleu": 0.0, "rouge_l_f": 0.0, "bleu_stats": stats}
+        return {
+            "bleu": bleu_from_stats(matches, totals, len(c), len(ref.ids)),
+            "rouge_l_f": _rouge_from_lcs(ref.lcs.lcs(c), len(c), len(ref.ids)),
+            "bleu_stats": stats,
+        }
+
+class CorpusBleu:
+    """Sums clipped n-gram counts and lengths across cases; mergeable across runs."""
+
+    def __init__(self, max_n: int = 4):
+        self.match = [0] * max_n
+        self.total = [0] * max_n
+        self.cand_len = 0
+        self.ref_len = 0
+
+    def add(self, stats: Optional[Dict[str, Any]]) -> None:
+        if not stats:
+            return
+        for i, (m, t) in enumerate(zip(stats["match"], stats["total"])):
+            self.match[i] += m; self.total[i] += t
+        self.cand_len += stats["cand_len"]; self.ref_len += stats["ref_len"]
+
+    def score(self) -> Optional[float]:
+        if not self.cand_len or not self.ref_len:
+            return None
+        return bleu_from_stats(self.match, self.total, self.cand_len, self.ref_len)
@@ -0,0 +1,191 @@
+# evalsuite/prompt.py
+"""
+Token-budgeted judge prompts.
+
+The rubric goes first, as a system message that never changes, so providers with prefix
+caching can reuse it across calls. The note is always sent in full. If the whole prompt does
+not fit the budget, only the transcript segments with evidence are sent. A segment is a line
+or sentence (dialogue turns are usually both). They go in transcript order, with "[...]"
+marking the gaps. Evidence is taken in priority order:
+  1. facts the note misses (find_missing), with a segment of context on each side
+  2. what the transcript says about facts the note hallucinated: transcript facts with the
+     same type and key but another value, also with context
+  3. every other fact extract_all found, as its own segment only
+The reference is sent in full when it fits next to tiers 1 and 2. Otherwise it is cut to its
+leading segments, keeping at least half of the room left after the note. Segments are then
+taken tier by tier while they fit. The budget is hard: only a note that does not fit on its own
+gives a prompt over it, and those are counted as over budget. Token counts use the same
+~4 chars/token estimate as the rate limiter; the cutting works in characters, so the estimate
+of what is sent never exceeds the budget.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from .extractors import Fact, extract_all
+from .judge import PROMPT, estimate_tokens
+from .metrics import FactIndex, find_hallucinated, find_missing
+
+GAP = "[...]"
+_SEGMENT_END = re.compile(r"\n|(?<=[.!?])[ \t]+")
+
+def _segment_bounds(text: str) -> List[Tuple[int, int]]:
+    """(start, end) of every line/sentence; they tile the text."""
+    bounds, pos = [], 0
+    for m in _SEGMENT_END.finditer(text):
+        bounds.append((pos, m.end()))
+        pos = m.end()
+    if pos < len(text) or not bounds:
+        bounds.append((pos, len(text)))
+    return bounds
+
+def _cost(bound: Tuple[int, int]) -> int:
+    """Characters a segment can add to an excerpt: itself, a separator and a GAP line."""
+    return bound[1] - bound[0] + len(GAP) + 2
+
+def _head(text: str, room: int) -> str:
+    """The leading segments of `text` that fit in `room` characters, then a GAP line."""
+    end = 0
+    for start, stop in _segment_bounds(text):
+        if len(text[:stop].rstrip()) + len(GAP) + 1 > room:
+            break
+        end = stop
+    head = text[:end].rstrip()
+    return f"{head}\n{GAP}" if head else (GAP if room >= len(GAP) else "")
+
+def _line_of(bounds: List[Tuple[int, int]], offset: int) -> int:
+    lo, hi = 0, len(bounds) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if bounds[mid][0] <= offset:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+class JudgePrompt:
+    def __init__(self, max_tokens: int, rubric: str = PROMPT):
+        self.max_tokens = max_tokens
+        self.rubric = rubric
+
+    def tag(self) -> str:
+        """What the prompt settings add to a case fingerprint / cache key."""
+        return f"prompt:{self.max_tokens}"
+
+    def fits(self, transcript: str, note: str, reference: str) -> bool:
+        """Whether the full prompt is within budget, i.e. build() needs no evidence."""
+        return estimate_tokens(self.rubric) + estimate_tokens(self._user(transcript, note, reference)) <= self.max_tokens
+
+    def _user(self, transcript: str, note: str, reference: str) -> str:
+        return f"TRANSCRIPT:\n{transcript}\n\nNOTE:\n{note}\n\nREFERENCE:\n{reference}"
+
+    def evidence_lines(self, transcript: str, note: str,
+                       facts: Optional[Tuple[List[Fact], List[Fact], List[Fact]]] = None) -> List[List[int]]:
+        """Transcript segment numbers per priority tier (missing, hallucinated, other facts)."""
+        if facts is None:
+            tf, nf = extract_all(transcript), extract_all(note)
+            facts = (tf, find_missing(tf, nf), find_hallucinated(tf, nf))
+        tf, missing, halluc = facts
+        bounds = _segment_bounds(transcript)
+        last = len(bounds) - 1
+
+        def around(f: Fact, ctx: int) -> List[int]:
+            if f.start is None:
+                return []
+            i = _line_of(bounds, f.start)
+            return list(range(max(0, i - ctx), min(last, i + ctx) + 1))
+
+        tindex = FactIndex(tf)
+        tiers: List[List[int]] = [[], [], []]
+        for f in missing:
+            tiers[0] += around(f, 1)
+        for f in halluc:
+            for j in tindex.same_key(f):
+                tiers[1] += around(tf[j], 1)
+        for f in tf:
+            tiers[2] += around(f, 0)
+        return tiers
+
+    def compact_transcript(self, transcript: str, room: int, tiers: List[List[int]]) -> str:
+        """
+        The tiers' segments, taken in order while they fit in `room` characters, as contiguous
+        runs of the original text joined by GAP lines. Each segment is charged a separator
+        and a GAP line, so the result never exceeds `room`.
+        """
+        bounds = _segment_bounds(transcript)
+        keep = set()
+        used = len(GAP) + 1  # the GAP line after the last run
+        for tier in tiers:
+            for i in tier:
+                if i in keep:
+                    continue
+                cost = _cost(bounds[i])
+                if used + cost <= room:
+                    keep.add(i); used += cost
+        if not keep:
+            return GAP if transcript and room >= len(GAP) else ""
+        out: List[str] = []
+        run_start = prev = None
+        for i in sorted(keep) + [None]:
+            if prev is not None and (i is None or i != prev + 1):
+                if run_start > 0:
+                    out.append(GAP)
+                out.append(transcript[bounds[run_start][0]:bounds[prev][1]].strip())
+                run_start = None
+            if i is not None and run_start is None:
+                run_start = i
+            prev = i
+        if out and keep and max(keep) < len(bounds) - 1:
+            out.append(GAP)
+        return "\n".join(out)
+
+    def build(self, transcript: str, note: str, reference: str,
+              facts: Optional[Tuple[List[Fact], List[Fact], List[Fact]]] = None,
+              evidence: Optional[List[List[int]]] = None) -> Tuple[List[Dict[str, str]], str, Dict[str, int]]:
+        """
+        (chat messages, transcript as sent, {"tokens_full", "tokens_sent", "reference_cut",
+        "over_budget"}). `evidence` is evidence_lines() output and `facts` (transcript facts,
+        missing, hallucinated), when the caller already has either; otherwise the facts are
+        extracted here.
+        """
+        full = estimate_tokens(self.rubric) + estimate_tokens(self._user(transcript, note, reference))
+        sent, ref = transcript, reference
+        if full > self.max_tokens:
+            # characters the user message may have for its estimate to stay within budget
+            room = (self.max_tokens - estimate_tokens(self.rubric) + 1) * 4 - 1 - len(self._user("", note, ""))
+            tiers = evidence if evidence is not None else self.evidence_lines(transcript, note, facts)
+            sent, ref = self._fit(transcript, reference, max(0, room), tiers)
+        user = self._user(sent, note, ref)
+        messages = [{"role": "system", "content": self.rubric}, {"role": "user", "content": user}]
+        tokens = estimate_tokens(self.rubric) + estimate_tokens(user)
+        return messages, sent, {"tokens_full": full, "tokens_sent": tokens, "reference_cut": int(ref != reference),
+                                "over_budget": int(tokens > self.max_tokens)}
+
+    def _fit(self, transcript: str, reference: str, room: int, tiers: List[List[int]]) -> Tuple[str, str]:
+        """(transcript excerpt, reference) within `room` characters together."""
+        bounds = _segment_bounds(transcript)
+        must = sum(_cost(bounds[i]) for i in set(tiers[0]) | set(tiers[1]))
+        ref = reference
+        if len(reference) + must > room:
+            ref = _head(reference, min(len(reference), max(room - must, room // 2)))
+        return self.compact_transcript(transcript, room - len(ref), tiers), ref
+
+class PromptStats:
+    """Run totals of judge prompt sizes, from the rows' "_judge_prompt" markers."""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.calls = self.compacted = self.tokens_full = self.tokens_sent = 0
+        self.reference_cut = self.over_budget = 0
+
+    def add(self, info: Optional[Dict[str, int]]) -> None:
+        if not info:
+            return
+        self.calls += 1
+        self.compacted += info["tokens_sent"] < info["tokens_full"]
+        self.tokens_full += info["tokens_full"]; self.tokens_sent += info["tokens_sent"]
+        self.reference_cut += info.get("reference_cut", 0); self.over_budget += info.get("over_budget", 0)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"max_tokens": self.max_tokens, "prompts": self.calls, "compacted": self.compacted,
+                "reference_cut": self.reference_cut, "over_budget": self.over_budget,
+                "tokens_full_est": self.tokens_full, "tokens_sent_est": self.tokens_sent,
+                "tokens_saved_est": self.tokens_full - self.tokens_sent}
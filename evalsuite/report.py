@@ -1,10 +1,137 @@
 # evalsuite/report.py (replace write_summary & write_dashboard)
-import os, json, csv
-from typing import List, Dict, Any
+import os, json, csv, heapq, math, shutil, tempfile
+from typing import List, Dict, Any, Optional, Tuple
+from .overlap import CorpusBleu
+from .soap import SECTIONS
 
-def _mean(xs):
-    xs = [x for x in xs if x is not None]
-    return (sum(xs) / len(xs)) if xs else 0.0
+LLM_KEYS = ("completeness", "grounding", "clinical_accuracy")
+
+def _fadd(partials: List[float], x: float) -> None:
+    """Adds x to a list of non-overlapping partial sums in place (Shewchuk); the sum stays exact."""
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x]
+
+class SummaryAccumulator:
+    """
+    Running sums/counts behind summary.json. One add() per row, O(1) memory. Sums are kept
+    exact (as partials, rounded once by math.fsum), so the result does not depend on the order
+    rows arrive in: buffered, streaming and merged shard runs agree to the last bit. state()
+    is the JSON form written to aggregates.json; merge() folds another accumulator in.
+    """
+    METRICS = (
+        ("avg_missing", lambda r: r["missing_count"]),
+        ("avg_hallucinated", lambda r: r["hallucinated_count"]),
+        ("avg_contradictions", lambda r: r["contradictions_count"]),
+        ("avg_ref_precision", lambda r: r["ref_align"]["precision"]),
+        ("avg_ref_recall", lambda r: r["ref_align"]["recall"]),
+        ("avg_ref_f1", lambda r: r["ref_align"]["f1"]),
+        ("avg_bleu", lambda r: (r.get("text_overlap") or {}).get("bleu")),
+        ("avg_rouge_l_f", lambda r: (r.get("text_overlap") or {}).get("rouge_l_f")),
+    )
+    # summary.json "sections": per S/O/A/P averages of these fields of a row's "sections"
+    SECTION_METRICS = (("avg_missing", "missing"), ("avg_hallucinated", "hallucinated"),
+                       ("avg_bleu", "bleu"), ("avg_rouge_l_f", "rouge_l_f"))
+
+    def __init__(self):
+        self.num_cases = 0
+        keys = [k for k, _ in self.METRICS] + [f"{s}.{k}" for s in SECTIONS for k, _ in self.SECTION_METRICS]
+        self.sums: Dict[str, List[float]] = {k: [] for k in keys}
+        self.counts: Dict[str, int] = {k: 0 for k in keys}
+        self.num_sectioned = 0
+        self.num_judged = 0
+        self.llm_sums: Dict[str, List[float]] = {k: [] for k in LLM_KEYS}
+        self.llm_counts: Dict[str, int] = {k: 0 for k in LLM_KEYS}
+        self.corpus_bleu = CorpusBleu()
+
+    def add(self, r: Dict[str, Any]) -> None:
+        self.num_cases += 1
+        for k, get in self.METRICS:
+            x = get(r)
+            if x is not None:
+                _fadd(self.sums[k], float(x)); self.counts[k] += 1
+        self.corpus_bleu.add((r.get("text_overlap") or {}).get("bleu_stats"))
+        secs = r.get("sections")
+        if secs:
+            self.num_sectioned += 1
+            for s, m in secs.items():
+                for k, field in self.SECTION_METRICS:
+                    x = m.get(field)
+                    if x is not None:
+                        _fadd(self.sums[f"{s}.{k}"], float(x)); self.counts[f"{s}.{k}"] += 1
+        j = r.get("llm_judge")
+        if isinstance(j, dict):
+            self.num_judged += 1
+            for k in LLM_KEYS:
+                x = j.get(k)
+                if x is not None:
+                    _fadd(self.llm_sums[k], float(x)); self.llm_counts[k] += 1
+
+    def merge(self, other: "SummaryAccumulator") -> None:
+        self.num_cases += other.num_cases
+        self.num_judged += other.num_judged
+        self.num_sectioned += other.num_sectioned
+        for sums, counts, o_sums, o_counts in ((self.sums, self.counts, other.sums, other.counts),
+                                               (self.llm_sums, self.llm_counts, other.llm_sums, other.llm_counts)):
+            for k, partials in o_sums.items():
+                for x in partials:
+                    _fadd(sums[k], x)
+                counts[k] += o_counts[k]
+        self.corpus_bleu.add(other.bleu_state())
+
+    def bleu_state(self) -> Dict[str, Any]:
+        b = self.corpus_bleu
+        return {"match": list(b.match), "total": list(b.total), "cand_len": b.cand_len, "ref_len": b.ref_len}
+
+    def state(self) -> Dict[str, Any]:
+        return {"num_cases": self.num_cases, "sums": self.sums, "counts": self.counts,
+                "num_judged": self.num_judged, "llm_sums": self.llm_sums, "llm_counts": self.llm_counts,
+                "num_sectioned": self.num_sectioned, "corpus_bleu": self.bleu_state()}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SummaryAccumulator":
+        acc = cls()
+        acc.num_cases = state["num_cases"]; acc.num_judged = state["num_judged"]
+        acc.num_sectioned = state.get("num_sectioned", 0)
+        for k in acc.sums:
+            acc.sums[k] = list(state["sums"].get(k, ())); acc.counts[k] = state["counts"].get(k, 0)
+        for k in acc.llm_sums:
+            acc.llm_sums[k] = list(state["llm_sums"][k]); acc.llm_counts[k] = state["llm_counts"][k]
+        acc.corpus_bleu.add(state["corpus_bleu"])
+        return acc
+
+    def _avg(self, s: List[float], c: int) -> float:
+        return (math.fsum(s) / c) if c else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"num_cases": self.num_cases}
+        for k, _ in self.METRICS:
+            out[k] = self._avg(self.sums[k], self.counts[k])
+        out["corpus_bleu"] = self.corpus_bleu.score()
+        for k in LLM_KEYS:
+            out[f"avg_llm_{k}"] = self._avg(self.llm_sums[k], self.llm_counts[k]) if self.num_judged else None
+        # only --sections runs have sectioned rows
+        if self.num_sectioned:
+            out["sections"] = {"num_cases": self.num_sectioned}
+            for s in SECTIONS:
+                out["sections"][s] = {k: self._avg(self.sums[f"{s}.{k}"], self.counts[f"{s}.{k}"])
+                                      for k, _ in self.SECTION_METRICS}
+        return out
+
+def _with_acc(metrics: Dict[str, Any], acc: SummaryAccumulator) -> Dict[str, Any]:
+    """Columnar `metrics` plus whatever sections only the accumulator has (e.g. "sections")."""
+    summary = dict(metrics)
+    for k, v in acc.summary().items():
+        summary.setdefault(k, v)
+    return summary
 
 def write_per_case_jsonl(out_dir: str, rows: List[Dict[str, Any]]) -> None:
     path = os.path.join(out_dir, "per_case.jsonl")
@@ -12,84 +139,79 @@ def write_per_case_jsonl(out_dir: str, rows: List[Dict[str, Any]]) -> None:
         for r in rows:
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
 
-def write_summary(out_dir: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
-    summary = {
-        "num_cases": len(rows),
-        "avg_missing": _mean([r["missing_count"] for r in rows]),
-        "avg_hallucinated": _mean([r["hallucinated_count"] for r in rows]),
-        "avg_contradictions": _mean([r["contradictions_count"] for r in rows]),
-        "avg_ref_precision": _mean([r["ref_align"]["precision"] for r in rows]),
-        "avg_ref_recall": _mean([r["ref_align"]["recall"] for r in rows]),
-        "avg_ref_f1": _mean([r["ref_align"]["f1"] for r in rows]),
-        # NEW: text overlap
-        "avg_bleu": _mean([(r.get("text_overlap") or {}).get("bleu") for r in rows]),
-        "avg_rouge_l_f": _mean([(r.get("text_overlap") or {}).get("rouge_l_f") for r in rows]),
-    }
-
-    # Optional LLM aggregates if present
-    comp, ground, clin = [], [], []
-    for r in rows:
-        j = r.get("llm_judge")
-        if isinstance(j, dict):
-            comp.append(j.get("completeness"))
-            ground.append(j.get("grounding"))
-            clin.append(j.get("clinical_accuracy"))
-    summary.update({
-        "avg_llm_completeness": _mean(comp) if comp else None,
-        "avg_llm_grounding": _mean(ground) if ground else None,
-        "avg_llm_clinical_accuracy": _mean(clin) if clin else None,
-    })
-
+def _write_summary_json(out_dir: str, summary: Dict[str, Any]) -> None:
     with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
         json.dump(summary, f, indent=2)
 
-    # CSV per case (include new text metrics and LLM if present)
-    any_llm = any(r.get("llm_judge") for r in rows)
-    cols = [
+def _write_aggregates(out_dir: str, acc: SummaryAccumulator, any_llm: bool) -> None:
+    """Partial sums/counts behind summary.json, for merging runs (see merge_runs)."""
+    with open(os.path.join(out_dir, "aggregates.json"), "w", encoding="utf-8") as f:
+        json.dump({"any_llm": any_llm, "state": acc.state()}, f)
+
+def csv_columns(any_llm: bool) -> List[str]:
+    return [
         "id","missing_count","hallucinated_count","contradictions_count",
         "ref_precision","ref_recall","ref_f1",
         "bleu","rouge_l_f",
     ] + (["llm_completeness","llm_grounding","llm_clinical_accuracy"] if any_llm else [])
 
+def csv_row(r: Dict[str, Any], any_llm: bool) -> List[Any]:
+    t = r.get("text_overlap") or {}
+    row = [
+        r["id"],
+        r["missing_count"],
+        r["hallucinated_count"],
+        r["contradictions_count"],
+        r["ref_align"]["precision"],
+        r["ref_align"]["recall"],
+        r["ref_align"]["f1"],
+        t.get("bleu"),
+        t.get("rouge_l_f"),
+    ]
+    if any_llm:
+        j = r.get("llm_judge") or {}
+        row += [j.get("completeness"), j.get("grounding"), j.get("clinical_accuracy")]
+    return row
+
+def write_summary(out_dir: str, rows: List[Dict[str, Any]], extra: Optional[Dict[str, Any]] = None,
+                  metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """`metrics`, if given, replaces the averages accumulated from `rows` (e.g. reduced from columnar arrays)."""
+    acc = SummaryAccumulator()
+    any_llm = False
+    for r in rows:
+        acc.add(r)
+        any_llm = any_llm or bool(r.get("llm_judge"))
+    summary = _with_acc(metrics, acc) if metrics is not None else acc.summary()
+    summary.update(extra or {})
+    _write_summary_json(out_dir, summary)
+    _write_aggregates(out_dir, acc, any_llm)
+
+    # CSV per case (include new text metrics and LLM if present)
     with open(os.path.join(out_dir, "summary.csv"), "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f); w.writerow(cols)
+        w = csv.writer(f); w.writerow(csv_columns(any_llm))
         for r in rows:
-            t = r.get("text_overlap") or {}
-            row = [
-                r["id"],
-                r["missing_count"],
-                r["hallucinated_count"],
-                r["contradictions_count"],
-                r["ref_align"]["precision"],
-                r["ref_align"]["recall"],
-                r["ref_align"]["f1"],
-                t.get("bleu"),
-                t.get("rouge_l_f"),
-            ]
-            if any_llm:
-                j = r.get("llm_judge") or {}
-                row += [j.get("completeness"), j.get("grounding"), j.get("clinical_accuracy")]
-            w.writerow(row)
+            w.writerow(csv_row(r, any_llm))
     return summary
 
-def write_dashboard(out_dir: str, rows: List[Dict[str, Any]], summary: Dict[str, Any]) -> None:
-    any_llm = any(r.get("llm_judge") for r in rows)
-    trs = []
-    for r in rows:
-        t = r.get("text_overlap") or {}
-        j = r.get("llm_judge") or {}
-        llm_cells = ""
-        if any_llm:
-            llm_cells = f"<td>{(j.get('completeness') or '')}</td><td>{(j.get('grounding') or '')}</td><td>{(j.get('clinical_accuracy') or '')}</td>"
-        trs.append(
-            "<tr>"
-            f"<td>{r['id']}</td>"
-            f"<td>{r['missing_count']}</td><td>{r['hallucinated_count']}</td><td>{r['contradictions_count']}</td>"
-            f"<td>{r['ref_align']['precision']:.2f}</td><td>{r['ref_align']['recall']:.2f}</td><td>{r['ref_align']['f1']:.2f}</td>"
-            f"<td>{(t.get('bleu') or 0):.3f}</td><td>{(t.get('rouge_l_f') or 0):.3f}</td>"
-            f"{llm_cells}</tr>"
-        )
+def dashboard_row(r: Dict[str, Any], any_llm: bool) -> str:
+    t = r.get("text_overlap") or {}
+    j = r.get("llm_judge") or {}
+    llm_cells = ""
+    if any_llm:
+        llm_cells = f"<td>{(j.get('completeness') or '')}</td><td>{(j.get('grounding') or '')}</td><td>{(j.get('clinical_accuracy') or '')}</td>"
+    return (
+        "<tr>"
+        f"<td>{r['id']}</td>"
+        f"<td>{r['missing_count']}</td><td>{r['hallucinated_count']}</td><td>{r['contradictions_count']}</td>"
+        f"<td>{r['ref_align']['precision']:.2f}</td><td>{r['ref_align']['recall']:.2f}</td><td>{r['ref_align']['f1']:.2f}</td>"
+        f"<td>{(t.get('bleu') or 0):.3f}</td><td>{(t.get('rouge_l_f') or 0):.3f}</td>"
+        f"{llm_cells}</tr>"
+    )
+
+_TBODY = "\x00tbody\x00"
 
+def _dashboard_head(summary: Dict[str, Any]) -> str:
+    """Page header and summary cards shared by both dashboard modes."""
     llm_kv = ""
     if summary.get("avg_llm_completeness") is not None:
         llm_kv = (
@@ -98,7 +220,11 @@ def write_dashboard(out_dir: str, rows: List[Dict[str, Any]], summary: Dict[str,
             f"<div class='item'><div class='k'>Avg LLM Clinical</div><div class='v'>{summary['avg_llm_clinical_accuracy']:.2f}</div></div>"
         )
 
-    html = f"""<!doctype html>
+    corpus_kv = ""
+    if summary.get("corpus_bleu") is not None:
+        corpus_kv = f"<div class='item'><div class='k'>Corpus BLEU</div><div class='v'>{summary['corpus_bleu']:.3f}</div></div>"
+
+    return f"""<!doctype html>
 <html><head><meta charset='utf-8'><title>Evals Dashboard</title>
 <style>
 body {{ font-family: system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif; padding: 24px; }}
@@ -119,10 +245,18 @@ th {{ background:#f8fafc; }}
   <div class="item"><div class="k">Avg Contradictions</div><div class="v">{summary['avg_contradictions']:.2f}</div></div>
   <div class="item"><div class="k">Avg Ref F1</div><div class="v">{summary['avg_ref_f1']:.2f}</div></div>
   <div class="item"><div class="k">Avg BLEU</div><div class="v">{summary['avg_bleu']:.3f}</div></div>
+  {corpus_kv}
   <div class="item"><div class="k">Avg ROUGE-L(F)</div><div class="v">{summary['avg_rouge_l_f']:.3f}</div></div>
   {llm_kv}
 </div>
-<div class="card">
+"""
+
+_DASHBOARD_FOOT = """<p style="color:#789">BLEU/ROUGE-L complement fact-level metrics; they are not substitutes for clinical correctness.</p>
+</body></html>"""
+
+def _dashboard_shell(summary: Dict[str, Any], any_llm: bool) -> Tuple[str, str]:
+    """Returns the page split around the table body, so rows can be spliced in from anywhere."""
+    html = _dashboard_head(summary) + f"""<div class="card">
   <h3>Per-Case Metrics</h3>
   <table>
     <thead><tr>
@@ -130,10 +264,302 @@ th {{ background:#f8fafc; }}
       <th>Ref P</th><th>Ref R</th><th>Ref F1</th>
       <th>BLEU</th><th>ROUGE-L(F)</th>{'<th>LLM Comp</th><th>LLM Ground</th><th>LLM Clin</th>' if any_llm else ''}
     </tr></thead>
-    <tbody>{''.join(trs)}</tbody>
+    <tbody>{_TBODY}</tbody>
   </table>
 </div>
-<p style="color:#789">BLEU/ROUGE-L complement fact-level metrics; they are not substitutes for clinical correctness.</p>
-</body></html>"""
+""" + _DASHBOARD_FOOT
+    head, tail = html.split(_TBODY)
+    return head, tail
+
+# Client side of the compact dashboard: pages, sorts and filters the columnar payload in #evals-data.
+_COMPACT_JS = r"""<script>
+(function () {
+  var D = JSON.parse(document.getElementById("evals-data").textContent);
+  var cols = D.cols, data = D.data, n = D.n;
+  var st = {sort: null, desc: false, page: 0, size: 50, q: "", view: ""};
+  var $ = function (id) { return document.getElementById(id); };
+  var fmt = function (c, v) {
+    if (v === null || v === undefined) return "";
+    var d = D.digits[c];
+    return d === undefined ? String(v) : Number(v).toFixed(d);
+  };
+  var esc = function (s) {
+    return String(s).replace(/[&<>"]/g, function (ch) { return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[ch]; });
+  };
+  var view = $("ev-view");
+  Object.keys(D.worst).forEach(function (c) {
+    var o = document.createElement("option");
+    o.value = c; o.textContent = "Worst " + D.worst[c].length + " by " + D.labels[c];
+    view.appendChild(o);
+  });
+  $("ev-head").innerHTML = "<tr>" + cols.map(function (c) {
+    return "<th data-c='" + c + "' style='cursor:pointer'>" + esc(D.labels[c]) + "</th>";
+  }).join("") + "</tr>";
+  function indices() {
+    var idx;
+    if (st.view) { idx = D.worst[st.view].slice(); }
+    else { idx = new Array(n); for (var i = 0; i < n; i++) idx[i] = i; }
+    if (st.q) {
+      var q = st.q.toLowerCase(), ids = data[cols[0]];
+      idx = idx.filter(function (i) { return String(ids[i]).toLowerCase().indexOf(q) >= 0; });
+    }
+    if (st.sort) {
+      var col = data[st.sort], sign = st.desc ? -1 : 1;
+      idx.sort(function (a, b) {
+        var x = col[a], y = col[b];
+        if (x === y) return a - b;
+        if (x === null) return 1;
+        if (y === null) return -1;
+        return (x < y ? -1 : 1) * sign;
+      });
+    }
+    return idx;
+  }
+  function render() {
+    var idx = indices(), pages = Math.max(1, Math.ceil(idx.length / st.size));
+    st.page = Math.min(st.page, pages - 1);
+    var out = [], start = st.page * st.size, end = Math.min(idx.length, start + st.size);
+    for (var k = start; k < end; k++) {
+      var i = idx[k];
+      out.push("<tr>" + cols.map(function (c) { return "<td>" + esc(fmt(c, data[c][i])) + "</td>"; }).join("") + "</tr>");
+    }
+    $("ev-body").innerHTML = out.join("");
+    $("ev-info").textContent = idx.length + " cases, page " + (st.page + 1) + " of " + pages;
+  }
+  $("ev-head").addEventListener("click", function (e) {
+    var c = e.target.getAttribute("data-c");
+    if (!c) return;
+    st.desc = st.sort === c ? !st.desc : false;
+    st.sort = c; render();
+  });
+  $("ev-q").addEventListener("input", function (e) { st.q = e.target.value; st.page = 0; render(); });
+  view.addEventListener("change", function (e) { st.view = e.target.value; st.sort = null; st.page = 0; render(); });
+  $("ev-size").addEventListener("change", function (e) { st.size = +e.target.value; st.page = 0; render(); });
+  $("ev-prev").addEventListener("click", function () { if (st.page > 0) { st.page--; render(); } });
+  $("ev-next").addEventListener("click", function () { st.page++; render(); });
+  render();
+})();
+</script>
+"""
+
+class CompactDashboard:
+    """
+    dashboard.html with per-case metrics stored once as columnar JSON and rendered in the
+    browser a page at a time (sortable, filterable by case id). Each column is spooled to its
+    own temp file, so memory stays flat, and bounded heaps keep the worst `worst_n` cases per
+    metric as the rows go by. Columns and labels follow summary.csv.
+    """
+    LABELS = {
+        "id": "Case", "missing_count": "Missing", "hallucinated_count": "Hallucinated",
+        "contradictions_count": "Contradictions", "ref_precision": "Ref P", "ref_recall": "Ref R",
+        "ref_f1": "Ref F1", "bleu": "BLEU", "rouge_l_f": "ROUGE-L(F)", "llm_completeness": "LLM Comp",
+        "llm_grounding": "LLM Ground", "llm_clinical_accuracy": "LLM Clin",
+    }
+    DIGITS = {"ref_precision": 2, "ref_recall": 2, "ref_f1": 2, "bleu": 3, "rouge_l_f": 3}
+    # column -> True if a higher value is worse
+    WORST = {
+        "missing_count": True, "hallucinated_count": True, "contradictions_count": True,
+        "ref_f1": False, "rouge_l_f": False,
+        "llm_completeness": False, "llm_grounding": False, "llm_clinical_accuracy": False,
+    }
+
+    def __init__(self, out_dir: str, any_llm: bool = False, worst_n: int = 25):
+        self.out_dir = out_dir
+        self.any_llm = any_llm
+        self.worst_n = worst_n
+        self.cols = csv_columns(any_llm)
+        self.n = 0
+        self._spool = [tempfile.TemporaryFile("w+", encoding="utf-8", dir=out_dir) for _ in self.cols]
+        self._buf: List[List[Any]] = []
+        self._worst = {c: (i, self.WORST[c], []) for i, c in enumerate(self.cols) if c in self.WORST}
+
+    def add(self, r: Dict[str, Any]) -> None:
+        vals = csv_row(r, self.any_llm)
+        self._buf.append(vals)
+        if len(self._buf) >= 1024:
+            self._flush()
+        for pos, higher_worse, heap in self._worst.values():
+            v = vals[pos]
+            if v is None:
+                continue
+            item = (v if higher_worse else -v, -self.n, self.n)
+            if len(heap) < self.worst_n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        self.n += 1
+
+    def _flush(self) -> None:
+        """Appends the buffered rows to the column spools, one json.dumps per column."""
+        if not self._buf:
+            return
+        for f, col in zip(self._spool, zip(*self._buf)):
+            col = [round(v, 4) if type(v) is float else v for v in col]
+            f.write(("," if f.tell() else "") + json.dumps(col, ensure_ascii=False, separators=(",", ":"))[1:-1].replace("</", "<\\/"))
+        self._buf.clear()
+
+    def write(self, summary: Dict[str, Any]) -> None:
+        self._flush()
+        worst = {c: [i for _, _, i in sorted(heap, reverse=True)]
+                 for c, (_, _, heap) in self._worst.items() if heap}
+        with open(os.path.join(self.out_dir, "dashboard.html"), "w", encoding="utf-8") as f:
+            f.write(_dashboard_head(summary))
+            f.write("""<div class="card">
+  <h3>Per-Case Metrics</h3>
+  <div style="display:flex; gap:12px; align-items:center; margin-bottom:8px">
+    <select id="ev-view"><option value="">All cases</option></select>
+    <input id="ev-q" placeholder="Filter by case id">
+    <select id="ev-size"><option>25</option><option selected>50</option><option>100</option><option>500</option></select>
+    <button id="ev-prev">&lsaquo; Prev</button><button id="ev-next">Next &rsaquo;</button>
+    <span id="ev-info" style="color:#556"></span>
+  </div>
+  <table><thead id="ev-head"></thead><tbody id="ev-body"></tbody></table>
+</div>
+<script type="application/json" id="evals-data">""")
+            meta = {"cols": self.cols, "n": self.n, "labels": {c: self.LABELS[c] for c in self.cols},
+                    "digits": self.DIGITS, "worst": worst}
+            f.write(json.dumps(meta)[:-1] + ', "data": {')
+            for k, (c, spool) in enumerate(zip(self.cols, self._spool)):
+                f.write(("," if k else "") + json.dumps(c) + ":[")
+                spool.seek(0)
+                shutil.copyfileobj(spool, f)
+                f.write("]")
+            f.write("}}</script>\n")
+            f.write(_COMPACT_JS)
+            f.write(_DASHBOARD_FOOT)
+        self.close()
+
+    def close(self) -> None:
+        for spool in self._spool:
+            spool.close()
+
+DASHBOARD_MODES = ("table", "compact")
+
+def write_dashboard(out_dir: str, rows: List[Dict[str, Any]], summary: Dict[str, Any], mode: str = "table") -> None:
+    any_llm = any(r.get("llm_judge") for r in rows)
+    if mode == "compact":
+        dash = CompactDashboard(out_dir, any_llm)
+        for r in rows:
+            dash.add(r)
+        dash.write(summary)
+        return
+    head, tail = _dashboard_shell(summary, any_llm)
     with open(os.path.join(out_dir, "dashboard.html"), "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(head + "".join(dashboard_row(r, any_llm) for r in rows) + tail)
+
+# ---------------------------------------------------------------
+# Report sinks: main.run feeds scored rows into one of these
+# ---------------------------------------------------------------
+
+class BufferedReport:
+    """
+    Collects rows and writes every report at close(); output is decided by the full row set.
+    With a `columnar` writer (evalsuite.columnar.ColumnarWriter) the rows are also written as
+    arrays and summary.json's metrics are reduced from those.
+    """
+    def __init__(self, out_dir: str, dashboard: str = "table", columnar=None):
+        self.out_dir = out_dir
+        self.dashboard = dashboard
+        self.columnar = columnar
+        self.rows: List[Dict[str, Any]] = []
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.rows.append(row)
+
+    def close(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """`extra` holds run-level sections (cache stats etc.) appended to summary.json."""
+        write_per_case_jsonl(self.out_dir, self.rows)
+        metrics = None
+        if self.columnar:
+            for r in self.rows:
+                self.columnar.add(r)
+            metrics = self.columnar.close()
+        summary = write_summary(self.out_dir, self.rows, extra, metrics=metrics)
+        write_dashboard(self.out_dir, self.rows, summary, mode=self.dashboard)
+        return summary
+
+class StreamingReport:
+    """
+    Writes each row to per_case.jsonl / summary.csv as soon as it arrives and folds it into a
+    SummaryAccumulator; dashboard rows are spooled to temp files and spliced in at close().
+    Memory stays constant in the number of rows. Because LLM columns cannot be decided
+    after the fact, the caller says up front whether a judge is configured. With a `columnar`
+    writer summary.json's metrics come from its arrays, as in BufferedReport; a ready-made
+    `acc` (merge_runs) is used as is instead of folding the rows in.
+    """
+    def __init__(self, out_dir: str, any_llm: bool = False, dashboard: str = "table", columnar=None,
+                 acc: Optional[SummaryAccumulator] = None):
+        self.out_dir = out_dir
+        self.any_llm = any_llm
+        self.columnar = columnar
+        self._dash = CompactDashboard(out_dir, any_llm) if dashboard == "compact" else None
+        self._fold = acc is None
+        self.acc = SummaryAccumulator() if acc is None else acc
+        self._jsonl = open(os.path.join(out_dir, "per_case.jsonl"), "w", encoding="utf-8")
+        self._csv_f = open(os.path.join(out_dir, "summary.csv"), "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._csv_f)
+        self._csv.writerow(csv_columns(any_llm))
+        self._trs = tempfile.TemporaryFile("w+", encoding="utf-8", dir=out_dir)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self._jsonl.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._csv.writerow(csv_row(row, self.any_llm))
+        if self._dash:
+            self._dash.add(row)
+        else:
+            self._trs.write(dashboard_row(row, self.any_llm))
+        if self.columnar:
+            self.columnar.add(row)
+        if self._fold:
+            self.acc.add(row)
+
+    def close(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._jsonl.close(); self._csv_f.close()
+        summary = _with_acc(self.columnar.close(), self.acc) if self.columnar else self.acc.summary()
+        summary.update(extra or {})
+        _write_summary_json(self.out_dir, summary)
+        _write_aggregates(self.out_dir, self.acc, self.any_llm)
+        if self._dash:
+            self._dash.write(summary)
+            self._trs.close()
+            return summary
+        head, tail = _dashboard_shell(summary, self.any_llm)
+        with open(os.path.join(self.out_dir, "dashboard.html"), "w", encoding="utf-8") as f:
+            f.write(head)
+            self._trs.seek(0)
+            shutil.copyfileobj(self._trs, f)
+            f.write(tail)
+        self._trs.close()
+        return summary
+
+# ---------------------------------------------------------------
+# Merging runs (e.g. --shard outputs) without rescoring
+# ---------------------------------------------------------------
+
+def merge_runs(run_dirs: List[str], out_dir: str, dashboard: str = "table") -> Dict[str, Any]:
+    """
+    Combines finished runs into one out dir. per_case.jsonl rows are concatenated in the given
+    order and summary.json comes from the runs' merged aggregates.json, so merging the shards
+    of an input in shard order reproduces the single-run reports exactly. Per-run sections
+    such as timings are dropped; judge_cache hit/miss counts are added up.
+    """
+    from .jsonl import iter_jsonl
+    os.makedirs(out_dir, exist_ok=True)
+    acc = SummaryAccumulator()
+    any_llm = False
+    judge_cache: Optional[Dict[str, int]] = None
+    for d in run_dirs:
+        with open(os.path.join(d, "aggregates.json"), "r", encoding="utf-8") as f:
+            agg = json.load(f)
+        acc.merge(SummaryAccumulator.from_state(agg["state"]))
+        any_llm = any_llm or agg["any_llm"]
+        with open(os.path.join(d, "summary.json"), "r", encoding="utf-8") as f:
+            jc = json.load(f).get("judge_cache")
+        if jc:
+            judge_cache = judge_cache or {"hits": 0, "misses": 0}
+            judge_cache["hits"] += jc["hits"]; judge_cache["misses"] += jc["misses"]
+    report = StreamingReport(out_dir, any_llm=any_llm, dashboard=dashboard, acc=acc)
+    for d in run_dirs:
+        for row in iter_jsonl(os.path.join(d, "per_case.jsonl")):
+            report.add(row)
+    return report.close({"judge_cache": judge_cache} if judge_cache else None)
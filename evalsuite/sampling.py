@@ -0,0 +1,191 @@
+# evalsuite/sampling.py
+"""
+Deterministic sampling of the input for quick (CI-sized) runs.
+
+StratifiedSampler picks rows in one streaming pass by bottom-k sampling. Each row gets a
+pseudo-random priority hashed from the seed and its id, and every stratum keeps its k
+lowest-priority rows. The sample therefore depends only on the seed and the rows' contents,
+not on input order or how files were concatenated. Rows sharing a source and id share a
+priority (input order breaks the tie), so nothing is remembered about rows that were not kept.
+Memory is bounded by k entries per stratum; an entry is whatever the caller offers as `item`,
+e.g. the row's position in the input, to be re-read once the sample is known. Strata are
+combinations of fields (top-level or under `meta`, e.g. source, health_problem, gender). The
+sample size is split across them proportionally, or equally, once the pass has counted them.
+
+SequentialStop watches rows as they are scored and reports when the confidence interval of
+every chosen summary.json metric is narrow enough, so a run can stop early.
+"""
+import hashlib, heapq, math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from .report import LLM_KEYS, SummaryAccumulator
+
+ALLOCATIONS = ("proportional", "equal")
+
+def priority(seed: int, key: str) -> float:
+    """Uniform in [0, 1), fixed by (seed, key)."""
+    h = hashlib.blake2b(f"{seed}\x00{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "big") / 2.0**64
+
+def field_value(ex: Dict[str, Any], field: str) -> Any:
+    if field in ex:
+        return ex[field]
+    meta = ex.get("meta")
+    return meta.get(field) if isinstance(meta, dict) else None
+
+def allocate(sizes: Dict[Tuple, int], n: int, allocation: str = "proportional") -> Dict[Tuple, int]:
+    """
+    Rows to take per stratum: n in total, every stratum at least one row when n allows, and
+    the rest split in proportion to stratum size (or evenly), capped at what each stratum has.
+    """
+    if n >= sum(sizes.values()):
+        return dict(sizes)
+    keys = sorted(sizes)
+    alloc = {k: 0 for k in keys}
+    rest = n
+    if n >= len(keys):
+        alloc = {k: 1 for k in keys}
+        rest -= len(keys)
+    while rest > 0:
+        room = [k for k in keys if alloc[k] < sizes[k]]
+        weight = {k: (1 if allocation == "equal" else sizes[k]) for k in room}
+        total = sum(weight.values())
+        quota = {k: rest * weight[k] / total for k in room}
+        given = 0
+        for k in room:
+            g = min(int(quota[k]), sizes[k] - alloc[k])
+            alloc[k] += g; given += g
+        if given == 0:
+            # all quotas < 1: hand out single rows by largest quota
+            for k in sorted(room, key=lambda k: (-quota[k], k))[:rest]:
+                alloc[k] += 1; given += 1
+        rest -= given
+    return alloc
+
+class StratifiedSampler:
+    def __init__(self, n: Optional[int], by: Sequence[str] = (), seed: int = 0, allocation: str = "proportional"):
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"allocation must be one of {ALLOCATIONS}, got {allocation!r}")
+        self.n, self.by, self.seed, self.allocation = n, tuple(by), seed, allocation
+        self.sizes: Dict[Tuple, int] = {}
+        self._heaps: Dict[Tuple, List[Tuple[float, int, Any]]] = {}  # max-heaps on priority (negated)
+        self._picked: List[Tuple] = []  # stratum of each item sample() returned, in its order
+        self._seq = 0
+
+    def stratum(self, ex: Dict[str, Any], extra: Optional[Dict[str, Any]] = None) -> Tuple:
+        return tuple(str((extra or {}).get(f, field_value(ex, f))) for f in self.by)
+
+    def add(self, ex: Dict[str, Any], item: Any = None, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Offers one row. `item` is what sample() returns for it (default: the row itself);
+        `extra` supplies field values not stored in the row, such as the source file.
+        """
+        s = self.stratum(ex, extra)
+        self.sizes[s] = self.sizes.get(s, 0) + 1
+        # ids can repeat across concatenated datasets, so the source is part of the key
+        src = (extra or {}).get("source", field_value(ex, "source"))
+        key = f"{src}|{ex.get('id', self._seq)}|0"
+        entry = (-priority(self.seed, key), self._seq, ex if item is None else item)
+        self._seq += 1
+        heap = self._heaps.setdefault(s, [])
+        if self.n is None or len(heap) < self.n:
+            heapq.heappush(heap, entry)
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> "StratifiedSampler":
+        for ex in rows:
+            self.add(ex)
+        return self
+
+    def allocation_sizes(self) -> Dict[Tuple, int]:
+        if self.n is None:
+            return dict(self.sizes)
+        return allocate(self.sizes, self.n, self.allocation)
+
+    def sample(self, order: str = "input") -> List[Any]:
+        """
+        The sampled items. order="input" keeps input order; order="random" interleaves the
+        strata by priority so that every prefix is itself a roughly stratified random sample
+        (what SequentialStop needs).
+        """
+        alloc = self.allocation_sizes()
+        picked: List[Tuple[float, float, int, Tuple, Any]] = []
+        for s, heap in self._heaps.items():
+            k = alloc[s]
+            for rank, (negp, seq, item) in enumerate(sorted(heap, key=lambda e: (-e[0], e[1]))[:k]):
+                picked.append(((rank + 0.5) / k, -negp, seq, s, item))
+        if order == "input":
+            picked.sort(key=lambda e: e[2])
+        else:
+            picked.sort(key=lambda e: (e[0], e[1], e[2]))
+        self._picked = [e[3] for e in picked]
+        return [e[4] for e in picked]
+
+    def describe(self, scored: Optional[int] = None) -> Dict[str, Any]:
+        """
+        What summary.json records about the sample. `scored` is how many items of the last
+        sample() a run got through (default: all of them); "sampled" and the per-stratum
+        counts cover only those, "planned" is the full sample size.
+        """
+        alloc = self.allocation_sizes()
+        taken: Dict[Tuple, int] = dict.fromkeys(self.sizes, 0)
+        for s in self._picked[:scored]:
+            taken[s] += 1
+        return {"n": self.n, "by": list(self.by), "seed": self.seed, "allocation": self.allocation,
+                "population": sum(self.sizes.values()), "planned": sum(alloc.values()),
+                "sampled": sum(taken.values()),
+                "strata": {"/".join(s) or "all": [taken[s], self.sizes[s]] for s in sorted(self.sizes)}}
+
+def metric_getter(name: str):
+    """Row -> value for a summary.json metric name (avg_ref_f1, avg_bleu, avg_llm_grounding, ...)."""
+    getters = dict(SummaryAccumulator.METRICS)
+    if name in getters:
+        return getters[name]
+    k = name[len("avg_llm_"):] if name.startswith("avg_llm_") else None
+    if k in LLM_KEYS:
+        return lambda r: (r.get("llm_judge") or {}).get(k) if isinstance(r.get("llm_judge"), dict) else None
+    raise ValueError(f"unknown metric {name!r}; expected one of {list(getters) + [f'avg_llm_{k}' for k in LLM_KEYS]}")
+
+class SequentialStop:
+    """
+    Running mean/variance (Welford) per metric. done once every metric has at least
+    `min_cases` values and a normal-approximation confidence half-width z*sd/sqrt(n) at or
+    below its target.
+    """
+
+    def __init__(self, targets: Dict[str, float], z: float = 1.96, min_cases: int = 30):
+        self.targets = dict(targets)
+        self.getters = {m: metric_getter(m) for m in self.targets}
+        self.z, self.min_cases = z, min_cases
+        self.stats = {m: [0, 0.0, 0.0] for m in self.targets}  # n, mean, M2
+        self.rows = 0
+        self.done = False
+
+    def half_width(self, m: str) -> Optional[float]:
+        n, _, m2 = self.stats[m]
+        return self.z * math.sqrt(m2 / (n - 1) / n) if n > 1 else None
+
+    def _within(self, m: str, target: float) -> bool:
+        hw = self.half_width(m)
+        return hw is not None and hw <= target  # no half-width before two values, whatever min_cases says
+
+    def add(self, row: Dict[str, Any]) -> bool:
+        self.rows += 1
+        for m, get in self.getters.items():
+            x = get(row)
+            if x is None:
+                continue
+            st = self.stats[m]
+            st[0] += 1
+            d = float(x) - st[1]
+            st[1] += d / st[0]
+            st[2] += d * (float(x) - st[1])
+        self.done = all(self.stats[m][0] >= self.min_cases and self._within(m, t) for m, t in self.targets.items())
+        return self.done
+
+    def describe(self) -> Dict[str, Any]:
+        return {"stopped_early": self.done, "stop_reason": "ci_target_met" if self.done else "sample_exhausted",
+                "rows": self.rows, "z": self.z, "min_cases": self.min_cases,
+                "metrics": {m: {"n": self.stats[m][0], "mean": self.stats[m][1],
+                                "half_width": self.half_width(m), "target": t}
+                            for m, t in self.targets.items()}}
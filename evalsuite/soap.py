@@ -1,35 +1,120 @@
 \
+"""
+SOAP section splitting and per-section metrics.
+
+section_spans() finds every header in one regex pass and returns (section, start, end)
+offsets into the note instead of copying text. Headers are either on a line of their own
+("Subjective", "S:", "Plan -") or start a line inline ("S: pt reports ...", "Plan: ...").
+A combined "Assessment and Plan" / "Assessment & Plan" / "A/P" header opens the assessment
+section (a later "Plan:" header still starts the plan).
+"""
 import re
-from typing import Dict
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+from .extractors import Fact
 
-def split_soap_sections(text: str) -> Dict[str, str]:
-    t = text or ""
-    lines = t.splitlines()
-    sections = {"subjective": "", "objective": "", "assessment": "", "plan": ""}
-    current = None
-
-    def header_of(line: str):
-        l = line.strip().lower()
-        l = re.sub(r"[:\-\s]+$", "", l)
-        if l in ("subjective", "s"):
-            return "subjective"
-        if l in ("objective", "o"):
-            return "objective"
-        if l in ("assessment", "a"):
-            return "assessment"
-        if l in ("plan", "p"):
-            return "plan"
-        return None
+SECTIONS = ("subjective", "objective", "assessment", "plan")
+_LETTERS = {"s": "subjective", "o": "objective", "a": "assessment", "p": "plan"}
 
-    for line in lines:
-        h = header_of(line)
-        if h is not None:
-            current = h
-            continue
-        if current is None:
-            current = "subjective"
-        sections[current] += (line + "\n")
+_HEADER = re.compile(
+    r"^[ \t]*(?:(subjective|objective|assessment(?:[ \t]*(?:and|&|/)[ \t]*plan)?|plan)[ \t]*(?::|-+(?=[ \t]|\r?$)|(?=\r?$))"
+    r"|(a[ \t]*[/&][ \t]*p|[soap])[ \t]*(?::|-*[ \t]*(?=\r?$)))[ \t]*",
+    re.I | re.M)
+_NONSPACE = re.compile(r"\S")
 
+Span = Tuple[Optional[str], int, int]
+
+def section_spans(text: str) -> List[Span]:
+    """
+    Non-blank stretches of `text` between headers, as (section, start, end). Text before the
+    first header gets section None; a section may appear more than once.
+    """
+    t = text or ""
+    spans: List[Span] = []
+    current: Optional[str] = None
+    pos = 0
+    for m in _HEADER.finditer(t):
+        if _NONSPACE.search(t, pos, m.start()):
+            spans.append((current, pos, m.start()))
+        word, letter = m.group(1), m.group(2)
+        # combined A/P headers count as assessment
+        current = word.lower().split()[0].split("&")[0].split("/")[0] if word else _LETTERS[letter[0].lower()]
+        pos = m.end()
+    if _NONSPACE.search(t, pos):
+        spans.append((current, pos, len(t)))
+    return spans
+
+def split_soap_sections(text: str) -> Dict[str, str]:
+    """
+    Section texts; anything before the first header counts as subjective. As before, header
+    lines are left out and every kept line ends in "\n"; {"body": text} if nothing is found.
+    """
+    t = text or ""
+    sections = {s: "" for s in SECTIONS}
+    for sec, start, end in section_spans(t):
+        body = t[start:end]
+        if start and body[:1] in "\r\n":
+            body = body[2:] if body.startswith("\r\n") else body[1:]  # rest of a header-only line
+        sections[sec or "subjective"] += "".join(line + "\n" for line in body.splitlines())
     if not any(v.strip() for v in sections.values()):
         return {"body": t}
     return sections
+
+class SectionMap:
+    """Offset -> section lookup over one note's spans."""
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self.spans = section_spans(self.text)
+        self._starts = [s for _, s, _ in self.spans]
+        self.has_headers = any(sec is not None for sec, _, _ in self.spans)
+
+    def section_at(self, offset: Optional[int]) -> Optional[str]:
+        if offset is None:
+            return None
+        i = bisect_right(self._starts, offset) - 1
+        if i < 0 or offset >= self.spans[i][2]:
+            return None
+        return self.spans[i][0] or "subjective"
+
+    def text_of(self, section: str) -> Optional[str]:
+        """The section's text (all its spans joined), or None if the note has no such section."""
+        parts = [self.text[s:e] for sec, s, e in self.spans if (sec or "subjective") == section]
+        return "\n".join(parts) if parts else None
+
+def section_metrics(note: str, reference: str, missing: List[Fact], hallucinated: List[Fact],
+                    ref_facts: List[Fact], ref_index, overlap) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Per-section missing/hallucinated counts and BLEU/ROUGE-L, or None unless both notes have
+    SOAP headers. Hallucinated facts are placed by their offset in the note. A missing fact is
+    placed where the reference states it (its first match among `ref_facts`, via `ref_index`);
+    missing facts the reference never states are counted in no section. BLEU/ROUGE-L compare
+    the same section of both notes and are None when neither has it.
+    """
+    nmap, rmap = SectionMap(note), SectionMap(reference)
+    if not (nmap.has_headers and rmap.has_headers):
+        return None
+    out: Dict[str, Dict[str, Any]] = {s: {"missing": 0, "hallucinated": 0} for s in SECTIONS}
+    for f in hallucinated:
+        sec = nmap.section_at(f.start)
+        if sec:
+            out[sec]["hallucinated"] += 1
+    for f in missing:
+        j = ref_index.first_match(f, ())
+        sec = rmap.section_at(ref_facts[j].start) if j is not None else None
+        if sec:
+            out[sec]["missing"] += 1
+    for sec in SECTIONS:
+        a, b = nmap.text_of(sec), rmap.text_of(sec)
+        if a is None and b is None:
+            out[sec]["bleu"] = out[sec]["rouge_l_f"] = None
+            continue
+        if a == b:
+            # what score() gives for identical texts, without the n-gram counts and LCS
+            n = len(overlap.encode(a))
+            out[sec]["bleu"] = 1.0 if n >= overlap.max_n else 0.0
+            out[sec]["rouge_l_f"] = 1.0 if n else 0.0
+            continue
+        scores = overlap.score(a or "", b or "")
+        out[sec]["bleu"] = scores["bleu"]; out[sec]["rouge_l_f"] = scores["rouge_l_f"]
+    return out
@@ -0,0 +1,90 @@
+# evalsuite/timing.py
+"""
+Per-stage wall-time accounting for main.run.
+
+score_case measures its stages (extract, match, overlap, sections, judge, plus the case
+total as "score") on every call -- a handful of perf_counter reads per case -- and only
+attaches them to the row as "_timings" when asked. The parent adds "judge" for async
+judging and "write" for the report/checkpoint writes, and StageTimings turns the samples
+into percentiles. Memory is bounded: each stage keeps count/sum/min/max exactly and a
+fixed-size uniform reservoir of samples for the percentiles, which are exact until a stage
+has more than `reservoir` cases and estimates after that.
+"""
+import json, math, os, random
+from typing import Any, Dict, List, Optional
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (q in 0..100)."""
+    if not sorted_vals:
+        return 0.0
+    k = max(1, math.ceil(q / 100.0 * len(sorted_vals)))
+    return sorted_vals[k - 1]
+
+class _Stage:
+    __slots__ = ("count", "total", "min", "max", "sample", "rng")
+
+    def __init__(self, seed: str):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sample: List[float] = []
+        self.rng = random.Random(seed)  # fixed seed: the same run gives the same estimates
+
+    def add(self, secs: float, size: int) -> None:
+        self.count += 1
+        self.total += secs
+        self.min = min(self.min, secs); self.max = max(self.max, secs)
+        if len(self.sample) < size:
+            self.sample.append(secs)
+        else:
+            j = self.rng.randrange(self.count)  # reservoir sampling (Algorithm R)
+            if j < size:
+                self.sample[j] = secs
+
+class StageTimings:
+    def __init__(self, cases_path: Optional[str] = None, reservoir: int = 4096):
+        self.reservoir = reservoir
+        self.stages: Dict[str, _Stage] = {}
+        self._f = open(cases_path, "w", encoding="utf-8") if cases_path else None
+
+    def add(self, cid: Any, timings: Dict[str, float]) -> None:
+        for stage, secs in timings.items():
+            st = self.stages.get(stage)
+            if st is None:
+                st = self.stages[stage] = _Stage(stage)
+            st.add(secs, self.reservoir)
+        if self._f:
+            rec = {"id": cid}
+            rec.update({f"{stage}_ms": round(secs * 1e3, 3) for stage, secs in timings.items()})
+            self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for stage, st in self.stages.items():
+            vals = sorted(st.sample)
+            out[stage] = {
+                "count": st.count,
+                "total_s": round(st.total, 6),
+                "mean_ms": round(1e3 * st.total / st.count, 3),
+                "min_ms": round(1e3 * st.min, 3),
+                "p50_ms": round(1e3 * percentile(vals, 50), 3),
+                "p95_ms": round(1e3 * percentile(vals, 95), 3),
+                "p99_ms": round(1e3 * percentile(vals, 99), 3),
+                "max_ms": round(1e3 * st.max, 3),
+                "percentiles": "exact" if st.count <= self.reservoir else f"reservoir of {self.reservoir}",
+            }
+        return out
+
+    def close(self) -> None:
+        if self._f:
+            self._f.close()
+            self._f = None
+
+def dump_profile(prof, out_dir: str, top: int = 25) -> str:
+    """Writes a cProfile run to <out>/profile.pstats and prints the top entries by cumulative time."""
+    import pstats
+    path = os.path.join(out_dir, "profile.pstats")
+    prof.dump_stats(path)
+    pstats.Stats(path).sort_stats("cumulative").print_stats(top)
+    return path
@@ -0,0 +1,163 @@
+# evalsuite/triage.py
+"""
+Tiered judging: deterministic scores decide which cases are worth an LLM-judge call.
+
+Every case is scored deterministically first. Triage.gate() then puts it in a tier:
+  risky      contradictions, hallucinations or missing facts at or above the rule
+             thresholds, or ROUGE-L below rouge_low
+  uncertain  ROUGE-L between rouge_low and rouge_high
+  clean      everything else
+Risky and uncertain cases are judged. Clean cases are judged only as part of a calibration
+slice, a deterministic fraction chosen by hashing the case id. A hard budget on calls,
+estimated prompt tokens or judging wall time stops further calls once it runs out. Budgeted
+cases are served first come, first served, in input order.
+
+TriageSummary reads the "triage" field of every written row. It reports tier sizes, judge
+coverage and an estimate of the judge averages over all cases: unjudged cases are imputed
+with the mean of the judged cases in their tier, falling back to all judged cases.
+"""
+import time
+from typing import Any, Dict, Optional, Tuple
+from .judge import _judge_content, estimate_tokens
+from .report import LLM_KEYS
+from .sampling import priority
+
+TIERS = ("risky", "uncertain", "clean")
+RULES = {"missing": 3, "hallucinated": 2, "contradictions": 1, "rouge_low": 0.4, "rouge_high": 0.8}
+
+def parse_rules(spec: Optional[str]) -> Dict[str, float]:
+    """"missing=2,rouge_low=0.3" -> RULES with those entries overridden."""
+    rules = dict(RULES)
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        k, _, v = part.partition("=")
+        k = k.strip()
+        if k not in RULES:
+            raise ValueError(f"unknown triage rule {k!r}; expected one of {list(RULES)}")
+        rules[k] = float(v)
+    return rules
+
+class Triage:
+    def __init__(self, rules: Optional[Dict[str, float]] = None, calibrate: float = 0.05, seed: int = 0,
+                 max_calls: Optional[int] = None, max_tokens: Optional[int] = None,
+                 max_seconds: Optional[float] = None, prompt_tokens: Optional[int] = None):
+        self.rules = dict(RULES, **(rules or {}))
+        self.calibrate, self.seed = calibrate, seed
+        self.max_calls, self.max_tokens, self.max_seconds = max_calls, max_tokens, max_seconds
+        self.prompt_tokens = prompt_tokens  # judge prompt budget, if prompts are compacted
+        self.calls = 0
+        self.tokens = 0
+        self._t0: Optional[float] = None
+        self.exhausted: Optional[str] = None
+
+    def tag(self) -> str:
+        """What the triage settings add to a case fingerprint (the budget is left out)."""
+        r = self.rules
+        return (f"triage:m{r['missing']:g}h{r['hallucinated']:g}c{r['contradictions']:g}"
+                f"r{r['rouge_low']:g}-{r['rouge_high']:g}k{self.calibrate:g}s{self.seed}")
+
+    def tier(self, row: Dict[str, Any]) -> Tuple[str, str]:
+        """(tier, reason) from a row's deterministic scores."""
+        r = self.rules
+        for field, rule in (("contradictions_count", "contradictions"), ("hallucinated_count", "hallucinated"),
+                            ("missing_count", "missing")):
+            if row.get(field, 0) >= r[rule]:
+                return "risky", rule
+        rouge = (row.get("text_overlap") or {}).get("rouge_l_f")
+        if rouge is None or rouge < r["rouge_low"]:
+            return "risky", "rouge"
+        if rouge < r["rouge_high"]:
+            return "uncertain", "rouge"
+        return "clean", "calibration"
+
+    def _budget_left(self, tokens: int) -> bool:
+        if self.exhausted:
+            return False
+        if self.max_calls is not None and self.calls + 1 > self.max_calls:
+            self.exhausted = "calls"
+        elif self.max_tokens is not None and self.tokens + tokens > self.max_tokens:
+            self.exhausted = "tokens"
+        elif self.max_seconds is not None and self._t0 is not None and time.perf_counter() - self._t0 > self.max_seconds:
+            self.exhausted = "seconds"
+        return not self.exhausted
+
+    def gate(self, ex: Dict[str, Any], row: Dict[str, Any]) -> bool:
+        """Whether to judge this case; records the decision in row["triage"]."""
+        tier, reason = self.tier(row)
+        want = tier != "clean" or priority(self.seed, f"calibrate|{row.get('id')}") < self.calibrate
+        judged = False
+        if want:
+            tokens = estimate_tokens(_judge_content(ex.get("transcript", ""), ex.get("generated_note", ""),
+                                                    ex.get("reference_note", "")))
+            if self.prompt_tokens is not None:
+                tokens = min(tokens, self.prompt_tokens)
+            if self._budget_left(tokens):
+                if self._t0 is None:
+                    self._t0 = time.perf_counter()
+                self.calls += 1; self.tokens += tokens
+                judged = True
+            else:
+                reason = f"budget:{self.exhausted}"
+        else:
+            reason = "skipped"
+        row["triage"] = {"tier": tier, "reason": reason, "judged": judged}
+        return judged
+
+    def describe(self) -> Dict[str, Any]:
+        return {"rules": self.rules, "calibrate": self.calibrate, "seed": self.seed,
+                "budget": {"max_calls": self.max_calls, "max_tokens": self.max_tokens, "max_seconds": self.max_seconds,
+                           "calls": self.calls, "prompt_tokens_est": self.tokens, "exhausted": self.exhausted}}
+
+class TriageSummary:
+    """Per-tier case counts and judge-score sums over the rows actually written."""
+
+    def __init__(self):
+        self.cases = {t: 0 for t in TIERS}
+        self.judged = {t: 0 for t in TIERS}
+        self.sums = {t: {k: 0.0 for k in LLM_KEYS} for t in TIERS}
+        self.counts = {t: {k: 0 for k in LLM_KEYS} for t in TIERS}
+
+    def add(self, row: Dict[str, Any]) -> None:
+        tri = row.get("triage")
+        if not tri:
+            return
+        t = tri["tier"]
+        self.cases[t] += 1
+        j = row.get("llm_judge")
+        if isinstance(j, dict):
+            self.judged[t] += 1
+            for k in LLM_KEYS:
+                x = j.get(k)
+                if x is not None:
+                    self.sums[t][k] += float(x); self.counts[t][k] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        total = sum(self.cases.values())
+        all_sum = {k: sum(self.sums[t][k] for t in TIERS) for k in LLM_KEYS}
+        all_cnt = {k: sum(self.counts[t][k] for t in TIERS) for k in LLM_KEYS}
+        tiers: Dict[str, Any] = {}
+        est_sum = {k: 0.0 for k in LLM_KEYS}
+        est_ok = {k: True for k in LLM_KEYS}
+        for t in TIERS:
+            out = {"cases": self.cases[t], "judged": self.judged[t]}
+            for k in LLM_KEYS:
+                n = self.counts[t][k]
+                mean = self.sums[t][k] / n if n else None
+                out[f"avg_llm_{k}"] = mean
+                # impute this tier's unscored cases with its own mean, else the overall judged mean
+                fill = mean if mean is not None else (all_sum[k] / all_cnt[k] if all_cnt[k] else None)
+                if fill is None:
+                    est_ok[k] = est_ok[k] and self.cases[t] == 0
+                    continue
+                est_sum[k] += self.sums[t][k] + (self.cases[t] - n) * fill
+            tiers[t] = out
+        judged = sum(self.judged.values())
+        return {
+            "num_cases": total,
+            "judged": judged,
+            "coverage": judged / total if total else None,
+            "tiers": tiers,
+            "estimated": {f"avg_llm_{k}": (est_sum[k] / total if total and est_ok[k] and all_cnt[k] else None)
+                          for k in LLM_KEYS},
+        }
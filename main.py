@@ -1,70 +1,439 @@
 # main.py
-import argparse, os, json
-from typing import Dict, Any, List
-from evalsuite.extractors import extract_all, Fact
-from evalsuite.metrics import find_missing, find_hallucinated, find_contradictions, prf1, bleu, rouge_l_f
-from evalsuite.report import write_per_case_jsonl, write_summary, write_dashboard
-from evalsuite.judge import judge_dispatch
+import argparse, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Iterable, Iterator, Optional, Tuple
+from evalsuite.extractors import extract_all, Fact, set_lexicon, active_lexicon
+from evalsuite.lexicon import load_lexicon
+from evalsuite.metrics import FactIndex, find_missing, find_hallucinated, find_contradictions, prf1
+from evalsuite.overlap import OverlapScorer
+from evalsuite.soap import section_metrics
+from evalsuite.report import BufferedReport, StreamingReport, DASHBOARD_MODES
+from evalsuite.judge import judge_dispatch, AsyncJudge, JudgeCache
+from evalsuite.cache import FactCache
+from evalsuite.checkpoint import Checkpoint, CheckpointMismatch
+from evalsuite.baseline import Baseline, DeltaReport, case_fingerprint
+from evalsuite.timing import StageTimings, dump_profile
+from evalsuite.columnar import ColumnarWriter, FORMATS as COLUMNAR_FORMATS
+from evalsuite.jsonl import COMPRESSED, JsonlIndex, iter_jsonl
+from evalsuite.sampling import ALLOCATIONS, SequentialStop, StratifiedSampler, metric_getter
+from evalsuite.triage import Triage, TriageSummary, parse_rules
+from evalsuite.prompt import JudgePrompt, PromptStats
 
 def to_fact(f: Fact) -> Dict[str, Any]:
-    return {"type": f.type, "key": f.key, "value": f.value, "negated": f.negated, "raw": f.raw}
+    return f.as_dict()
 
 def load_jsonl(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                yield json.loads(line)
+    return iter_jsonl(path)
 
-def run(input_path: str, out_dir: str, llm_backend: str = "none", llm_model: str = "", num_rows = None):
-    os.makedirs(out_dir, exist_ok=True)
-    rows: List[Dict[str, Any]] = []
-    idx = 0
-    n = None if num_rows is None else int(num_rows)
-    for ex in load_jsonl(input_path):
+# per process: token vocabulary + prepared-reference cache shared by BLEU and ROUGE-L
+_OVERLAP = OverlapScorer()
+
+def score_case(ex: Dict[str, Any], llm_backend: str = "none", llm_model: str = "",
+               fact_cache: Optional[str] = None, fact_cache_bytes: Optional[int] = None,
+               judge_cache: Optional[str] = None, judge_cache_bytes: Optional[int] = None,
+               judge_cache_age: Optional[float] = None, timings: bool = False,
+               judge_prompt_tokens: Optional[int] = None, sections: bool = False,
+               judge_evidence: bool = False) -> Dict[str, Any]:
+    """
+    Scores one input row. Top-level (and pure) so it can be shipped to worker processes.
+    Keys starting with "_" in the returned row are run-internal and never written out;
+    with timings=True "_timings" holds the seconds spent in each stage. With sections=True
+    the row also gets per S/O/A/P metrics under "sections". judge_evidence=True is for runs
+    that judge in the parent with a prompt budget: when the full prompt would not fit,
+    "_evidence" carries the transcript segments the budgeted prompt is built from.
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    cid = ex.get("id")
+    transcript = ex.get("transcript","")
+    note = ex.get("generated_note","")
+    reference = ex.get("reference_note","")
+
+    # transcripts and references repeat across note variants; the note itself rarely does
+    cached = FactCache.shared(fact_cache, fact_cache_bytes).extract if fact_cache else extract_all
+    tf = cached(transcript)
+    nf = extract_all(note)
+    rf = cached(reference)
+    t1 = clock()
+
+    missing = find_missing(tf, nf, note_index=FactIndex(nf))
+    halluc = find_hallucinated(tf, nf, transcript_index=FactIndex(tf))
+    contra = find_contradictions(nf)
+    ref_index = FactIndex(rf)
+    align = prf1(nf, rf, ref_index=ref_index)
+    t2 = clock()
+
+    overlap = _OVERLAP.score(note, reference)
+    t3 = clock()
+
+    # facts are placed in S/O/A/P by offset, so nothing is extracted twice
+    per_section = section_metrics(note, reference, missing, halluc, rf, ref_index, _OVERLAP) if sections else None
+    t3s = clock()
+
+    judged = None; cache_status = None; prompt_info = None; evidence = None
+    if judge_evidence and judge_prompt_tokens:
+        # this case's facts pick the transcript passages, so the parent need not re-extract them
+        prompt = JudgePrompt(judge_prompt_tokens)
+        if not prompt.fits(transcript, note, reference):
+            evidence = prompt.evidence_lines(transcript, note, (tf, missing, halluc))
+    if llm_backend.lower() != "none":
+        jc = JudgeCache.shared(judge_cache, judge_cache_bytes, judge_cache_age) if judge_cache else None
+        hits = jc.hits if jc else 0
+        prompt = JudgePrompt(judge_prompt_tokens) if judge_prompt_tokens else None
+        prompt_info = {} if prompt else None
+        # the prompt builder reuses this case's facts to pick transcript passages
+        judged = judge_dispatch(transcript, note, reference, backend=llm_backend, model_name=llm_model, cache=jc,
+                                prompt=prompt, facts=(tf, missing, halluc), info=prompt_info)
+        if jc:
+            cache_status = "hit" if jc.hits > hits else "miss"
+    t4 = clock()
+
+    row = {
+        "id": cid,
+        "missing_count": len(missing),
+        "hallucinated_count": len(halluc),
+        "contradictions_count": len(contra),
+        "missing": [to_fact(x) for x in missing],
+        "hallucinated": [to_fact(x) for x in halluc],
+        "contradictions": contra,
+        "ref_align": align,
+        "text_overlap": overlap,
+        "llm_judge": judged,
+        "fingerprint": ex.get("_fingerprint") or case_fingerprint(ex, llm_backend, llm_model, sections=sections),
+    }
+    if sections:
+        row["sections"] = per_section
+    if cache_status:
+        row["_judge_cache"] = cache_status
+    if prompt_info:
+        row["_judge_prompt"] = prompt_info
+    if evidence is not None:
+        row["_evidence"] = evidence
+    if timings:
+        row["_timings"] = {"extract": t1 - t0, "match": t2 - t1, "overlap": t3 - t2, "score": t4 - t0}
+        if sections:
+            row["_timings"]["sections"] = t3s - t3
+        if llm_backend.lower() != "none":
+            row["_timings"]["judge"] = t4 - t3s
+    return row
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for x in items:
+        batch.append(x)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_scored(examples: Iterable[Dict[str, Any]], workers: int = 1, chunksize: int = 16,
+                **score_kw) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Yields (example, scored row) in input order. With workers > 1 cases are sent to a process
+    pool in chunks; input is consumed one window at a time so the pool never holds the whole
+    file. Keyword arguments are forwarded to score_case.
+    """
+    score = partial(score_case, **score_kw)
+    if workers <= 1:
+        for ex in examples:
+            yield ex, score(ex)
+        return
+    # workers receive the already-built lexicon automaton instead of rebuilding it
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_lexicon, initargs=(active_lexicon(),)) as pool:
+        for window in _batched(examples, workers * chunksize * 4):
+            yield from zip(window, pool.map(score, window, chunksize=chunksize))
+
+def _take(examples: Iterable[Dict[str, Any]], n):
+    for idx, ex in enumerate(examples):
         if n is not None and idx >= n:
             break
-        if (idx + 1) % 100 == 0:
-            print(f"Processing {idx + 1} examples ...")
-        idx += 1
-        cid = ex.get("id")
-        transcript = ex.get("transcript","")
-        note = ex.get("generated_note","")
-        reference = ex.get("reference_note","")
-
-        tf = extract_all(transcript)
-        nf = extract_all(note)
-        rf = extract_all(reference)
-
-        missing = find_missing(tf, nf)
-        halluc = find_hallucinated(tf, nf)
-        contra = find_contradictions(nf)
-        align = prf1(nf, rf)
-        
-        bleu4 = bleu(note, reference, max_n=4)
-        rougeL = rouge_l_f(note, reference)
-
-        judged = None
-        if llm_backend.lower() != "none":
-            judged = judge_dispatch(transcript, note, reference, backend=llm_backend, model_name=llm_model)
-
-        rows.append({
-            "id": cid,
-            "missing_count": len(missing),
-            "hallucinated_count": len(halluc),
-            "contradictions_count": len(contra),
-            "missing": [to_fact(x) for x in missing],
-            "hallucinated": [to_fact(x) for x in halluc],
-            "contradictions": contra,
-            "ref_align": align,
-            "text_overlap": {"bleu": bleu4, "rouge_l_f": rougeL},
-            "llm_judge": judged,
-        })
-
-    write_per_case_jsonl(out_dir, rows)
-    summary = write_summary(out_dir, rows)
-    write_dashboard(out_dir, rows, summary)
+        yield ex
+
+def _select(input_path: str, n, start: int = 0, ids: Optional[List[str]] = None,
+            shard: Optional[Tuple[int, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    The examples a run covers: the first n rows (plain sequential read), or, with `start`/`ids`,
+    rows fetched straight from their byte offsets via the input's sidecar index. `shard`
+    (i, N), 1-based, keeps the i-th of N contiguous, near-equal slices of that selection.
+    """
+    if not start and ids is None and shard is None:
+        yield from _take(load_jsonl(input_path), n)
+        return
+    with JsonlIndex(input_path) as index:
+        yield from index.rows(_ordinals(index, n, start, ids, shard))
+
+def _ordinals(index: JsonlIndex, n, start: int = 0, ids: Optional[List[str]] = None,
+              shard: Optional[Tuple[int, int]] = None):
+    """Input positions of the rows _select() yields."""
+    if ids is not None:
+        ordinals = []
+        for cid in ids:
+            i = index.ordinal(cid)
+            if i is None:
+                sys.stderr.write(f"[input] id not found in {index.path}: {cid}\n")
+            else:
+                ordinals.append(i)
+    else:
+        ordinals = range(start, len(index))
+    if n is not None:
+        ordinals = ordinals[:n]
+    if shard is not None:
+        i, k = shard
+        ordinals = ordinals[(i - 1) * len(ordinals) // k:i * len(ordinals) // k]
+    return ordinals
+
+def _sampled(input_path: str, n, sampler: StratifiedSampler, order: str, start: int = 0,
+             ids: Optional[List[str]] = None, shard: Optional[Tuple[int, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    The rows `sampler` picks from the selection, in `order`. The sampling pass keeps only input
+    positions; the picked rows are re-read from their byte offsets as they are scored.
+    Compressed inputs have no random access, so there the sampler keeps the rows themselves.
+    """
+    if input_path.endswith(COMPRESSED):
+        yield from sampler.extend(_select(input_path, n, start=start, ids=ids, shard=shard)).sample(order=order)
+        return
+    with JsonlIndex(input_path) as index:
+        ordinals = _ordinals(index, n, start, ids, shard)
+        for i, ex in zip(ordinals, index.rows(ordinals)):
+            sampler.add(ex, item=i)
+        yield from index.rows(sampler.sample(order=order))
+
+def _judge_gated(pairs: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]], gate, llm_backend: str, llm_model: str,
+                 judge_cache: Optional[str] = None, judge_cache_bytes: Optional[int] = None,
+                 judge_cache_age: Optional[float] = None,
+                 prompt: Optional[JudgePrompt] = None) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Blocking judge calls, in the parent, for the cases `gate(ex, row)` lets through. The
+    prompt is built from the row's "_evidence", if scoring left one.
+    """
+    for ex, row in pairs:
+        evidence = row.pop("_evidence", None)
+        if gate(ex, row):
+            t0 = time.perf_counter()
+            jc = JudgeCache.shared(judge_cache, judge_cache_bytes, judge_cache_age) if judge_cache else None
+            hits = jc.hits if jc else 0
+            info = row["_judge_prompt"] = {} if prompt else None
+            row["llm_judge"] = judge_dispatch(ex.get("transcript", ""), ex.get("generated_note", ""),
+                                              ex.get("reference_note", ""), backend=llm_backend,
+                                              model_name=llm_model, cache=jc, prompt=prompt, info=info,
+                                              evidence=evidence)
+            if jc:
+                row["_judge_cache"] = "hit" if jc.hits > hits else "miss"
+            if "_timings" in row:
+                row["_timings"]["judge"] = time.perf_counter() - t0
+        yield ex, row
+
+def _pending(examples: Iterable[Dict[str, Any]], ckpt: Optional[Checkpoint], baseline: Optional[Baseline],
+             restored: "deque[Tuple[int, Any]]", llm_backend: str, llm_model: str,
+             judge_tag: str = "", sections: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Tags examples with their input ordinal and fingerprint. Cases already checkpointed with the
+    same fingerprint, or unchanged since the baseline run, are queued on `restored` as
+    (ordinal, row loader) instead.
+    """
+    for i, ex in enumerate(examples):
+        fp = case_fingerprint(ex, llm_backend, llm_model, judge_tag, sections=sections)
+        # a checkpointed row is reused only if it was scored from these exact inputs
+        if ckpt is not None and ckpt.done(i, ex.get("id"), fp):
+            restored.append((i, partial(ckpt.get, i)))
+            continue
+        if baseline is not None and fp in baseline.by_fp:
+            restored.append((i, partial(baseline.reuse, fp, ex.get("id"))))
+            continue
+        ex["_ordinal"] = i
+        ex["_fingerprint"] = fp
+        yield ex
+
+def run(input_path: str, out_dir: str, llm_backend: str = "none", llm_model: str = "", num_rows = None,
+        workers: int = 1, chunksize: int = 16, stream: bool = False,
+        fact_cache: Optional[str] = None, fact_cache_mb: Optional[float] = None, lexicon: Optional[str] = None,
+        judge_concurrency: int = 0, judge_rpm: Optional[float] = None, judge_tpm: Optional[float] = None,
+        judge_cache: Optional[str] = None, judge_cache_mb: Optional[float] = None,
+        judge_cache_days: Optional[float] = None, checkpoint_every: int = 0, resume: bool = False,
+        force: bool = False,
+        baseline: Optional[str] = None, timings: bool = False, timings_jsonl: bool = False, profile: bool = False,
+        dashboard: str = "table", columnar: Optional[str] = None, start: int = 0, ids: Optional[List[str]] = None,
+        shard: Optional[Tuple[int, int]] = None, sample: Optional[int] = None, sample_by: Tuple[str, ...] = (),
+        sample_seed: int = 0, sample_alloc: str = "proportional", until_ci: Optional[Dict[str, float]] = None,
+        until_ci_min: int = 30, triage: Optional[Triage] = None, judge_prompt_tokens: Optional[int] = None,
+        sections: bool = False):
+    os.makedirs(out_dir, exist_ok=True)
+    n = None if num_rows is None else int(num_rows)
+    # checkpointing (opt-in): finished rows are logged as we go; --resume replays them instead of
+    # rescoring. Settings are checked before anything is written to out_dir.
+    ckpt = None
+    if checkpoint_every > 0 or resume:
+        ckpt = Checkpoint(out_dir, every=checkpoint_every or 100)
+        config = {"input": os.path.abspath(input_path), "num_rows": n, "llm_backend": llm_backend, "llm_model": llm_model}
+        if start:
+            config["start"] = start
+        if ids is not None:
+            config["ids"] = list(ids)
+        if shard is not None:
+            config["shard"] = list(shard)
+        if triage is not None:
+            config["triage"] = triage.tag()
+        if judge_prompt_tokens:
+            config["judge_prompt"] = JudgePrompt(judge_prompt_tokens).tag()
+        if sections:
+            config["sections"] = True
+        if sample is not None or until_ci:
+            config["sample"] = {"n": sample, "by": list(sample_by), "seed": sample_seed,
+                                "allocation": sample_alloc, "until_ci": until_ci}
+        if resume:
+            loaded = ckpt.load()
+            ckpt.check(config, force=force)
+            print(f"Resuming: {loaded} cases already checkpointed")
+        ckpt.open(config, resume=resume)
+    prof = None
+    if profile:
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    started = time.perf_counter()
+    timings = timings or timings_jsonl
+    stage_timings = StageTimings(os.path.join(out_dir, "timings.jsonl") if timings_jsonl else None) if timings else None
+    if lexicon:
+        set_lexicon(load_lexicon(lexicon))
+    # --baseline: cases whose fingerprint is in the previous run are copied, not rescored. It is
+    # indexed before the report opens its files; a streamed run into the baseline dir truncates
+    # per_case.jsonl at once, so it reads the baseline rows from a snapshot
+    base = None
+    if baseline:
+        base = Baseline(baseline, snapshot=stream and os.path.realpath(baseline) == os.path.realpath(out_dir),
+                        judged=llm_backend.lower() != "none")
+    # --columnar: metric arrays + fact table next to per_case.jsonl; summary.json is reduced from them
+    cols = ColumnarWriter(out_dir, columnar) if columnar else None
+    if stream:
+        report = StreamingReport(out_dir, any_llm=llm_backend.lower() != "none", dashboard=dashboard, columnar=cols)
+    else:
+        report = BufferedReport(out_dir, dashboard=dashboard, columnar=cols)
+
+    # async judging happens here in the parent; workers then only do deterministic scoring
+    judge_cache_bytes = None if judge_cache_mb is None else int(judge_cache_mb * 2**20)
+    judge_cache_age = None if judge_cache_days is None else judge_cache_days * 86400.0
+    judge = None
+    prompt = JudgePrompt(judge_prompt_tokens) if judge_prompt_tokens else None
+    if llm_backend.lower() != "none" and judge_concurrency > 0:
+        judge = AsyncJudge(llm_backend, llm_model if llm_backend.lower() == "openrouter" else None,
+                           concurrency=judge_concurrency, rpm=judge_rpm, tpm=judge_tpm,
+                           cache=JudgeCache.shared(judge_cache, judge_cache_bytes, judge_cache_age) if judge_cache else None,
+                           prompt=prompt)
+    # --sample / --until-ci: one pass picks the sample; with --until-ci it is scored in priority
+    # order, so the run can stop at any point and still have scored a fair sample
+    stopper = SequentialStop(until_ci, min_cases=until_ci_min) if until_ci else None
+    sampler = None
+    if sample is not None or until_ci:
+        sampler = StratifiedSampler(sample, sample_by, seed=sample_seed, allocation=sample_alloc)
+        examples = _sampled(input_path, n, sampler, "random" if until_ci else "input",
+                            start=start, ids=ids, shard=shard)
+    else:
+        examples = _select(input_path, n, start=start, ids=ids, shard=shard)
+
+    delta = DeltaReport(base) if base else None
+    restored: "deque[Tuple[int, Any]]" = deque()
+    any_llm = llm_backend.lower() != "none"
+    triage = triage if any_llm else None
+    judge_tag = "|".join(t.tag() for t in (triage, prompt) if t is not None)
+    examples = _pending(examples, ckpt if resume else None, base, restored, llm_backend, llm_model, judge_tag,
+                        sections=sections)
+
+    # --judge-triage: workers score deterministically; the parent judges only the cases the triage picks
+    pairs = iter_scored(examples, workers=workers, chunksize=chunksize,
+                        llm_backend="none" if judge or triage else llm_backend, llm_model=llm_model,
+                        fact_cache=fact_cache,
+                        fact_cache_bytes=None if fact_cache_mb is None else int(fact_cache_mb * 2**20),
+                        judge_cache=judge_cache, judge_cache_bytes=judge_cache_bytes, judge_cache_age=judge_cache_age,
+                        timings=timings, judge_prompt_tokens=judge_prompt_tokens, sections=sections,
+                        judge_evidence=bool(judge or triage) and prompt is not None)
+    if judge:
+        pairs = judge.judge_in_order(pairs, want=triage.gate if triage else None)
+    elif triage:
+        pairs = _judge_gated(pairs, triage.gate, llm_backend, llm_model, judge_cache=judge_cache,
+                             judge_cache_bytes=judge_cache_bytes, judge_cache_age=judge_cache_age, prompt=prompt)
+    triage_summary = TriageSummary() if triage else None
+    prompt_stats = PromptStats(prompt.max_tokens) if prompt and any_llm else None
+    cache_counts = {"hit": 0, "miss": 0}
+
+    def emit(row: Dict[str, Any]) -> None:
+        if delta:
+            delta.add(row)
+        report.add(row)
+        if triage_summary is not None:
+            triage_summary.add(row)
+        if stopper is not None:
+            stopper.add(row)
+
+    try:
+        for idx, (ex, row) in enumerate(pairs):
+            if (idx + 1) % 100 == 0:
+                print(f"Processing {idx + 1} examples ...")
+            status = row.pop("_judge_cache", None)
+            if status:
+                cache_counts[status] += 1
+            info = row.pop("_judge_prompt", None)
+            if prompt_stats is not None:
+                prompt_stats.add(info)
+            stages = row.pop("_timings", None)
+            ordinal = ex["_ordinal"]
+            while restored and restored[0][0] < ordinal:
+                emit(restored.popleft()[1]())
+            t0 = time.perf_counter()
+            if ckpt:
+                ckpt.add(ordinal, row)
+            emit(row)
+            if stage_timings is not None:
+                stages["write"] = time.perf_counter() - t0
+                stage_timings.add(row.get("id"), stages)
+            if stopper is not None and stopper.done:
+                break
+        while restored and not (stopper is not None and stopper.done):
+            emit(restored.popleft()[1]())
+    finally:
+        if stopper is not None:
+            pairs.close()  # stopped early: drop the cases still in flight
+        if judge:
+            judge.close()
+        if ckpt:
+            ckpt.close()
+        if base:
+            base.close()
+        if stage_timings is not None:
+            stage_timings.close()
+
+    extra: Dict[str, Any] = {}
+    if judge_cache and llm_backend.lower() != "none":
+        extra["judge_cache"] = {"hits": cache_counts["hit"], "misses": cache_counts["miss"]}
+    if stage_timings is not None:
+        # wall_s covers everything up to the final report write
+        extra["timings"] = {"wall_s": round(time.perf_counter() - started, 6), "stages": stage_timings.summary()}
+    if shard is not None:
+        # lets tools/merge_shards.py check and order the pieces
+        extra["shard"] = {"index": shard[0], "count": shard[1], "input": os.path.abspath(input_path),
+                          "num_rows": n, "start": start, "ids": len(ids) if ids is not None else None}
+    if prompt_stats is not None:
+        extra["judge_prompt"] = prompt_stats.summary()
+    if triage is not None:
+        extra["judge_triage"] = dict(triage.describe(), **triage_summary.summary())
+    if sampler is not None:
+        extra["sample"] = sampler.describe(stopper.rows if stopper is not None else None)
+        if stopper is not None:
+            extra["sample"]["sequential"] = stopper.describe()
+    if delta:
+        extra["baseline"] = {"path": os.path.abspath(baseline), "reused": delta.reused, "rescored": delta.rescored}
+    summary = report.close(extra)
+    if delta:
+        d = delta.write(out_dir, summary)
+        print(f"Baseline: reused {d['reused']}, rescored {d['rescored']} ({len(d['new'])} new, {d['moved_count']} moved)")
+    if ckpt:
+        ckpt.close(remove=True)
     print(f"Wrote reports -> {out_dir}")
+    if prof:
+        prof.disable()
+        print(f"Profile -> {dump_profile(prof, out_dir)}")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
@@ -74,5 +443,125 @@ if __name__ == "__main__":
                     help="Select LLM-judge backend")
     ap.add_argument("--llm-model", default="x-ai/grok-4-fast:free", help="Model name for 'openrouter' backend")
     ap.add_argument("--num-rows", default=None, help="Give value to limit number of rows processed")
+    ap.add_argument("--workers", type=int, default=1, help="Score cases in a pool of N processes (1 = serial)")
+    ap.add_argument("--chunksize", type=int, default=16, help="Cases per task sent to each worker")
+    ap.add_argument("--stream", action="store_true",
+                    help="Write each case as soon as it is scored; memory stays flat in the number of rows")
+    ap.add_argument("--fact-cache", default=None,
+                    help="SQLite file caching transcript/reference facts across runs (shared by workers)")
+    ap.add_argument("--fact-cache-mb", type=float, default=None, help="Evict LRU facts beyond this size")
+    ap.add_argument("--lexicon", default=None,
+                    help="Diagnosis/symptom term list (.json or term<TAB>category lines); default: built-in terms")
+    ap.add_argument("--judge-concurrency", type=int, default=0,
+                    help="Judge through the async engine with up to N calls in flight (0 = one blocking call per case)")
+    ap.add_argument("--judge-rpm", type=float, default=None, help="Async judge: max requests per minute")
+    ap.add_argument("--judge-tpm", type=float, default=None, help="Async judge: max prompt tokens per minute")
+    ap.add_argument("--judge-cache", default=None,
+                    help="SQLite file caching judge replies by (backend, model, rubric, inputs)")
+    ap.add_argument("--judge-cache-mb", type=float, default=None, help="Evict LRU judge replies beyond this size")
+    ap.add_argument("--judge-cache-days", type=float, default=None, help="Ignore/evict replies unused for this long")
+    ap.add_argument("--checkpoint-every", type=int, default=0,
+                    help="Checkpoint finished cases every N rows (and every 30s), so --resume can pick up; 0 = off")
+    ap.add_argument("--resume", action="store_true",
+                    help="Reuse cases from an interrupted run's checkpoint in --out and score only the rest")
+    ap.add_argument("--force", action="store_true",
+                    help="With --resume, accept a checkpoint written with other settings; only rows whose "
+                         "inputs are unchanged are reused")
+    ap.add_argument("--baseline", default=None,
+                    help="Previous --out dir: copy unchanged cases from it, rescore the rest and write delta.json")
+    ap.add_argument("--timings", action="store_true",
+                    help="Record per-stage wall time per case; p50/p95/p99 go to summary.json")
+    ap.add_argument("--timings-jsonl", action="store_true", help="Also write each case's stage times to timings.jsonl")
+    ap.add_argument("--profile", action="store_true",
+                    help="cProfile the run (parent process only) into <out>/profile.pstats")
+    ap.add_argument("--dashboard", choices=DASHBOARD_MODES, default="table",
+                    help="compact: per-case metrics as columnar JSON with client-side paging/sorting and worst-N views")
+    ap.add_argument("--columnar", choices=COLUMNAR_FORMATS, default=None,
+                    help="Also write per-case metrics and facts as Parquet tables or .npy arrays")
+    ap.add_argument("--start", type=int, default=0,
+                    help="Skip to this row (0-based) via the input's byte-offset index; --num-rows counts from here")
+    ap.add_argument("--ids", default=None,
+                    help="Score only these case ids, in this order: comma-separated, or @file with one id per line")
+    ap.add_argument("--shard", default=None,
+                    help="i/N: score only the i-th (1-based) of N contiguous slices of the input; "
+                         "combine the outputs with tools/merge_shards.py")
+    ap.add_argument("--sample", type=int, default=None,
+                    help="Score a deterministic sample of N cases (bottom-k by hashed id), picked in one pass")
+    ap.add_argument("--sample-by", default="",
+                    help="Comma list of fields (top-level or meta, e.g. source,health_problem) to stratify --sample by")
+    ap.add_argument("--sample-seed", type=int, default=0, help="Seed for --sample / --until-ci")
+    ap.add_argument("--sample-alloc", choices=ALLOCATIONS, default="proportional",
+                    help="Split --sample across strata by stratum size or evenly")
+    ap.add_argument("--until-ci", default=None,
+                    help="metric=half_width,...: score the sample in random order and stop once every listed "
+                         "summary metric's 95%% CI half-width is at most its target (e.g. avg_ref_f1=0.02)")
+    ap.add_argument("--until-ci-min", type=int, default=30, help="Never stop --until-ci before this many cases")
+    ap.add_argument("--judge-prompt-tokens", type=int, default=None,
+                    help="Cap judge prompts at N estimated tokens: rubric as a fixed system prefix, the note in full, "
+                         "the transcript lines around missing/hallucinated/extracted facts, and the reference (cut if need be)")
+    ap.add_argument("--sections", action="store_true",
+                    help="Also score each SOAP section (S/O/A/P) separately: per-case under \"sections\", averaged in summary.json")
+    ap.add_argument("--judge-triage", action="store_true",
+                    help="Judge only cases the deterministic scores flag as risky/uncertain, plus a calibration slice")
+    ap.add_argument("--triage-rules", default=None,
+                    help="Override triage thresholds, e.g. missing=2,hallucinated=1,contradictions=1,rouge_low=0.4,rouge_high=0.8")
+    ap.add_argument("--triage-calibrate", type=float, default=0.05,
+                    help="Fraction of clean cases judged anyway, to estimate their scores")
+    ap.add_argument("--judge-max-calls", type=int, default=None, help="Triage budget: at most N judge calls")
+    ap.add_argument("--judge-max-tokens", type=int, default=None, help="Triage budget: at most N estimated prompt tokens")
+    ap.add_argument("--judge-max-seconds", type=float, default=None,
+                    help="Triage budget: stop calling the judge N seconds after the first call")
     args = ap.parse_args()
-    run(args.input, args.out, llm_backend=args.llm_judge, llm_model=args.llm_model, num_rows=args.num_rows)
+    shard = None
+    if args.shard:
+        i, k = (int(x) for x in args.shard.split("/"))
+        if not 1 <= i <= k:
+            ap.error(f"--shard {args.shard}: expected i/N with 1 <= i <= N")
+        shard = (i, k)
+    triage = None
+    budget = (args.judge_max_calls, args.judge_max_tokens, args.judge_max_seconds)
+    if args.judge_triage:
+        try:
+            rules = parse_rules(args.triage_rules)
+        except ValueError as e:
+            ap.error(f"--triage-rules: {e}")
+        triage = Triage(rules, calibrate=args.triage_calibrate, max_calls=budget[0], max_tokens=budget[1],
+                        max_seconds=budget[2], prompt_tokens=args.judge_prompt_tokens)
+    elif any(b is not None for b in budget) or args.triage_rules:
+        ap.error("--triage-rules and --judge-max-* need --judge-triage")
+    until_ci = None
+    if args.until_ci:
+        until_ci = {}
+        for part in args.until_ci.split(","):
+            m, _, t = part.partition("=")
+            try:
+                until_ci[m.strip()] = float(t)
+            except ValueError:
+                ap.error(f"--until-ci {args.until_ci}: expected metric=half_width pairs")
+            try:
+                metric_getter(m.strip())
+            except ValueError as e:
+                ap.error(f"--until-ci: {e}")
+    ids = None
+    if args.ids:
+        if args.ids.startswith("@"):
+            with open(args.ids[1:], "r", encoding="utf-8") as f:
+                ids = [line.strip() for line in f if line.strip()]
+        else:
+            ids = [x.strip() for x in args.ids.split(",") if x.strip()]
+    try:
+        run(args.input, args.out, llm_backend=args.llm_judge, llm_model=args.llm_model, num_rows=args.num_rows,
+            workers=args.workers, chunksize=args.chunksize, stream=args.stream,
+            fact_cache=args.fact_cache, fact_cache_mb=args.fact_cache_mb,
+            lexicon=args.lexicon, judge_concurrency=args.judge_concurrency,
+            judge_rpm=args.judge_rpm, judge_tpm=args.judge_tpm, judge_cache=args.judge_cache,
+            judge_cache_mb=args.judge_cache_mb, judge_cache_days=args.judge_cache_days,
+            checkpoint_every=args.checkpoint_every, resume=args.resume, force=args.force, baseline=args.baseline,
+            timings=args.timings, timings_jsonl=args.timings_jsonl, profile=args.profile,
+            dashboard=args.dashboard, columnar=args.columnar, start=args.start, ids=ids, shard=shard,
+            sample=args.sample, sample_by=tuple(x.strip() for x in args.sample_by.split(",") if x.strip()),
+            sample_seed=args.sample_seed, sample_alloc=args.sample_alloc, until_ci=until_ci,
+            until_ci_min=args.until_ci_min, triage=triage, judge_prompt_tokens=args.judge_prompt_tokens,
+            sections=args.sections)
+    except CheckpointMismatch as e:
+        ap.exit(2, f"[checkpoint] {e}\n")
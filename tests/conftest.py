@@ -0,0 +1,28 @@
+# tests/conftest.py
+import itertools, json, pathlib, sys
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+DATA = ROOT / "data"
+
+def data_rows(name: str, n: int):
+    """The first n rows of data/<name>.gen.jsonl, parsed."""
+    with open(DATA / f"{name}.gen.jsonl", "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in itertools.islice(f, n)]
+
+def write_jsonl(path, rows) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return str(path)
+
+def outputs(out_dir, files=("per_case.jsonl", "summary.csv")):
+    """What a run wrote that must not depend on how it ran: the given files' bytes and summary.json."""
+    out = {name: (pathlib.Path(out_dir) / name).read_bytes() for name in files}
+    out["summary.json"] = json.loads((pathlib.Path(out_dir) / "summary.json").read_text(encoding="utf-8"))
+    return out
+
+@pytest.fixture
+def mild_input(tmp_path):
+    return write_jsonl(tmp_path / "mild.jsonl", data_rows("adesouza_mild", 40))
@@ -0,0 +1,89 @@
+# tests/test_baseline.py
+import json
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+from evalsuite.triage import Triage
+
+def _counting(monkeypatch):
+    """Counts score_case calls, i.e. the cases a run did not take from its baseline."""
+    calls = []
+    score = main.score_case
+
+    def counted(ex, **kw):
+        calls.append(ex.get("id"))
+        return score(ex, **kw)
+
+    monkeypatch.setattr(main, "score_case", counted)
+    return calls
+
+def _without_baseline(out):
+    out["summary.json"].pop("baseline", None)
+    return out
+
+def _delta(out_dir):
+    with open(out_dir / "delta.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def test_unchanged_input_reuses_every_case(tmp_path, mild_input, monkeypatch):
+    main.run(mild_input, str(tmp_path / "base"))
+    calls = _counting(monkeypatch)
+    main.run(mild_input, str(tmp_path / "again"), baseline=str(tmp_path / "base"))
+    assert calls == []
+    assert _without_baseline(outputs(tmp_path / "again")) == outputs(tmp_path / "base")
+    d = _delta(tmp_path / "again")
+    assert (d["reused"], d["rescored"], d["new"], d["removed"], d["moved_count"]) == (40, 0, [], 0, 0)
+
+def test_changed_cases_are_rescored_and_match_a_clean_run(tmp_path, monkeypatch):
+    mild, spicy = data_rows("adesouza_mild", 45), data_rows("adesouza_spicy", 45)
+    main.run(write_jsonl(tmp_path / "old.jsonl", mild[:40]), str(tmp_path / "base"))
+    # 5 notes regenerated, rows 37-39 dropped, 5 new rows, and one unchanged case renamed
+    changed = (2, 8, 20, 21, 30)
+    assert all(mild[i]["generated_note"] != spicy[i]["generated_note"] for i in changed)
+    rows = [dict(ex, generated_note=spicy[i]["generated_note"]) if i in changed else ex
+            for i, ex in enumerate(mild[:37])] + mild[40:]
+    rows[0] = dict(rows[0], id="renamed")
+    path = write_jsonl(tmp_path / "new.jsonl", rows)
+    calls = _counting(monkeypatch)
+    main.run(path, str(tmp_path / "delta"), baseline=str(tmp_path / "base"))
+    assert sorted(calls) == sorted([mild[i]["id"] for i in changed] + [ex["id"] for ex in mild[40:]])
+    main.run(path, str(tmp_path / "clean"))
+    assert _without_baseline(outputs(tmp_path / "delta")) == outputs(tmp_path / "clean")
+    d = _delta(tmp_path / "delta")
+    assert (d["reused"], d["rescored"], d["removed"]) == (32, 10, 4)
+    assert d["new"] == [ex["id"] for ex in mild[40:]]
+    assert {m["id"] for m in d["moved"]} <= {mild[i]["id"] for i in changed} and d["moved_count"]
+
+def test_other_settings_are_not_reused(tmp_path, mild_input, monkeypatch):
+    main.run(mild_input, str(tmp_path / "base"))
+    calls = _counting(monkeypatch)
+    main.run(mild_input, str(tmp_path / "sections"), baseline=str(tmp_path / "base"), sections=True)
+    assert len(calls) == 40
+    assert _delta(tmp_path / "sections")["reused"] == 0
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_rerun_into_the_baseline_dir(tmp_path, mild_input, monkeypatch, stream):
+    main.run(mild_input, str(tmp_path / "clean"), stream=stream)
+    main.run(mild_input, str(tmp_path / "out"), stream=stream)
+    calls = _counting(monkeypatch)
+    main.run(mild_input, str(tmp_path / "out"), stream=stream, baseline=str(tmp_path / "out"))
+    assert calls == [] and _delta(tmp_path / "out")["reused"] == 40
+    assert _without_baseline(outputs(tmp_path / "out")) == outputs(tmp_path / "clean")
+
+def test_failed_judge_calls_are_retried(tmp_path, mild_input, monkeypatch):
+    # no API key: every judge call fails and leaves llm_judge empty
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    main.run(mild_input, str(tmp_path / "base"), llm_backend="openai")
+    calls = _counting(monkeypatch)
+    main.run(mild_input, str(tmp_path / "again"), llm_backend="openai", baseline=str(tmp_path / "base"))
+    assert len(calls) == 40 and _delta(tmp_path / "again")["reused"] == 0
+    # ...but cases the triage left unjudged on purpose are reused
+    main.run(mild_input, str(tmp_path / "tri"), llm_backend="openai", triage=Triage(calibrate=0.0))
+    skipped = {r["id"] for r in map(json.loads, outputs(tmp_path / "tri")["per_case.jsonl"].splitlines())
+               if r["triage"]["reason"] == "skipped"}
+    assert skipped
+    calls.clear()
+    main.run(mild_input, str(tmp_path / "tri2"), llm_backend="openai", triage=Triage(calibrate=0.0),
+             baseline=str(tmp_path / "tri"))
+    assert set(calls) == {ex["id"] for ex in data_rows("adesouza_mild", 40)} - skipped
@@ -0,0 +1,129 @@
+# tests/test_cache.py
+import json, multiprocessing
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+import evalsuite.cache
+from evalsuite.cache import DiskCache, FactCache, content_key
+from evalsuite.extractors import extract_all, rules_version
+from evalsuite.metrics import find_hallucinated, find_missing, prf1
+
+class Clock:
+    def __init__(self, t=1_000_000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(evalsuite.cache.time, "time", c)
+    return c
+
+def _accessed(cache, key):
+    return cache._db.execute("SELECT accessed FROM entries WHERE key = ?", (key,)).fetchone()[0]
+
+def test_hits_refresh_access_time_only_when_stale(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "c.db"))
+    cache.put("k", b"v")
+    clock.t += 60
+    assert cache.get("k") == b"v" and _accessed(cache, "k") == 1_000_000.0
+    clock.t += DiskCache.TOUCH_AFTER
+    assert cache.get("k") == b"v" and _accessed(cache, "k") == clock.t
+    # with max_age the refresh comes sooner, so a read entry never looks older than it is by much
+    aged = DiskCache(str(tmp_path / "aged.db"), max_age=100)
+    aged.put("k", b"v")
+    clock.t += 11
+    assert aged.get("k") == b"v" and _accessed(aged, "k") == clock.t
+
+def test_fact_cache_round_trip(tmp_path):
+    cache = FactCache(str(tmp_path / "facts.db"))
+    rows = data_rows("adesouza_spicy", 40)
+    texts = [ex["transcript"] for ex in rows] + [ex["reference_note"] for ex in rows] + ["", "BP 12O/80, T 38.5 C", "BP: 120/80. Temp 101 F. HR 88 bpm."]
+    fresh = [extract_all(t) for t in texts]
+    assert [cache.extract(t) for t in texts] == fresh  # misses: extracted and stored
+    hits = cache.hits
+    cached = [cache.extract(t) for t in texts]
+    assert cache.hits - hits == len(texts)
+    assert cached == fresh
+    assert [[f.start for f in fs] for fs in cached] == [[f.start for f in fs] for fs in fresh]
+    # cached vitals come back without their parsed number; matching re-parses it from the value
+    assert any(f.num is not None for fs in fresh for f in fs)
+    assert all(f.num is None for fs in cached for f in fs)
+    for ex, tf, rf in zip(rows, cached, cached[len(rows):]):
+        nf = extract_all(ex["generated_note"])
+        tf0, rf0 = extract_all(ex["transcript"]), extract_all(ex["reference_note"])
+        assert find_missing(tf, nf) == find_missing(tf0, nf)
+        assert find_hallucinated(tf, nf) == find_hallucinated(tf0, nf)
+        assert prf1(nf, rf) == prf1(nf, rf0)
+    vitals = extract_all("bp 120/80, temp 101.2 f, hr 90")
+    assert find_missing(cached[-1], vitals) == find_missing(fresh[-1], vitals)
+
+def test_fact_cache_reads_entries_without_offsets(tmp_path):
+    cache = FactCache(str(tmp_path / "facts.db"))
+    text = "Patient denies chest pain. BP 120/80."
+    old = [[f.type, f.key, f.value, f.negated, f.raw] for f in extract_all(text)]
+    cache.put(content_key(rules_version(), text), json.dumps(old).encode("utf-8"))
+    facts = cache.extract(text)
+    assert facts == extract_all(text) and all(f.start is None for f in facts)
+
+def test_size_eviction_drops_least_recently_used(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "c.db"))
+    for i in range(10):
+        cache.put(f"k{i}", b"x" * 100)
+        clock.t += 1
+    clock.t += DiskCache.TOUCH_AFTER + 1
+    assert cache.get("k0") == b"x" * 100  # now the most recently used
+    assert cache.evict(max_bytes=600) == 5  # down to 90% of the limit
+    assert [k for k in (f"k{i}" for i in range(10)) if cache.get(k) is not None] == ["k0", "k6", "k7", "k8", "k9"]
+    assert cache.stats()["bytes"] == 500
+
+def test_puts_evict_to_max_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(DiskCache, "EVICT_EVERY", 4)
+    cache = DiskCache(str(tmp_path / "c.db"), max_bytes=1000)
+    for i in range(100):
+        cache.put(f"k{i}", b"x" * 100)
+    assert cache.stats()["bytes"] <= 1000 + 4 * 100
+    assert cache.get("k99") is not None and cache.get("k0") is None
+
+def _fill(path, start):
+    cache = FactCache(path, max_bytes=None)
+    for ex in data_rows("adesouza_mild", 60)[start::2]:
+        cache.extract(ex["transcript"])
+    return cache.misses
+
+def test_concurrent_processes_share_one_cache(tmp_path):
+    path = str(tmp_path / "facts.db")
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(4) as pool:
+        pool.starmap(_fill, [(path, 0), (path, 1), (path, 0), (path, 1)])
+    cache = FactCache(path)
+    assert cache.stats()["entries"] == len({ex["transcript"] for ex in data_rows("adesouza_mild", 60)})
+    for ex in data_rows("adesouza_mild", 60):
+        assert cache.extract(ex["transcript"]) == extract_all(ex["transcript"])
+    assert cache.misses == 0
+
+def test_runs_with_a_fact_cache_only_extract_notes(tmp_path, mild_input, monkeypatch):
+    main.run(mild_input, str(tmp_path / "plain"))
+    db = str(tmp_path / "facts.db")
+    main.run(mild_input, str(tmp_path / "first"), fact_cache=db, workers=2, chunksize=4)
+    calls = []
+    monkeypatch.setattr(evalsuite.cache, "extract_all", lambda text: calls.append(text) or extract_all(text))
+    spicy = write_jsonl(tmp_path / "spicy.jsonl", data_rows("adesouza_spicy", 40))
+    main.run(spicy, str(tmp_path / "spicy"), fact_cache=db)
+    assert calls == []  # spicy shares its transcripts and references with mild
+    main.run(spicy, str(tmp_path / "spicy_plain"))
+    assert outputs(tmp_path / "first") == outputs(tmp_path / "plain")
+    assert outputs(tmp_path / "spicy") == outputs(tmp_path / "spicy_plain")
+
+def test_age_eviction(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "c.db"), max_age=1000)
+    cache.put("old", b"1")
+    clock.t += 600
+    cache.put("new", b"2")
+    clock.t += 500
+    assert cache.get("old") is None and cache.get("new") == b"2"  # stale entries read as misses
+    assert cache.evict() == 1 and cache.stats()["entries"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,98 @@
+# tests/test_checkpoint.py
+import json, os
+import pytest
+import main
+from conftest import data_rows, outputs, write_jsonl
+from evalsuite.checkpoint import Checkpoint, CheckpointMismatch
+
+class Crash(Exception):
+    pass
+
+def _crash_after(monkeypatch, n):
+    """Makes the report raise on the n+1-th row, after that row has been checkpointed."""
+    real = main.BufferedReport.add
+    seen = []
+
+    def add(self, row):
+        if len(seen) >= n:
+            raise Crash()
+        seen.append(row["id"])
+        real(self, row)
+
+    monkeypatch.setattr(main.BufferedReport, "add", add)
+
+def test_checkpointing_is_off_by_default(tmp_path, mild_input):
+    main.run(mild_input, str(tmp_path / "out"))
+    assert not (tmp_path / "out" / ".checkpoint").exists()
+
+def test_resume_equals_clean_run(tmp_path, monkeypatch, mild_input):
+    main.run(mild_input, str(tmp_path / "clean"))
+    out = str(tmp_path / "out")
+    with monkeypatch.context() as m:
+        _crash_after(m, 25)
+        with pytest.raises(Crash):
+            main.run(mild_input, out, checkpoint_every=10)
+    state = json.loads((tmp_path / "out" / ".checkpoint" / "state.json").read_text())
+    assert state["rows"] == 26 and state["last_ordinal"] == 25
+    scored = []
+    real = main.score_case
+    monkeypatch.setattr(main, "score_case", lambda ex, **kw: scored.append(ex["id"]) or real(ex, **kw))
+    main.run(mild_input, out, checkpoint_every=10, resume=True)
+    assert len(scored) == 40 - 26
+    assert outputs(out) == outputs(tmp_path / "clean")
+    assert not (tmp_path / "out" / ".checkpoint").exists()
+
+def test_resume_with_other_settings_fails(tmp_path, monkeypatch, mild_input):
+    spicy = write_jsonl(tmp_path / "spicy.jsonl", data_rows("adesouza_spicy", 40))
+    out = str(tmp_path / "out")
+    with monkeypatch.context() as m:
+        _crash_after(m, 30)
+        with pytest.raises(Crash):
+            main.run(spicy, out, checkpoint_every=10)
+    with pytest.raises(CheckpointMismatch, match="input"):
+        main.run(mild_input, out, resume=True)
+    # --force reuses only the rows whose fingerprint still matches; changed notes are rescored
+    main.run(mild_input, out, resume=True, force=True)
+    main.run(mild_input, str(tmp_path / "clean"))
+    assert outputs(out) == outputs(tmp_path / "clean")
+
+def test_stale_rows_in_place_are_rescored(tmp_path, monkeypatch):
+    path = tmp_path / "in.jsonl"
+    write_jsonl(path, data_rows("adesouza_spicy", 40))
+    out = str(tmp_path / "out")
+    with monkeypatch.context() as m:
+        _crash_after(m, 30)
+        with pytest.raises(Crash):
+            main.run(str(path), out, checkpoint_every=10)
+    # same path and ids, other notes: settings match, fingerprints do not
+    write_jsonl(path, data_rows("adesouza_mild", 40))
+    main.run(str(path), out, resume=True)
+    main.run(str(path), str(tmp_path / "clean"))
+    assert outputs(out) == outputs(tmp_path / "clean")
+
+def test_writer_keeps_no_per_row_index(tmp_path):
+    ck = Checkpoint(str(tmp_path), every=1000)
+    ck.open({"input": "x"})
+    for i in range(500):
+        ck.add(i, {"id": f"c{i}", "fingerprint": f"f{i}"})
+    assert ck._offsets == {} and ck.rows == 500
+    ck.close()
+    back = Checkpoint(str(tmp_path))
+    assert back.load() == 500
+    assert back.done(7, "c7", "f7") and not back.done(7, "c7", "other") and not back.done(7, "c8", "f7")
+    assert back.get(499) == {"id": "c499", "fingerprint": "f499"}
+    back.close()
+
+def test_uncommitted_tail_is_dropped(tmp_path):
+    ck = Checkpoint(str(tmp_path), every=1000, interval=1e9)
+    ck.open({})
+    for i in range(3):
+        ck.add(i, {"id": i})
+    ck.commit()
+    ck.add(3, {"id": 3})
+    ck._f.write(b'{"i": 4, "id"')  # half-written line from a crash
+    ck._f.flush()
+    back = Checkpoint(str(tmp_path))
+    assert back.load() == 3
+    assert os.path.getsize(back.rows_path) == json.load(open(back.state_path))["bytes"]
+    back.close(); ck._f.close()
@@ -0,0 +1,91 @@
+# tests/test_columnar.py
+import json, os
+import pytest
+import main
+from evalsuite.columnar import ColumnarWriter, StringColumn, _encode_strings, load_cases, load_facts
+
+pytest.importorskip("numpy")
+
+def _row(i, raw="bp 120/80"):
+    return {"id": f"c{i}", "missing_count": 1, "hallucinated_count": 0, "contradictions_count": 0,
+            "missing": [{"type": "vital", "key": "bp", "value": "120/80", "negated": False, "raw": raw}],
+            "hallucinated": [], "contradictions": [],
+            "ref_align": {"precision": 0.1 * (i % 7), "recall": 1 / 3, "f1": 0.3},
+            "text_overlap": {"bleu": 0.1 + i / 7, "rouge_l_f": 0.2,
+                             "bleu_stats": {"match": [3, 2, 1, 0], "total": [4, 3, 2, 1], "cand_len": 4, "ref_len": 5}},
+            "llm_judge": None}
+
+def _approx_floats(summary):
+    # numpy's pairwise sums may differ from the exact JSON-only sums in the last bit
+    return {k: pytest.approx(v, rel=1e-12) if isinstance(v, float) else v for k, v in summary.items()}
+
+@pytest.mark.parametrize("fmt", ["npy", "parquet"])
+def test_summary_matches_json_only_run(tmp_path, mild_input, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    main.run(mild_input, str(tmp_path / "plain"))
+    main.run(mild_input, str(tmp_path / "cols"), columnar=fmt)
+    a = json.loads((tmp_path / "plain" / "summary.json").read_text())
+    b = json.loads((tmp_path / "cols" / "summary.json").read_text())
+    assert b == _approx_floats(a)
+    cases = load_cases(str(tmp_path / "cols"))
+    ids = [json.loads(line)["id"] for line in (tmp_path / "plain" / "per_case.jsonl").read_text().splitlines()]
+    assert list(cases["id"]) == ids
+
+def test_npy_strings_are_not_padded(tmp_path):
+    long_raw = "x" * 100_000
+    w = ColumnarWriter(str(tmp_path), "npy")
+    for i in range(200):
+        w.add(_row(i, raw=long_raw if i == 0 else "bp 120/80"))
+    w.close()
+    data = tmp_path / "facts" / "raw.data.npy"
+    assert os.path.getsize(data) < len(long_raw) + 199 * 20 + 1024
+    facts = load_facts(str(tmp_path))
+    assert facts["raw"][0] == long_raw and facts["raw"][1] == "bp 120/80"
+    assert list(facts["case"]) == list(range(200)) and set(facts["kind"]) == {"missing"}
+    assert list(load_cases(str(tmp_path))["id"]) == [f"c{i}" for i in range(200)]
+
+def test_parquet_strings_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    w = ColumnarWriter(str(tmp_path), "parquet")
+    for i in range(50):
+        w.add(_row(i, raw="é" * (i + 1)))
+    w.close()
+    assert str(pq.read_schema(tmp_path / "facts.parquet").field("raw").type) == "string"
+    facts = load_facts(str(tmp_path))
+    assert [len(x) for x in facts["raw"]] == list(range(1, 51))
+
+def test_string_column_decodes_on_access():
+    import numpy as np
+    values = ["", "bp 120/80", "é" * 3, "x" * 1000, "日本"]
+    col = StringColumn(*_encode_strings(np, values))
+    assert len(col) == 5 and list(col) == values
+    assert col[2] == values[2] and col[-1] == "日本" and col[1:4] == values[1:4]
+    assert list(np.asarray(col)) == values and col.to_numpy().dtype == object
+    with pytest.raises(IndexError):
+        col[5]
+
+@pytest.mark.parametrize("fmt", ["npy", "parquet"])
+def test_blocks_are_written_as_they_fill(tmp_path, monkeypatch, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    import numpy as np
+    (tmp_path / "whole").mkdir(); (tmp_path / "blocks").mkdir()
+    whole = ColumnarWriter(str(tmp_path / "whole"), fmt)
+    monkeypatch.setattr(ColumnarWriter, "BLOCK", 7)
+    blocks = ColumnarWriter(str(tmp_path / "blocks"), fmt)
+    raw = "é" * 300
+    for i in range(50):
+        whole.add(_row(i, raw=raw)); blocks.add(_row(i, raw=raw))
+    if fmt == "npy":
+        # seven blocks of facts are on disk before close()
+        assert os.path.getsize(tmp_path / "blocks" / "facts" / "raw.data.npy") >= 49 * len(raw.encode())
+    assert blocks.close() == whole.close()
+    for load in (load_cases, load_facts):
+        a, b = load(str(tmp_path / "whole")), load(str(tmp_path / "blocks"))
+        assert a.keys() == b.keys()
+        for k in a:
+            assert list(map(str, np.asarray(a[k]))) == list(map(str, np.asarray(b[k]))), k  # NaN != NaN
+    if fmt == "npy":
+        assert np.load(tmp_path / "blocks" / "facts" / "case.npy").tolist() == list(range(50))
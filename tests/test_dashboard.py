@@ -0,0 +1,68 @@
+# tests/test_dashboard.py
+import json, os, re
+
+from conftest import data_rows, write_jsonl
+import main
+from evalsuite.report import CompactDashboard, SummaryAccumulator, csv_columns, csv_row
+
+def _payload(out_dir):
+    html = (out_dir / "dashboard.html").read_text(encoding="utf-8")
+    m = re.search(r'<script type="application/json" id="evals-data">(.*?)</script>', html, re.S)
+    return json.loads(m.group(1))
+
+def _summary(rows):
+    acc = SummaryAccumulator()
+    for r in rows:
+        acc.add(r)
+    return acc.summary()
+
+def _worst(values, higher_worse, n):
+    """The worst n rows by a full sort: worst value first, earlier row first on ties."""
+    seen = [(v if higher_worse else -v, i) for i, v in enumerate(values) if v is not None]
+    return [i for _, i in sorted(seen, key=lambda t: (-t[0], t[1]))[:n]]
+
+def test_payload_holds_every_case_once(tmp_path):
+    rows = data_rows("adesouza_spicy", 300)
+    main.run(write_jsonl(tmp_path / "in.jsonl", rows), str(tmp_path / "out"), dashboard="compact")
+    scored = [json.loads(line) for line in (tmp_path / "out" / "per_case.jsonl").read_text().splitlines()]
+    p = _payload(tmp_path / "out")
+    assert p["cols"] == csv_columns(False) and p["n"] == 300
+    table = [csv_row(r, False) for r in scored]
+    for k, col in enumerate(p["cols"]):
+        assert p["data"][col] == [round(r[k], 4) if isinstance(r[k], float) else r[k] for r in table]
+    for col, higher_worse in CompactDashboard.WORST.items():
+        if col in p["cols"]:
+            k = p["cols"].index(col)
+            assert p["worst"][col] == _worst([r[k] for r in table], higher_worse, 25), col
+
+def test_heaps_equal_full_sort_with_ties_and_gaps(tmp_path):
+    dash = CompactDashboard(str(tmp_path), any_llm=True, worst_n=7)
+    rows = []
+    for i in range(200):
+        r = main.score_case({"id": f"c{i}", "transcript": "", "generated_note": "", "reference_note": ""})
+        r.update(missing_count=i % 5, ref_align=dict(r["ref_align"], f1=(i * 37 % 11) / 10),
+                 llm_judge=None if i % 3 else {"completeness": i % 4 + 1, "grounding": 3, "clinical_accuracy": 5})
+        rows.append(r); dash.add(r)
+    dash.write(_summary(rows))
+    p = _payload(tmp_path)
+    table = [csv_row(r, True) for r in rows]
+    for col, higher_worse in CompactDashboard.WORST.items():
+        k = p["cols"].index(col)
+        assert p["worst"][col] == _worst([r[k] for r in table], higher_worse, 7), col
+
+def test_ids_cannot_close_the_script(tmp_path):
+    dash = CompactDashboard(str(tmp_path))
+    r = main.score_case({"id": "</script><b>x", "transcript": "", "generated_note": "", "reference_note": ""})
+    dash.add(r)
+    dash.write(_summary([r]))
+    assert _payload(tmp_path)["data"]["id"] == ["</script><b>x"]
+
+def test_compact_page_grows_gently(tmp_path):
+    sizes = {}
+    for n in (50, 300):
+        path = write_jsonl(tmp_path / f"in{n}.jsonl", data_rows("adesouza_mild", n))
+        for mode in ("table", "compact"):
+            main.run(path, str(tmp_path / f"{mode}{n}"), dashboard=mode)
+            sizes[mode, n] = os.path.getsize(tmp_path / f"{mode}{n}" / "dashboard.html")
+    per_case = (sizes["compact", 300] - sizes["compact", 50]) / 250
+    assert per_case < 120 and per_case < (sizes["table", 300] - sizes["table", 50]) / 250 / 3
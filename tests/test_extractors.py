@@ -0,0 +1,36 @@
+# tests/test_extractors.py
+import pickle
+import pytest
+from dataclasses import FrozenInstanceError
+from evalsuite.extractors import Fact, extract_all, extract_diags_symptoms, extract_vitals
+
+def test_offsets_point_into_original_text_when_lowercasing_changes_length():
+    text = "İİİ Patient with fever. BP 120/80, HR 88."
+    assert len(text.lower()) != len(text)
+    facts = {f.key: f for f in extract_all(text)}
+    for key, word in (("fever", "fever"), ("bp", "BP 120/80"), ("hr", "HR 88")):
+        f = facts[key]
+        assert text[f.start:f.start + len(word)] == word
+        assert f.raw == word.lower()
+
+def test_offsets_and_raw_for_ascii_text():
+    text = "Denies Chest Pain. Temp 101.2 F"
+    diag = extract_diags_symptoms(text)[0]
+    assert (diag.key, diag.value, diag.negated, diag.raw) == ("chest pain", "absent", True, "chest pain")
+    assert text[diag.start:diag.start + 10] == "Chest Pain"
+    vital = extract_vitals(text)[0]
+    assert vital.raw == "temp 101.2 f" and text[vital.start:].startswith("Temp")
+
+def test_lazy_raw_does_not_hold_the_lowered_copy():
+    text = "Patient has a cough. BP 130/85."
+    for f in extract_all(text):
+        assert f._raw.__class__ is tuple and f._raw[0] is text
+
+def test_fact_is_frozen_hashable_and_pickles():
+    f = extract_vitals("bp 120/80")[0]
+    with pytest.raises(FrozenInstanceError):
+        f.value = "x"
+    g = pickle.loads(pickle.dumps(f))
+    assert g == f and hash(g) == hash(f) and g.start == f.start and g.num == (120.0, 80.0)
+    assert f == Fact("vital", "bp", "120/80", False, "bp 120/80")
+    assert f.as_dict() == {"type": "vital", "key": "bp", "value": "120/80", "negated": False, "raw": "bp 120/80"}
@@ -0,0 +1,116 @@
+# tests/test_fake_judge.py
+import json, random, subprocess, sys, urllib.error, urllib.request
+import pytest
+
+from conftest import ROOT, data_rows, write_jsonl
+from evalsuite.judge import _safe_parse_json
+from tools.fake_judge import MALFORMED_KINDS, FakeJudgeServer, _scores, latency_sampler, reply_text
+
+def _post(url, body, path="/chat/completions"):
+    req = urllib.request.Request(url + path, data=json.dumps(body).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, dict(resp.headers), json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+def _get(url, path):
+    try:
+        with urllib.request.urlopen(url + path, timeout=10) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def _body(i):
+    return {"model": "fake", "messages": [{"role": "user", "content": f"case {i}"}]}
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert latency_sampler("const:0.25", rng)() == 0.25
+    assert latency_sampler("", rng)() == 0.0
+    assert all(0.1 <= latency_sampler("uniform:0.1,0.2", rng)() <= 0.2 for _ in range(100))
+    draws = [latency_sampler("exp:0.5", rng)() for _ in range(4000)]
+    assert min(draws) >= 0 and 0.45 < sum(draws) / len(draws) < 0.55
+    draws = sorted(latency_sampler("lognormal:0.3,0.5", rng)() for _ in range(4001))
+    assert 0.27 < draws[2000] < 0.33  # the median
+    a, b = latency_sampler("exp:1", random.Random(5)), latency_sampler("exp:1", random.Random(5))
+    assert [a() for _ in range(10)] == [b() for _ in range(10)]
+    with pytest.raises(ValueError, match="unknown latency spec"):
+        latency_sampler("gamma:1,2", rng)
+
+def test_malformed_replies_parse_like_the_real_judge_would():
+    scores = _scores(b"some request")
+    assert set(scores) == {"completeness", "grounding", "clinical_accuracy", "rationale"}
+    assert all(1 <= scores[k] <= 5 for k in ("completeness", "grounding", "clinical_accuracy"))
+    assert _safe_parse_json(reply_text(scores)) == scores
+    assert _safe_parse_json(reply_text(scores, "wrapped")) == scores
+    assert _safe_parse_json(reply_text(scores, "prose")) is None
+    assert _safe_parse_json(reply_text(scores, "truncated")) is None
+    assert MALFORMED_KINDS == ("wrapped", "prose", "truncated")
+
+def test_scores_are_a_function_of_the_request():
+    with FakeJudgeServer() as srv:
+        replies = [_post(srv.url, _body(i))[2]["choices"][0]["message"]["content"] for i in (0, 1, 0)]
+        assert _post(srv.url, _body(1), "/v1/chat/completions")[2]["choices"][0]["message"]["content"] == replies[1]
+    assert replies[0] == replies[2] == json.dumps(_scores(json.dumps(_body(0)).encode("utf-8")))
+
+def _served(n, **faults):
+    with FakeJudgeServer(**faults) as srv:
+        statuses = [_post(srv.url, _body(i))[0] for i in range(n)]
+        return statuses, srv.stats
+
+def test_fault_rates_are_seeded():
+    statuses, stats = _served(400, p429=0.2, p5xx=0.1, malformed=0.15, seed=7)
+    assert (statuses, stats) == _served(400, p429=0.2, p5xx=0.1, malformed=0.15, seed=7)
+    assert statuses != _served(400, p429=0.2, p5xx=0.1, malformed=0.15, seed=8)[0]
+    assert stats["requests"] == 400 == sum(v for k, v in stats.items() if k != "requests")
+    assert statuses.count(429) == stats["429"] and 50 < stats["429"] < 110
+    assert sum(s >= 500 for s in statuses) == stats["5xx"] and 20 < stats["5xx"] < 65
+    assert set(statuses) <= {200, 429, 500, 502, 503}
+    malformed = sum(stats[f"malformed_{k}"] for k in MALFORMED_KINDS)
+    assert statuses.count(200) == stats["ok"] + malformed and 35 < malformed < 90
+    assert all(stats[f"malformed_{k}"] > 0 for k in MALFORMED_KINDS)
+
+def test_retry_after_header_stats_and_unknown_paths():
+    with FakeJudgeServer(p429=1.0, retry_after=0.5) as srv:
+        status, headers, body = _post(srv.url, _body(0))
+        assert status == 429 and headers["Retry-After"] == "0.5" and "error" in body
+        assert _post(srv.url, _body(0), "/v1/completions")[0] == 404
+        assert _get(srv.url, "/nothing")[0] == 404
+        status, stats = _get(srv.url, "/stats/")
+        assert status == 200 and (stats["requests"], stats["429"], stats["ok"]) == (1, 1, 0)
+    with FakeJudgeServer(p429=1.0) as srv:
+        assert "Retry-After" not in _post(srv.url, _body(0))[1]
+
+def _bench(tmp_path, *args):
+    path = write_jsonl(tmp_path / "cases.jsonl", data_rows("adesouza_mild", 8))
+    out = tmp_path / "judge.json"
+    argv = ["judge", "--input", path, "--out", out, "--cases", 20, *args]
+    res = subprocess.run([sys.executable, str(ROOT / "tools" / "bench.py"), *map(str, argv)],
+                         capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    return json.loads(out.read_text())
+
+def test_bench_judge_reports_each_engine_and_concurrency(tmp_path):
+    pytest.importorskip("aiohttp")
+    report = _bench(tmp_path, "--engine", "async", "sync", "--concurrency", 1, 4, "--latency", "const:0.002")
+    assert report["scenario"] == "judge"
+    rows = report["results"]
+    assert [(r["engine"], r["concurrency"]) for r in rows] == [("async", 1), ("async", 4), ("sync", 1), ("sync", 4)]
+    for r in rows:
+        assert (r["cases"], r["ok"], r["requests"], r["retries"]) == (20, 20, 20, 0)
+        assert r["failure_rate"] == r["parse_failure_rate"] == 0
+        assert 0 < r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
+        assert r["server"]["requests"] == r["server"]["ok"] == 20
+
+def test_bench_judge_counts_retries_and_parse_failures(tmp_path):
+    pytest.importorskip("aiohttp")
+    rows = _bench(tmp_path, "--engine", "async", "--concurrency", 4, "--p429", 0.3, "--malformed", 0.3,
+                  "--retry-after", 0, "--seed", 2)["results"]
+    (r,) = rows
+    server = r["server"]
+    assert r["retries"] == server["429"] > 0 and r["requests"] == server["requests"] == 20 + r["retries"]
+    unparsed = server["malformed_prose"] + server["malformed_truncated"]
+    assert unparsed > 0 and r["ok"] == 20 - unparsed
+    assert r["failure_rate"] == r["parse_failure_rate"] == unparsed / 20
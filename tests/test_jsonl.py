@@ -0,0 +1,75 @@
+# tests/test_jsonl.py
+import gzip, json, os
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+from evalsuite.jsonl import JsonlIndex, iter_jsonl, open_compressed
+
+ODD = (b'{"id": "a", "x": "caf\\u00e9"}\n\n   {"id": 7, "x": "\xc3\xa9\xe2\x80\x94"}\r\n'
+       b'{"id": "a", "x": "dup"}\n\t\n{"id": "last"}')
+
+def test_index_equals_sequential_read(tmp_path):
+    path = tmp_path / "odd.jsonl"
+    path.write_bytes(ODD)
+    rows = list(iter_jsonl(str(path)))
+    with JsonlIndex(str(path)) as index:
+        assert len(index) == 4 and [index[i] for i in range(4)] == rows
+        assert index[-1] == {"id": "last"} and index.ids == ["a", 7, "a", "last"]
+        with pytest.raises(IndexError):
+            index[4]
+        # ids compare as strings; the first of a repeated id wins
+        assert (index.ordinal("a"), index.ordinal(7), index.ordinal("7"), index.ordinal("nope")) == (0, 1, 1, None)
+    data = data_rows("adesouza_mild", 558)
+    with JsonlIndex(write_jsonl(tmp_path / "x.jsonl", data)) as index:
+        assert list(index.rows([557, 0, 300, 0])) == [data[557], data[0], data[300], data[0]]
+
+def test_sidecar_is_reused_and_rebuilt_when_the_input_changes(tmp_path, monkeypatch):
+    path = write_jsonl(tmp_path / "in.jsonl", data_rows("adesouza_mild", 50))
+    JsonlIndex(path).close()
+    assert os.path.exists(path + ".idx")
+    built = []
+    build = JsonlIndex._build
+    monkeypatch.setattr(JsonlIndex, "_build", lambda self: built.append(1) or build(self))
+    with JsonlIndex(path) as index:
+        assert built == [] and len(index) == 50
+    write_jsonl(path, data_rows("adesouza_mild", 60))
+    with JsonlIndex(path) as index:
+        assert built == [1] and len(index) == 60 and index[59]["id"] == data_rows("adesouza_mild", 60)[59]["id"]
+    with open(path + ".idx", "r+b") as f:  # torn sidecar
+        f.truncate(os.path.getsize(path + ".idx") - 8)
+    with JsonlIndex(path) as index:
+        assert built == [1, 1] and len(index) == 60 and index[59] == data_rows("adesouza_mild", 60)[59]
+
+def test_split_covers_every_row_once():
+    class Rows(JsonlIndex):
+        def __init__(self, n):
+            self.ids = list(range(n))
+
+    for n, k in ((10, 3), (558, 8), (2, 5), (0, 2)):
+        parts = Rows(n).split(k)
+        assert len(parts) == k and [i for p in parts for i in p] == list(range(n))
+        assert max(map(len, parts)) - min(map(len, parts)) <= 1
+
+def test_start_and_ids_pick_the_same_rows_as_slicing(tmp_path):
+    data = data_rows("adesouza_spicy", 120)
+    path = write_jsonl(tmp_path / "in.jsonl", data)
+    main.run(path, str(tmp_path / "start"), start=100, num_rows=10)
+    main.run(write_jsonl(tmp_path / "slice.jsonl", data[100:110]), str(tmp_path / "slice"))
+    assert outputs(tmp_path / "start") == outputs(tmp_path / "slice")
+    ids = [data[i]["id"] for i in (90, 3, 57)] + ["missing-id"]
+    main.run(path, str(tmp_path / "ids"), ids=ids)
+    main.run(write_jsonl(tmp_path / "picked.jsonl", [data[i] for i in (90, 3, 57)]), str(tmp_path / "picked"))
+    assert outputs(tmp_path / "ids") == outputs(tmp_path / "picked")
+
+def test_compressed_inputs_stream_but_do_not_index(tmp_path):
+    data = data_rows("adesouza_mild", 20)
+    gz = str(tmp_path / "in.jsonl.gz")
+    with open_compressed(gz, "wb") as f:
+        for r in data:
+            f.write((json.dumps(r) + "\n").encode("utf-8"))
+    with gzip.open(gz, "rb") as f:
+        assert f.read().count(b"\n") == 20
+    assert list(iter_jsonl(gz)) == data
+    with pytest.raises(ValueError):
+        JsonlIndex(gz)
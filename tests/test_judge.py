@@ -0,0 +1,121 @@
+# tests/test_judge.py
+import asyncio, time
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+import evalsuite.judge
+from evalsuite.judge import AsyncJudge, RateLimiter
+from tools.fake_judge import FakeJudgeServer
+
+pytest.importorskip("aiohttp")
+
+def _triples(n):
+    return [(ex["transcript"], ex["generated_note"], ex["reference_note"]) for ex in data_rows("adesouza_medium", n)]
+
+@pytest.fixture
+def key(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "fake")
+
+@pytest.fixture(scope="module")
+def clean_replies():
+    with pytest.MonkeyPatch.context() as mp, FakeJudgeServer() as srv:
+        mp.setenv("OPENROUTER_API_KEY", "fake")
+        with AsyncJudge("openrouter", "fake", concurrency=1, base_url=srv.url) as judge:
+            return judge.judge_many(_triples(30))
+
+def test_replies_come_back_in_input_order(key, clean_replies):
+    assert all(isinstance(r, dict) and r["rationale"] == "fake judge" for r in clean_replies)
+    assert len({(r["completeness"], r["grounding"], r["clinical_accuracy"]) for r in clean_replies}) > 5
+    with FakeJudgeServer(latency="uniform:0,0.05", seed=3) as srv, \
+            AsyncJudge("openrouter", "fake", concurrency=8, base_url=srv.url) as judge:
+        assert judge.judge_many(_triples(30)) == clean_replies
+
+def test_429_and_5xx_are_retried(key, clean_replies):
+    with FakeJudgeServer(p429=0.25, p5xx=0.2, seed=1) as srv, \
+            AsyncJudge("openrouter", "fake", concurrency=4, base_url=srv.url, max_retries=20,
+                       backoff_base=0.001, backoff_cap=0.01) as judge:
+        assert judge.judge_many(_triples(30)) == clean_replies
+        faults = srv.stats["429"] + srv.stats["5xx"]
+        assert faults > 5
+        assert judge.stats["retries"] == faults and judge.stats["requests"] == srv.stats["requests"] == 30 + faults
+        assert judge.stats["failures"] == 0
+
+def test_retry_after_sets_the_wait(key, monkeypatch):
+    waits = []
+    backoff = AsyncJudge._backoff
+
+    def recorded(self, attempt, retry_after):
+        waits.append((retry_after, backoff(self, attempt, retry_after)))
+        return waits[-1][1]
+
+    monkeypatch.setattr(AsyncJudge, "_backoff", recorded)
+    with FakeJudgeServer(p429=0.5, retry_after=0.02, seed=2) as srv, \
+            AsyncJudge("openrouter", "fake", concurrency=4, base_url=srv.url, max_retries=20,
+                       backoff_base=5.0) as judge:
+        assert all(judge.judge_many(_triples(10)))
+    assert waits and all(w == ("0.02", 0.02) for w in waits)
+    j = AsyncJudge("openrouter", backoff_base=1.0, backoff_cap=3.0)
+    assert j._backoff(0, "120") == 3.0  # capped
+    assert all(0 <= j._backoff(5, "soon") <= 3.0 for _ in range(50))  # unparseable: jittered backoff
+
+def test_gives_up_after_max_retries(key):
+    with FakeJudgeServer(p5xx=1.0) as srv, \
+            AsyncJudge("openrouter", "fake", concurrency=2, base_url=srv.url, max_retries=2,
+                       backoff_base=0.001) as judge:
+        assert judge.judge_many(_triples(3)) == [None] * 3
+        assert judge.stats["requests"] == 9 and judge.stats["retries"] == 6 and judge.stats["failures"] == 3
+
+def test_async_run_matches_blocking_run(tmp_path, key, monkeypatch):
+    path = write_jsonl(tmp_path / "in.jsonl", data_rows("adesouza_spicy", 30))
+    with FakeJudgeServer(latency="uniform:0,0.02", p429=0.1, seed=4) as srv:
+        monkeypatch.setattr(evalsuite.judge, "OPENROUTER_BASE_URL", srv.url)
+        monkeypatch.setattr(AsyncJudge, "__init__", _fast_backoff(AsyncJudge.__init__))
+        main.run(path, str(tmp_path / "async"), llm_backend="openrouter", llm_model="fake", judge_concurrency=6,
+                 stream=True)
+    with FakeJudgeServer() as srv:
+        monkeypatch.setattr(evalsuite.judge, "OPENROUTER_BASE_URL", srv.url)
+        main.run(path, str(tmp_path / "sync"), llm_backend="openrouter", llm_model="fake")
+    out = outputs(tmp_path / "async")
+    assert out == outputs(tmp_path / "sync")
+    assert out["summary.json"]["avg_llm_grounding"] is not None
+
+def _fast_backoff(init):
+    def wrapped(self, *args, **kw):
+        init(self, *args, **kw)
+        self.backoff_base, self.backoff_cap = 0.001, 0.01
+    return wrapped
+
+def test_rate_limiter_waits_for_tokens():
+    async def go():
+        limiter = RateLimiter(tpm=600)  # a full minute's burst, then 10 tokens/s
+        t0 = time.monotonic()
+        await limiter.acquire(600)
+        burst = time.monotonic() - t0
+        await limiter.acquire(3)
+        return burst, time.monotonic() - t0
+
+    burst, total = asyncio.run(go())
+    assert burst < 0.05 and 0.25 <= total < 1.0
+
+def _cached_run(path, out, monkeypatch, concurrency, **server):
+    with FakeJudgeServer(**server) as srv:
+        monkeypatch.setattr(evalsuite.judge, "OPENROUTER_BASE_URL", srv.url)
+        main.run(path, str(out), llm_backend="openrouter", llm_model="fake", judge_cache=str(out.parent / "judge.db"),
+                 judge_concurrency=concurrency)
+        return dict(srv.stats), outputs(out)
+
+@pytest.mark.parametrize("concurrency", [0, 4])
+def test_judge_cache_skips_the_server_on_rerun(tmp_path, key, monkeypatch, concurrency):
+    path = write_jsonl(tmp_path / "in.jsonl", data_rows("adesouza_mild", 20))
+    first, _ = _cached_run(path, tmp_path / "first", monkeypatch, concurrency, malformed=0.3, seed=5)
+    unparsed = first["malformed_prose"] + first["malformed_truncated"]
+    assert unparsed and first["requests"] == 20
+    # replies that did not parse were not stored, so only those cases go to the server again
+    second, out2 = _cached_run(path, tmp_path / "second", monkeypatch, concurrency)
+    assert second["requests"] == unparsed
+    assert out2["summary.json"]["judge_cache"] == {"hits": 20 - unparsed, "misses": unparsed}
+    third, out3 = _cached_run(path, tmp_path / "third", monkeypatch, concurrency)
+    assert third["requests"] == 0 and out3["summary.json"].pop("judge_cache") == {"hits": 20, "misses": 0}
+    out2["summary.json"].pop("judge_cache")
+    assert out3 == out2
@@ -0,0 +1,47 @@
+# tests/test_lcs.py
+import random
+
+from conftest import data_rows
+from evalsuite.lcs import LcsReference, lcs_length
+from evalsuite.metrics import _tok, rouge_l_f, rouge_l_f_batch
+
+def _lcs_dp(a, b):
+    """The (m+1) x (n+1) table the bit-parallel LCS replaced."""
+    dp = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            dp[i + 1][j + 1] = dp[i][j] + 1 if x == y else max(dp[i][j + 1], dp[i + 1][j])
+    return dp[len(a)][len(b)]
+
+def _rouge_dp(candidate, reference):
+    c, r = _tok(candidate), _tok(reference)
+    if not c or not r:
+        return 0.0
+    lcs = _lcs_dp(c, r)
+    p, rec = lcs / len(c), lcs / len(r)
+    return 0.0 if p == 0.0 or rec == 0.0 else 2 * p * rec / (p + rec)
+
+def test_lcs_equals_dp_on_random_sequences():
+    rng = random.Random(2)
+    for _ in range(500):
+        alphabet = rng.choice(["ab", "abc", "abcdefgh", list(range(40))])
+        a = [rng.choice(alphabet) for _ in range(rng.randint(0, 90))]
+        b = [rng.choice(alphabet) for _ in range(rng.randint(0, 90))]
+        assert lcs_length(a, b) == lcs_length(b, a) == _lcs_dp(a, b)
+
+def test_lcs_edge_cases():
+    assert lcs_length([], []) == lcs_length("abc", "") == 0
+    assert lcs_length("a" * 200, "a" * 150) == 150
+    assert lcs_length("abcabcabc", "cba") == 3 and lcs_length("abc", "cba") == 1
+    # more than one machine word of state, and a reference reused across sequences
+    ref = LcsReference(list(range(300)))
+    assert ref.lcs(list(range(299, -1, -1))) == 1
+    assert ref.lcs(list(range(0, 300, 3)) + [5]) == 100
+
+def test_rouge_equals_dp_on_notes():
+    rows = data_rows("adesouza_spicy", 40)
+    pairs = [(ex["generated_note"], ex["reference_note"]) for ex in rows]
+    pairs += [(ex["reference_note"], ex["generated_note"]) for ex in rows[:10]] + [("", "x"), ("same", "same")]
+    want = [_rouge_dp(c, r) for c, r in pairs]
+    assert [rouge_l_f(c, r) for c, r in pairs] == want
+    assert rouge_l_f_batch(pairs) == want
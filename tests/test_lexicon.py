@@ -0,0 +1,63 @@
+# tests/test_lexicon.py
+import json, pickle, random, re
+import pytest
+
+from conftest import data_rows
+from evalsuite.extractors import DIAG_SYMPTOMS, DIAGNOSES, Fact, _negated, default_lexicon, extract_diags_symptoms
+from evalsuite.lexicon import Lexicon, load_lexicon
+
+def _regex_find(lowered, terms):
+    """The per-term \\b regex scan the automaton replaced, in the same (term, position) order."""
+    return [(tid, m.start(), m.end()) for tid, term in enumerate(terms)
+            for m in re.finditer(rf"\b{re.escape(term)}\b", lowered)]
+
+def _old_extract(text):
+    lowered = text.lower()
+    return [Fact("diagnosis" if term in DIAGNOSES else "symptom", term,
+                 "absent" if _negated(lowered, m.start()) else "present", _negated(lowered, m.start()), m.group(0))
+            for term in DIAG_SYMPTOMS for m in re.finditer(rf"\b{re.escape(term)}\b", lowered)]
+
+def test_default_extraction_equals_regex_scan():
+    for name in ("adesouza_mild", "adesouza_spicy"):
+        for ex in data_rows(name, 120):
+            for text in (ex["transcript"], ex["generated_note"], ex["reference_note"]):
+                assert extract_diags_symptoms(text) == _old_extract(text)
+
+TRICKY = [
+    "chest pain", "pain", "chest", "pain in chest", "sore throat", "throat", "a", "b12 deficiency",
+    "covid-19", "covid", "19", "x-ray", "type 2 diabetes", "2 diabetes", "diabetes",
+    "pain pain", "c++", "+5", "(left)", "s/p", "o2", "h. pylori",
+]
+
+def test_overlapping_and_odd_terms_equal_regex_scan():
+    lex = Lexicon((t, "symptom") for t in TRICKY)
+    texts = [
+        "chest pain pain pain in chest; sore throat, throat. covid-19 covid 19 x-ray type 2 diabetes",
+        "pain pain pain -- c++ and +5 (left) s/p o2 sat, h. pylori; chestpain a b12 deficiency",
+        "",
+    ] + [ex["transcript"].lower() for ex in data_rows("adesouza_spicy", 20)]
+    for t in texts:
+        assert lex.find(t) == _regex_find(t, lex.terms)
+
+def test_random_vocabularies_equal_regex_scan():
+    rng = random.Random(5)
+    words = ["pain", "chest", "fever", "cough", "of", "breath", "short", "no", "left", "knee"]
+    for _ in range(30):
+        terms = sorted({" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(12)})
+        lex = Lexicon((t, "symptom") for t in terms)
+        text = " ".join(rng.choice(words + [",", ".", "-", "\n"]) for _ in range(300))
+        assert lex.find(text) == _regex_find(text, lex.terms)
+
+def test_lexicon_loading_pickling_and_fingerprint(tmp_path):
+    j = tmp_path / "terms.json"
+    j.write_text(json.dumps({"diagnosis": ["Asthma"], "symptom": ["wheezing", "asthma"]}), encoding="utf-8")
+    lex = load_lexicon(str(j))
+    assert lex.terms == ["asthma", "wheezing"] and lex.categories == ["diagnosis", "symptom"]
+    t = tmp_path / "terms.txt"
+    t.write_text("# comment\nasthma\tdiagnosis\nwheezing\n\n", encoding="utf-8")
+    assert load_lexicon(str(t)).fingerprint == lex.fingerprint
+    assert default_lexicon().fingerprint != lex.fingerprint
+    clone = pickle.loads(pickle.dumps(lex))
+    assert clone.find("asthma with wheezing") == lex.find("asthma with wheezing") == [(0, 0, 6), (1, 12, 20)]
+    with pytest.raises(ValueError):
+        Lexicon([("rash", "finding")])
@@ -0,0 +1,39 @@
+# tests/test_main.py
+import json
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+from evalsuite.extractors import set_lexicon
+
+ALL_FILES = ("per_case.jsonl", "summary.csv", "aggregates.json", "dashboard.html")
+
+@pytest.fixture
+def spicy_input(tmp_path):
+    return write_jsonl(tmp_path / "spicy.jsonl", data_rows("adesouza_spicy", 60))
+
+@pytest.mark.parametrize("workers,chunksize", [(2, 1), (3, 4), (4, 16)])
+def test_workers_match_serial(tmp_path, spicy_input, workers, chunksize):
+    main.run(spicy_input, str(tmp_path / "serial"))
+    main.run(spicy_input, str(tmp_path / "pool"), workers=workers, chunksize=chunksize)
+    assert outputs(tmp_path / "pool", ALL_FILES) == outputs(tmp_path / "serial", ALL_FILES)
+
+def test_iter_scored_keeps_input_order(spicy_input):
+    rows = list(main.load_jsonl(spicy_input))
+    # windows smaller than the input, so results from several pool.map calls are stitched together
+    pairs = list(main.iter_scored(iter(rows), workers=2, chunksize=3))
+    assert [ex["id"] for ex, _ in pairs] == [row["id"] for _, row in pairs] == [r["id"] for r in rows]
+
+def test_workers_use_the_parent_lexicon(tmp_path, spicy_input):
+    lex = tmp_path / "terms.txt"
+    lex.write_text("wheezing\nchest tenderness\nhypertension\tdiagnosis\n", encoding="utf-8")
+    try:
+        main.run(spicy_input, str(tmp_path / "serial"), lexicon=str(lex))
+        main.run(spicy_input, str(tmp_path / "pool"), lexicon=str(lex), workers=2, chunksize=4)
+    finally:
+        set_lexicon(None)
+    serial = outputs(tmp_path / "serial")
+    assert outputs(tmp_path / "pool") == serial
+    keys = {f["key"] for line in serial["per_case.jsonl"].splitlines()
+            for kind in ("missing", "hallucinated") for f in json.loads(line)[kind]}
+    assert "hypertension" in keys and "fever" not in keys  # only the custom terms are matched
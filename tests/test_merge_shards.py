@@ -0,0 +1,31 @@
+# tests/test_merge_shards.py
+import pytest
+
+from conftest import outputs
+import main
+from evalsuite.report import merge_runs
+from tools.merge_shards import shard_order
+
+# aggregates.json is left out: its float partials depend on how the sums were split, though
+# the exact sums they hold (and so summary.json) do not
+REPORTS = ("per_case.jsonl", "summary.csv", "dashboard.html")
+
+@pytest.mark.parametrize("count, dashboard, sections", [(1, "table", False), (3, "table", False),
+                                                        (7, "table", False), (3, "compact", True)])
+def test_merged_shards_equal_a_single_run(tmp_path, mild_input, count, dashboard, sections):
+    main.run(mild_input, str(tmp_path / "single"), dashboard=dashboard, sections=sections)
+    dirs = [str(tmp_path / f"shard{i}") for i in range(1, count + 1)]
+    for i, d in enumerate(dirs, 1):
+        main.run(mild_input, d, shard=(i, count), sections=sections)
+    merge_runs(shard_order(list(reversed(dirs))), str(tmp_path / "merged"), dashboard=dashboard)
+    assert outputs(tmp_path / "merged", REPORTS) == outputs(tmp_path / "single", REPORTS)
+
+def test_incomplete_shard_sets_are_refused(tmp_path, mild_input):
+    dirs = [str(tmp_path / f"shard{i}") for i in (1, 2)]
+    for i, d in enumerate(dirs, 1):
+        main.run(mild_input, d, shard=(i, 3))
+    with pytest.raises(SystemExit, match="expected shards 1..3"):
+        shard_order(dirs)
+    main.run(mild_input, str(tmp_path / "single"))
+    with pytest.raises(SystemExit, match="not a --shard run"):
+        shard_order(dirs + [str(tmp_path / "single")])
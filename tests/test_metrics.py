@@ -0,0 +1,77 @@
+# tests/test_metrics.py
+import random
+
+from conftest import data_rows
+from evalsuite.extractors import Fact, extract_all
+from evalsuite.metrics import (CRITICAL_TERMS, FactIndex, _fact_match, find_contradictions, find_hallucinated,
+                               find_missing, prf1)
+
+# the all-pairs scans FactIndex replaced
+
+def _missing(tf, nf):
+    return [t for t in tf if ((t.type in ("vital", "allergy", "medication"))
+                              or (t.type in ("symptom", "diagnosis") and t.key in CRITICAL_TERMS and not t.negated))
+            and not any(_fact_match(t, n) for n in nf)]
+
+def _hallucinated(tf, nf):
+    return [n for n in nf if not any(_fact_match(n, t) for t in tf)]
+
+def _prf1(pred, ref):
+    matched = 0; used = set()
+    for p in pred:
+        for j, r in enumerate(ref):
+            if j not in used and _fact_match(p, r):
+                matched += 1; used.add(j); break
+    P = matched / max(1, len(pred)); R = matched / max(1, len(ref))
+    return {"precision": P, "recall": R, "f1": 0.0 if P == R == 0.0 else 2 * P * R / (P + R)}
+
+def _contradictions(nf):
+    return [f"Contradiction for {f.type} '{f.key}': both present and absent" for f in nf
+            if f.type in ("symptom", "diagnosis")
+            and any(g.type == f.type and g.key == f.key and g.negated != f.negated for g in nf)]
+
+def test_matching_equals_all_pairs_scan_on_data():
+    for name in ("adesouza_mild", "adesouza_medium", "adesouza_spicy"):
+        for ex in data_rows(name, 80):
+            tf, nf, rf = (extract_all(ex[k]) for k in ("transcript", "generated_note", "reference_note"))
+            assert find_missing(tf, nf) == _missing(tf, nf)
+            assert find_hallucinated(tf, nf) == _hallucinated(tf, nf)
+            assert prf1(nf, rf) == _prf1(nf, rf)
+            assert [m for m in find_contradictions(nf) if m.startswith("Contradiction")] == _contradictions(nf)
+
+def _random_facts(rng, n):
+    words = ["left", "knee", "pain", "lower", "back", "acute", "chronic"]
+    vitals = ["98.6 F", "98.9 F", "101 F", "120/80", "124/82", "12O/80", "abc/def", "37.5 C", "88", "90", "", None]
+    out = []
+    for _ in range(n):
+        t = rng.choice(["vital", "medication", "allergy", "symptom", "diagnosis"])
+        key = " ".join(rng.sample(words, rng.choice([1, 2, 5, 6, 6, 7])))
+        if t == "vital":
+            value = rng.choice(vitals)
+        elif t == "medication":
+            value = " ".join(rng.sample(["10", "mg", "daily", "twice", "po", "with", "food"], rng.randint(1, 5)))
+        else:
+            value = rng.choice(["present", "absent", "none"])
+        out.append(Fact(t, key, value, rng.random() < 0.3, "raw"))
+    return out
+
+def test_matching_equals_all_pairs_scan_on_near_keys():
+    # long keys (4+ tokens) are where different key sets can still reach jaccard 0.8
+    rng = random.Random(11)
+    for _ in range(200):
+        a, b = _random_facts(rng, rng.randint(0, 25)), _random_facts(rng, rng.randint(0, 25))
+        assert find_missing(a, b) == _missing(a, b)
+        assert find_hallucinated(a, b) == _hallucinated(a, b)
+        assert prf1(a, b) == _prf1(a, b)
+        index = FactIndex(b)
+        for f in a:
+            assert index.has_match(f) == any(_fact_match(f, g) for g in b)
+
+def test_first_match_is_the_left_to_right_pick():
+    facts = [Fact("vital", "hr", v, False, "raw") for v in ("88", "120", "90", "89")]
+    index = FactIndex(facts)
+    probe = Fact("vital", "hr", "89", False, "raw")
+    assert index.first_match(probe, set()) == 0
+    assert index.first_match(probe, {0}) == 2
+    assert index.first_match(probe, {0, 2, 3}) is None
+    assert index.same_key(probe) == [0, 1, 2, 3]
@@ -0,0 +1,72 @@
+# tests/test_overlap.py
+import math, random
+from collections import Counter
+import pytest
+from evalsuite.metrics import bleu, rouge_l_f
+from evalsuite.overlap import CorpusBleu, OverlapScorer
+
+WORDS = "pt reports chest pain for two days denies fever bp 120/80 hr 88 plan aspirin follow up".split()
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+def _pairs(seed: int = 0, n: int = 60):
+    rng = random.Random(seed)
+    refs = [_text(rng, rng.randint(0, 40)) for _ in range(8)]
+    return [(_text(rng, rng.randint(0, 40)), rng.choice(refs)) for _ in range(n)]
+
+def test_scores_match_string_metrics():
+    scorer = OverlapScorer()
+    for cand, ref in _pairs():
+        got = scorer.score(cand, ref)
+        assert got["bleu"] == pytest.approx(bleu(cand, ref), abs=1e-12)
+        assert got["rouge_l_f"] == pytest.approx(rouge_l_f(cand, ref), abs=1e-12)
+
+def test_reference_cache_is_bounded_and_reused():
+    scorer = OverlapScorer(cache_size=4)
+    for i in range(50):
+        scorer.score("a b c", f"ref {i} text")
+    assert len(scorer._refs) == 4
+    scorer.score("x", "ref 49 text")
+    assert scorer.ref_hits == 1
+
+def test_vocab_reset_keeps_scores():
+    pairs = _pairs(seed=1)
+    small = OverlapScorer(max_vocab=5)
+    big = OverlapScorer()
+    for cand, ref in pairs:
+        assert small.score(cand, ref) == big.score(cand, ref)
+    assert small.vocab_resets > 0
+    assert len(small.vocab) <= 5 + 2 * 40
+
+def test_corpus_bleu_from_stats_sums_clipped_counts():
+    rng = random.Random(2)
+    pairs = []
+    for _ in range(30):
+        ref = _text(rng, rng.randint(10, 40)).split()
+        cand = [w if rng.random() < 0.8 else rng.choice(WORDS) for w in ref[rng.randint(0, 3):]]
+        pairs.append((" ".join(cand), " ".join(ref)))
+    scorer = OverlapScorer()
+    corpus = CorpusBleu()
+    for cand, ref in pairs:
+        corpus.add(scorer.score(cand, ref)["bleu_stats"])
+    match, total, cl, rl = [0] * 4, [0] * 4, 0, 0
+    for cand, ref in pairs:
+        c, r = cand.split(), ref.split()
+        for n in range(1, 5):
+            cg = Counter(tuple(c[i:i + n]) for i in range(len(c) - n + 1))
+            rg = Counter(tuple(r[i:i + n]) for i in range(len(r) - n + 1))
+            match[n - 1] += sum(min(k, rg[g]) for g, k in cg.items())
+            total[n - 1] += sum(cg.values())
+        cl += len(c); rl += len(r)
+    assert (corpus.match, corpus.total, corpus.cand_len, corpus.ref_len) == (match, total, cl, rl)
+    assert all(match)
+    geo = math.exp(sum(math.log(m / t) for m, t in zip(match, total)) / 4)
+    bp = 1.0 if cl > rl else math.exp(1 - rl / cl)
+    assert corpus.score() == pytest.approx(bp * geo, abs=1e-12)
+    one = CorpusBleu()
+    one.add(scorer.score(*pairs[0])["bleu_stats"])
+    assert one.score() == pytest.approx(bleu(*pairs[0]), abs=1e-12)
+
+def test_corpus_bleu_empty():
+    assert CorpusBleu().score() is None
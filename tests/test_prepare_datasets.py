@@ -0,0 +1,118 @@
+# tests/test_prepare_datasets.py
+import csv, gzip, json, subprocess, sys
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from conftest import ROOT, write_jsonl
+from evalsuite.jsonl import iter_jsonl
+from tools.prepare_datasets import (ADESOUZA_META, MTS_META, load_adesouza, load_mts, load_omi,
+                                    select_meta, snapshot_files)
+
+def _prepare(*args):
+    return subprocess.run([sys.executable, str(ROOT / "tools" / "prepare_datasets.py"), *map(str, args)],
+                          capture_output=True, text=True)
+
+def _omi_rows(n):
+    # every seventh row has no SOAP note and is skipped
+    return [{"dialogue": f"Doctor: case {i}?\nPatient: fine.", "soap": "" if i % 7 == 3 else f"S: case {i}",
+             "prompt": f"p{i}", "messages": [{"role": "user", "content": f"m{i}"}],
+             "messages_nosystem": [], "extra": "x" * 50} for i in range(n)]
+
+def _write_parquet(path, rows, row_group_size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), str(path), row_group_size=row_group_size)
+
+@pytest.fixture
+def omi_snapshot(tmp_path):
+    rows = _omi_rows(50)
+    snap = tmp_path / "omi"
+    _write_parquet(snap / "data" / "train-00000-of-00002.parquet", rows[:30], 8)
+    _write_parquet(snap / "data" / "train-00001-of-00002.parquet", rows[30:], 8)
+    _write_parquet(snap / "data" / "test-00000-of-00001.parquet", _omi_rows(5), 8)
+    return snap, rows
+
+def test_snapshot_files_prefer_the_split(tmp_path, omi_snapshot):
+    snap, _ = omi_snapshot
+    assert [p.rsplit("/", 1)[1] for p in snapshot_files(str(snap), "train")] == [
+        "train-00000-of-00002.parquet", "train-00001-of-00002.parquet"]
+    assert len(snapshot_files(str(snap), "test")) == 1
+    (tmp_path / "dict" / "train").mkdir(parents=True)
+    (tmp_path / "dict" / "train" / "data-00000-of-00001.arrow").write_bytes(b"")
+    (tmp_path / "dict" / "train" / "state.json").write_text("{}")
+    assert [p.rsplit("/", 1)[1] for p in snapshot_files(str(tmp_path / "dict"), "train")] == [
+        "data-00000-of-00001.arrow"]
+    with pytest.raises(SystemExit, match="no .parquet"):
+        snapshot_files(str(tmp_path / "dict" / "missing"), "train")
+
+@pytest.mark.parametrize("batch_size", [1, 4, 1024])
+def test_parquet_snapshot_streams_in_order(omi_snapshot, batch_size):
+    snap, rows = omi_snapshot
+    out = list(load_omi("train", str(snap), batch_size=batch_size))
+    kept = [(i, r) for i, r in enumerate(rows) if r["soap"]]
+    assert [r["id"] for r in out] == [f"ex_{i:06d}" for i, _ in kept]
+    assert [r["reference_note"] for r in out] == [r["soap"] for _, r in kept]
+    assert out[0]["meta"] == {"prompt": "p0", "messages": [{"role": "user", "content": "m0"}],
+                              "messages_nosystem": []}
+    assert all(set(r) == {"id", "transcript", "generated_note", "reference_note", "meta"} for r in out)
+
+def test_every_snapshot_format_gives_the_same_rows(tmp_path):
+    rows = [{"patient_convo": f"Patient {i} talks.", "soap_notes": "" if i == 4 else f"S: {i}",
+             "age": 30 + i, "gender": "F", "full_patient_data": "" if i % 2 else "yes"} for i in range(12)]
+    table = pa.Table.from_pylist(rows)
+    pq.write_table(table, str(tmp_path / "s.parquet"), row_group_size=5)
+    with pa.OSFile(str(tmp_path / "file.arrow"), "wb") as f, pa.ipc.new_file(f, table.schema) as w:
+        w.write_table(table, max_chunksize=5)
+    with pa.OSFile(str(tmp_path / "stream.arrow"), "wb") as f, pa.ipc.new_stream(f, table.schema) as w:
+        w.write_table(table, max_chunksize=5)
+    write_jsonl(tmp_path / "s.jsonl", rows)
+    with gzip.open(tmp_path / "s.jsonl.gz", "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in rows)
+    meta = select_meta(ADESOUZA_META, ["age", "gender", "has_full_patient_data"])
+    want = list(load_adesouza("train", str(tmp_path / "s.parquet"), meta, batch_size=3))
+    assert len(want) == 11 and "ex_000004" not in [r["id"] for r in want]
+    assert want[1]["meta"] == {"age": 31, "gender": "F", "has_full_patient_data": False}
+    for name in ("file.arrow", "stream.arrow", "s.jsonl", "s.jsonl.gz"):
+        assert list(load_adesouza("train", str(tmp_path / name), meta)) == want, name
+    # fields the snapshot lacks read as None rather than failing
+    assert list(load_adesouza("train", str(tmp_path / "s.parquet"), {"phone": "phone"}))[0]["meta"] == {"phone": None}
+
+def test_compressed_parquet_is_refused(tmp_path):
+    (tmp_path / "s.parquet.gz").write_bytes(gzip.compress(b"PAR1"))
+    with pytest.raises(SystemExit, match="must be uncompressed"):
+        list(load_omi("train", str(tmp_path / "s.parquet.gz")))
+
+def test_mts_csv(tmp_path):
+    path = tmp_path / "MTS-Dialog-TrainingSet.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["ID", "section_header", "section_text", "dialogue"])
+        w.writerow(["0", "GENHX", "Pain for 3 days,\nworse at night.", "Doctor: Hi.\nPatient: My back hurts."])
+        w.writerow(["1", "FAM/SOCHX", "", "Doctor: Family history?"])
+        w.writerow(["2", "ROS", "Denies fever.", "Doctor: Fever?\nPatient: " + "no " * 50000])
+    out = list(load_mts("train", str(path), MTS_META))
+    assert [r["id"] for r in out] == ["ex_000000", "ex_000002"]
+    assert out[0]["reference_note"] == "Pain for 3 days,\nworse at night."
+    assert out[0]["meta"] == {"source_id": "0", "section_header": "GENHX"}
+    assert len(out[1]["transcript"]) > 131072  # longer than csv's default field limit
+    with pytest.raises(SystemExit, match="no Hub copy"):
+        list(load_mts("train"))
+
+def test_cli_meta_selection_and_compressed_output(tmp_path, omi_snapshot):
+    snap, rows = omi_snapshot
+    res = _prepare("--source", "omi", "--from", snap, "--out", tmp_path / "out" / "omi.jsonl.gz",
+                   "--drop-meta", "messages,messages_nosystem", "--batch-size", 3)
+    assert res.returncode == 0, res.stderr
+    out = list(iter_jsonl(str(tmp_path / "out" / "omi.jsonl.gz")))
+    assert res.stdout.startswith(f"Wrote {len(out)} rows")
+    assert len(out) == sum(1 for r in rows if r["soap"])
+    assert {json.dumps(r["meta"], sort_keys=True) for r in out[:2]} == {'{"prompt": "p0"}', '{"prompt": "p1"}'}
+    assert _prepare("--source", "omi", "--from", snap, "--out", tmp_path / "none.jsonl",
+                    "--meta", "none").returncode == 0
+    assert all("meta" not in r for r in iter_jsonl(str(tmp_path / "none.jsonl")))
+
+def test_cli_rejects_bad_arguments(tmp_path):
+    res = _prepare("--source", "omi", "--from", tmp_path, "--out", tmp_path / "o.jsonl", "--meta", "age")
+    assert res.returncode == 2 and "unknown meta fields for omi: age" in res.stderr
+    res = _prepare("--source", "mts", "--out", tmp_path / "o.jsonl")
+    assert res.returncode == 2 and "--source mts needs --mts-path" in res.stderr
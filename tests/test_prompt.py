@@ -0,0 +1,88 @@
+# tests/test_prompt.py
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+import evalsuite.prompt
+from evalsuite.judge import estimate_tokens
+from evalsuite.prompt import GAP, JudgePrompt, PromptStats
+from evalsuite.triage import Triage
+
+FILLER = "".join(f"Doctor: Let's go over item {i} of the intake form together.\n"
+                 "Patient: Sure, that sounds fine to me.\n" for i in range(30))
+TRANSCRIPT = ("Doctor: What brings you in today?\nPatient: I have had a fever since Monday.\n"
+              "Doctor: Anything else?\n" + FILLER + "Nurse: Heart rate 80, no distress.\n" + FILLER
+              + "Patient: Also a bad headache and some nausea.\n")
+NOTE = "S: cough, fever. O: HR 95. A: viral illness. P: fluids."
+REFERENCE = "Subjective: fever since Monday, headache, nausea.\nObjective: HR 80.\nAssessment: viral illness.\nPlan: fluids, rest."
+
+def _note_alone(p, note):
+    return estimate_tokens(p.rubric) + estimate_tokens(p._user("", note, ""))
+
+def test_tiers_come_in_priority_order():
+    # the HR the note gets wrong is missing (tier 1) and contradicts the note (tier 2)
+    tiers = JudgePrompt(100).evidence_lines(TRANSCRIPT, NOTE)
+    line = lambda s: TRANSCRIPT[:TRANSCRIPT.index(s)].count("\n")
+    assert line("Nurse: Heart rate 80") in tiers[0] and line("Nurse: Heart rate 80") in tiers[1]
+    assert {line("Patient: I have had a fever"), line("Patient: Also a bad headache")} <= set(tiers[2])
+
+    p = JudgePrompt(_note_alone(JudgePrompt(0), NOTE) + estimate_tokens(REFERENCE) + 40)
+    _, sent, info = p.build(TRANSCRIPT, NOTE, REFERENCE)
+    assert info["tokens_sent"] <= p.max_tokens and not info["reference_cut"] and not info["over_budget"]
+    assert "Nurse: Heart rate 80, no distress." in sent
+    assert "nausea" not in sent and GAP in sent
+    # more room lets tier 3 in; everything from the smaller budget stays
+    _, more, _ = JudgePrompt(p.max_tokens + 30).build(TRANSCRIPT, NOTE, REFERENCE)
+    assert "nausea" in more and all(s in more for s in sent.split("\n") if s != GAP)
+
+def test_budget_is_hard_and_cuts_the_reference():
+    p = JudgePrompt(_note_alone(JudgePrompt(0), NOTE) + 20)
+    messages, sent, info = p.build(TRANSCRIPT, NOTE, REFERENCE)
+    assert info["tokens_sent"] <= p.max_tokens and info["reference_cut"] and not info["over_budget"]
+    ref = messages[1]["content"].split("REFERENCE:\n", 1)[1]
+    assert ref.endswith(GAP) and REFERENCE.startswith(ref[:-len(GAP)].rstrip())
+    assert messages[1]["content"].count(NOTE) == 1
+
+@pytest.mark.parametrize("budget", [300, 700, 1000, 1500])
+def test_over_budget_only_when_the_note_cannot_fit(budget):
+    p = JudgePrompt(budget)
+    for ex in data_rows("adesouza_mild", 60):
+        _, _, info = p.build(ex["transcript"], ex["generated_note"], ex["reference_note"])
+        if info["over_budget"]:
+            assert _note_alone(p, ex["generated_note"]) > budget - 2
+        else:
+            assert info["tokens_sent"] <= budget
+
+def test_precomputed_evidence_gives_the_same_prompt():
+    for ex in data_rows("adesouza_spicy", 20):
+        p = JudgePrompt(900)
+        args = (ex["transcript"], ex["generated_note"], ex["reference_note"])
+        ev = p.evidence_lines(ex["transcript"], ex["generated_note"])
+        assert p.build(*args, evidence=ev) == p.build(*args)
+
+def test_prompt_stats_count_cut_and_over_budget():
+    stats = PromptStats(100)
+    stats.add({"tokens_full": 300, "tokens_sent": 100, "reference_cut": 1, "over_budget": 0})
+    stats.add({"tokens_full": 300, "tokens_sent": 180, "reference_cut": 0, "over_budget": 1})
+    stats.add(None)
+    s = stats.summary()
+    assert (s["prompts"], s["compacted"], s["reference_cut"], s["over_budget"]) == (2, 2, 1, 1)
+
+@pytest.mark.parametrize("concurrency", [0, 2])
+def test_parent_judge_reuses_worker_evidence(tmp_path, monkeypatch, concurrency):
+    # no API key: prompts are still built (and counted), but nothing is sent
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    path = write_jsonl(tmp_path / "in.jsonl", data_rows("adesouza_spicy", 30))
+
+    def no_extract(text):
+        raise AssertionError("judge prompt re-extracted facts in the parent")
+
+    monkeypatch.setattr(evalsuite.prompt, "extract_all", no_extract)
+    triage = Triage(calibrate=1.0, prompt_tokens=900)
+    main.run(path, str(tmp_path / "out"), llm_backend="openai", triage=triage, judge_prompt_tokens=900,
+             judge_concurrency=concurrency)
+    summary = outputs(tmp_path / "out")["summary.json"]
+    stats = summary["judge_prompt"]
+    assert stats["prompts"] == summary["judge_triage"]["budget"]["calls"] == 30
+    assert stats["compacted"] > 0 and stats["over_budget"] == 0
+    assert b"_evidence" not in outputs(tmp_path / "out")["per_case.jsonl"]
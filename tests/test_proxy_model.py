@@ -0,0 +1,51 @@
+# tests/test_proxy_model.py
+import gzip, json, subprocess, sys
+import pytest
+
+from conftest import ROOT, data_rows, write_jsonl
+from tools.proxy_model import case_rng, iter_corrupted, output_paths, transform
+
+def _proxy(*args):
+    subprocess.run([sys.executable, str(ROOT / "tools" / "proxy_model.py"), *map(str, args)],
+                   check=True, capture_output=True)
+
+@pytest.fixture
+def refs(tmp_path):
+    return write_jsonl(tmp_path / "refs.jsonl", data_rows("adesouza_mild", 60))
+
+def test_one_pass_writes_every_mode_and_seed_independently_of_workers(tmp_path, refs):
+    _proxy("--input", refs, "--out", tmp_path / "serial" / "{mode}.{seed}.jsonl",
+           "--mode", "mild", "medium", "spicy", "--seed", 1, 2)
+    _proxy("--input", refs, "--out", tmp_path / "pool" / "{mode}.{seed}.jsonl",
+           "--mode", "spicy", "mild", "medium", "--seed", 2, 1, "--workers", 3, "--chunksize", 7)
+    # a variant written on its own is the same as one written next to the others
+    _proxy("--input", refs, "--out", tmp_path / "alone.jsonl", "--mode", "medium", "--seed", 2)
+    files = {p.name: p.read_bytes() for p in (tmp_path / "serial").iterdir()}
+    assert len(files) == 6
+    assert files == {p.name: p.read_bytes() for p in (tmp_path / "pool").iterdir()}
+    assert (tmp_path / "alone.jsonl").read_bytes() == files["medium.2.jsonl"]
+    assert len(set(files.values())) == 6  # every mode and seed corrupts differently
+    assert files["mild.1.jsonl"].count(b"\n") == 60
+
+def test_rows_keep_their_fields_and_order(tmp_path, refs):
+    rows = data_rows("adesouza_mild", 60)
+    got = [json.loads(lines[0]) for lines in iter_corrupted(refs, [("spicy", 0)])]
+    assert [r["id"] for r in got] == [r["id"] for r in rows]
+    for r, src, i in zip(got, rows, range(60)):
+        assert {k: v for k, v in r.items() if k != "generated_note"} == \
+               {k: v for k, v in src.items() if k != "generated_note"}
+        assert r["generated_note"] == transform(src["reference_note"], "spicy", case_rng(0, "spicy", i))
+
+def test_compressed_input(tmp_path, refs):
+    gz = tmp_path / "refs.jsonl.gz"
+    with open(refs, "rb") as f, gzip.open(gz, "wb") as g:
+        g.write(f.read())
+    assert list(iter_corrupted(str(gz), [("mild", 3)])) == list(iter_corrupted(refs, [("mild", 3)]))
+
+def test_output_paths():
+    assert output_paths("d/x.jsonl", ["mild"], [0]) == ["d/x.jsonl"]
+    assert output_paths("d/x.jsonl", ["mild", "spicy"], [0, 1]) == [
+        "d/x.mild.s0.jsonl", "d/x.mild.s1.jsonl", "d/x.spicy.s0.jsonl", "d/x.spicy.s1.jsonl"]
+    assert output_paths("d/{seed}/x.jsonl", ["mild"], [4, 5]) == ["d/4/x.jsonl", "d/5/x.jsonl"]
+    with pytest.raises(SystemExit):
+        output_paths("d/{mode}.jsonl", ["mild"], [0, 1])
@@ -0,0 +1,45 @@
+# tests/test_report.py
+import json, tracemalloc
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+from evalsuite.report import StreamingReport, SummaryAccumulator
+
+ALL_FILES = ("per_case.jsonl", "summary.csv", "aggregates.json", "dashboard.html")
+
+@pytest.mark.parametrize("kw", [{}, {"dashboard": "compact"}, {"sections": True}, {"workers": 2, "chunksize": 4}])
+def test_stream_matches_buffered(tmp_path, mild_input, kw):
+    main.run(mild_input, str(tmp_path / "buffered"), **kw)
+    main.run(mild_input, str(tmp_path / "stream"), stream=True, **kw)
+    assert outputs(tmp_path / "stream", ALL_FILES) == outputs(tmp_path / "buffered", ALL_FILES)
+
+def test_accumulator_is_order_free_and_mergeable():
+    rows = [main.score_case(ex) for ex in data_rows("adesouza_medium", 50)]
+    whole = SummaryAccumulator()
+    for r in rows:
+        whole.add(r)
+    backwards = SummaryAccumulator()
+    for r in reversed(rows):
+        backwards.add(r)
+    halves = [SummaryAccumulator(), SummaryAccumulator()]
+    for i, r in enumerate(rows):
+        halves[i >= 17].add(r)
+    halves[0].merge(halves[1])
+    assert backwards.summary() == whole.summary() == halves[0].summary()
+    assert whole.summary()["num_cases"] == 50
+
+def test_streaming_report_keeps_no_rows(tmp_path):
+    line = json.dumps(main.score_case(data_rows("adesouza_mild", 1)[0]))
+    report = StreamingReport(str(tmp_path))
+    for _ in range(50):
+        report.add(json.loads(line))
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(2000):
+        report.add(json.loads(line))  # a fresh row each time, as from scoring
+    grown = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    summary = report.close()
+    assert summary["num_cases"] == 2050
+    assert grown < 200_000  # keeping the rows would take several MB
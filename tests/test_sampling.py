@@ -0,0 +1,88 @@
+# tests/test_sampling.py
+import gzip, json, math, random, statistics
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+from evalsuite.sampling import SequentialStop, StratifiedSampler, allocate
+
+def _ids(sampler, rows, order="input"):
+    return [ex["id"] for ex in sampler.extend(rows).sample(order=order)]
+
+def test_sample_is_deterministic_and_order_free():
+    rows = data_rows("adesouza_mild", 200)
+    picked = _ids(StratifiedSampler(30, ("gender",), seed=7), rows)
+    assert len(picked) == 30
+    assert _ids(StratifiedSampler(30, ("gender",), seed=7), rows) == picked
+    shuffled = rows[:]
+    random.Random(1).shuffle(shuffled)
+    assert sorted(_ids(StratifiedSampler(30, ("gender",), seed=7), shuffled)) == sorted(picked)
+    assert sorted(_ids(StratifiedSampler(30, ("gender",), seed=8), rows)) != sorted(picked)
+    # the random order is a permutation of the same sample, and fixed too
+    order = _ids(StratifiedSampler(30, ("gender",), seed=7), rows, "random")
+    assert sorted(order) == sorted(picked) and order != picked
+    assert _ids(StratifiedSampler(30, ("gender",), seed=7), shuffled, "random") == order
+
+def test_strata_allocation_and_bounded_heaps():
+    rows = data_rows("adesouza_mild", 558)
+    s = StratifiedSampler(40, ("health_problem",), seed=0)
+    for i, ex in enumerate(rows):
+        s.add(ex, item=i)
+    assert all(len(h) <= 40 for h in s._heaps.values())
+    alloc = s.allocation_sizes()
+    assert sum(alloc.values()) == 40 and all(k >= 1 for k in alloc.values())
+    picked = s.sample()
+    assert picked == sorted(picked) and len(set(picked)) == 40
+    d = s.describe()
+    assert d["planned"] == d["sampled"] == 40 and d["population"] == 558
+    assert allocate({("a",): 90, ("b",): 10}, 10, "equal") == {("a",): 5, ("b",): 5}
+    assert allocate({("a",): 90, ("b",): 10}, 10) == {("a",): 9, ("b",): 1}
+
+def test_describe_counts_only_scored_items():
+    s = StratifiedSampler(None, ("gender",)).extend(data_rows("adesouza_mild", 100))
+    order = s.sample(order="random")
+    d = s.describe(scored=10)
+    assert d["planned"] == 100 and d["sampled"] == 10
+    assert sum(taken for taken, _ in d["strata"].values()) == 10
+    assert d["strata"]["female"][0] == sum(ex["meta"]["gender"] == "female" for ex in order[:10])
+
+def test_sequential_stop_matches_sample_stats():
+    xs = [random.Random(3).random() for _ in range(50)]
+    stop = SequentialStop({"avg_bleu": 0.5}, min_cases=30)
+    for i, x in enumerate(xs):
+        done = stop.add({"text_overlap": {"bleu": x}})
+        assert done == (i + 1 >= 30)
+    n = len(xs)
+    assert math.isclose(stop.half_width("avg_bleu"), 1.96 * statistics.stdev(xs) / math.sqrt(n))
+    assert math.isclose(stop.stats["avg_bleu"][1], statistics.fmean(xs))
+    assert stop.describe()["stop_reason"] == "ci_target_met" and stop.rows == n
+
+@pytest.mark.parametrize("min_cases", [0, 1, 2])
+def test_sequential_stop_needs_two_values(min_cases):
+    stop = SequentialStop({"avg_bleu": 0.05}, min_cases=min_cases)
+    assert stop.add({"text_overlap": {"bleu": 0.5}}) is False
+    assert stop.describe()["metrics"]["avg_bleu"]["half_width"] is None
+    assert stop.add({}) is False  # no value for the metric
+    assert stop.add({"text_overlap": {"bleu": 0.5}}) is True  # two equal values: half-width 0
+
+def test_until_ci_run_is_deterministic_and_reports_what_it_scored(tmp_path):
+    path = write_jsonl(tmp_path / "in.jsonl", data_rows("adesouza_mild", 120))
+    main.run(path, str(tmp_path / "a"), until_ci={"avg_bleu": 0.05}, until_ci_min=20)
+    main.run(path, str(tmp_path / "b"), until_ci={"avg_bleu": 0.05}, until_ci_min=20)
+    a, b = outputs(tmp_path / "a"), outputs(tmp_path / "b")
+    assert a == b
+    summary = a["summary.json"]
+    sample = summary["sample"]
+    assert sample["sequential"]["stop_reason"] == "ci_target_met"
+    assert sample["planned"] == 120 and sample["sampled"] == summary["num_cases"] < 120
+    assert sample["sequential"]["rows"] == summary["num_cases"]
+
+def test_compressed_input_picks_the_same_sample(tmp_path):
+    rows = data_rows("adesouza_mild", 80)
+    path = write_jsonl(tmp_path / "in.jsonl", rows)
+    with gzip.open(tmp_path / "in.jsonl.gz", "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in rows)
+    kw = dict(sample=25, sample_by=("gender",), sample_seed=4)
+    main.run(path, str(tmp_path / "plain"), **kw)
+    main.run(str(tmp_path / "in.jsonl.gz"), str(tmp_path / "gz"), **kw)
+    assert outputs(tmp_path / "plain")["per_case.jsonl"] == outputs(tmp_path / "gz")["per_case.jsonl"]
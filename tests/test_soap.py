@@ -0,0 +1,75 @@
+# tests/test_soap.py
+import json, re
+import pytest
+
+from conftest import data_rows, outputs
+import main
+from evalsuite.extractors import extract_all
+from evalsuite.soap import SECTIONS, SectionMap, section_spans, split_soap_sections
+
+def _line_split(text):
+    """The former line-by-line splitter: only header lines that are nothing but the header count."""
+    sections = {s: "" for s in SECTIONS}
+    current = None
+    for line in (text or "").splitlines():
+        h = re.sub(r"[:\-\s]+$", "", line.strip().lower())
+        h = next((s for s in SECTIONS if h in (s, s[0])), None)
+        if h is not None:
+            current = h
+            continue
+        sections[current or "subjective"] += line + "\n"
+    if not any(v.strip() for v in sections.values()):
+        return {"body": text or ""}
+    return sections
+
+def test_split_keeps_line_shape():
+    text = "pt here for f/u\nSubjective:\ncough x3d\n\nObjective -\nT 101 F\r\nA\nURI\nPlan:\nrest\n"
+    assert split_soap_sections(text) == _line_split(text) == {
+        "subjective": "pt here for f/u\ncough x3d\n\n", "objective": "T 101 F\n",
+        "assessment": "URI\n", "plan": "rest\n"}
+    assert split_soap_sections("no headers at all")["subjective"] == "no headers at all\n"
+    assert split_soap_sections("Plan:\n  \n") == _line_split("Plan:\n  \n") == {"body": "Plan:\n  \n"}
+
+def test_split_matches_line_splitter_on_standalone_headers():
+    for ex in data_rows("adesouza_mild", 80):
+        for text in (ex["reference_note"], ex["generated_note"]):
+            if not re.search(r"^[ \t]*(?:[soap]|subjective|objective|assessment|plan)[ \t]*:[ \t]*\S", text, re.I | re.M):
+                assert split_soap_sections(text) == _line_split(text)
+
+@pytest.mark.parametrize("header", ["Assessment and Plan:", "ASSESSMENT & PLAN", "Assessment/Plan -", "A/P:", "A&P"])
+def test_combined_assessment_and_plan(header):
+    text = f"S: cough\n{header}\nviral URI, supportive care\nPlan: recheck in 1 week\n"
+    secs = split_soap_sections(text)
+    assert secs["assessment"] == "viral URI, supportive care\n"
+    assert secs["plan"] == "recheck in 1 week\n"
+    assert secs["subjective"] == "cough\n"
+
+def test_inline_headers_and_offsets():
+    text = "S: fever\nO: HR 110\nA: influenza\nP: fluids"
+    spans = section_spans(text)
+    assert [(s, text[a:b]) for s, a, b in spans] == [
+        ("subjective", "fever\n"), ("objective", "HR 110\n"), ("assessment", "influenza\n"), ("plan", "fluids")]
+    m = SectionMap(text)
+    placed = {f.key: m.section_at(f.start) for f in extract_all(text)}
+    assert placed == {"fever": "subjective", "hr": "objective", "influenza": "assessment"}
+
+def test_hyphenated_words_are_not_headers():
+    text = "A: viral URI\nPlan-based follow up was discussed.\nAssessment-wise stable\nPlan - rest\nfluids\n"
+    assert split_soap_sections(text) == {
+        "subjective": "", "objective": "",
+        "assessment": "viral URI\nPlan-based follow up was discussed.\nAssessment-wise stable\n",
+        "plan": "rest\nfluids\n"}
+
+def test_sections_are_opt_in(tmp_path, mild_input):
+    main.run(mild_input, str(tmp_path / "plain"))
+    main.run(mild_input, str(tmp_path / "sections"), sections=True)
+    plain, secs = outputs(tmp_path / "plain"), outputs(tmp_path / "sections")
+    assert "sections" not in plain["summary.json"]
+    assert secs["summary.json"]["sections"]["num_cases"] == 40
+    rows = [json.loads(l) for l in secs["per_case.jsonl"].splitlines()]
+    assert all(set(r["sections"]) == set(SECTIONS) for r in rows)
+    # the rest of each row is unchanged; only the fingerprint tells the two kinds of run apart
+    for a, b in zip((json.loads(l) for l in plain["per_case.jsonl"].splitlines()), rows):
+        del b["sections"]
+        assert a.pop("fingerprint") != b.pop("fingerprint")
+        assert a == b
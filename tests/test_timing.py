@@ -0,0 +1,44 @@
+# tests/test_timing.py
+import json, math, random
+import main
+from evalsuite.timing import StageTimings, percentile
+
+def test_percentile_nearest_rank():
+    vals = [float(i) for i in range(1, 101)]
+    assert percentile(vals, 50) == 50.0
+    assert percentile(vals, 99) == 99.0
+    assert percentile(vals, 100) == 100.0
+    assert percentile([], 50) == 0.0
+
+def test_exact_below_reservoir():
+    rng = random.Random(0)
+    vals = [rng.random() for _ in range(500)]
+    st = StageTimings(reservoir=1000)
+    for i, v in enumerate(vals):
+        st.add(i, {"extract": v})
+    s = st.summary()["extract"]
+    srt = sorted(vals)
+    assert s["count"] == 500 and s["percentiles"] == "exact"
+    assert s["p95_ms"] == round(1e3 * percentile(srt, 95), 3)
+    assert s["max_ms"] == round(1e3 * srt[-1], 3) and s["min_ms"] == round(1e3 * srt[0], 3)
+    assert math.isclose(s["total_s"], round(math.fsum(vals), 6), abs_tol=1e-6)
+
+def test_memory_bounded_and_estimates_close():
+    rng = random.Random(1)
+    st = StageTimings(reservoir=256)
+    vals = [rng.expovariate(1.0) for _ in range(20000)]
+    for i, v in enumerate(vals):
+        st.add(i, {"score": v})
+    assert len(st.stages["score"].sample) == 256
+    s = st.summary()["score"]
+    assert s["count"] == 20000 and s["percentiles"] == "reservoir of 256"
+    assert s["max_ms"] == round(1e3 * max(vals), 3)
+    assert abs(s["p50_ms"] / 1e3 - math.log(2)) < 0.15
+
+def test_run_writes_timings(tmp_path, mild_input):
+    out = tmp_path / "out"
+    main.run(mild_input, str(out), timings_jsonl=True)
+    stages = json.loads((out / "summary.json").read_text())["timings"]["stages"]
+    assert {"extract", "match", "overlap", "score", "write"} <= set(stages)
+    assert all(v["count"] == 40 for v in stages.values())
+    assert len((out / "timings.jsonl").read_text().splitlines()) == 40
@@ -0,0 +1,98 @@
+# tests/test_triage.py
+import json
+import pytest
+
+from conftest import data_rows, outputs, write_jsonl
+import main
+import evalsuite.triage
+from evalsuite.judge import _judge_content, estimate_tokens
+from evalsuite.triage import RULES, Triage, parse_rules
+
+@pytest.fixture(scope="module")
+def scored():
+    return [(ex, main.score_case(ex)) for ex in data_rows("adesouza_medium", 120)]
+
+def _gate_all(triage, scored):
+    rows = [dict(row) for _, row in scored]
+    judged = [triage.gate(ex, row) for (ex, _), row in zip(scored, rows)]
+    return judged, rows
+
+def _tokens(ex):
+    return estimate_tokens(_judge_content(ex["transcript"], ex["generated_note"], ex["reference_note"]))
+
+def test_tier_rules():
+    t = Triage()
+    ok = {"text_overlap": {"rouge_l_f": 0.9}}
+    assert t.tier(ok) == ("clean", "calibration")
+    assert t.tier(dict(ok, contradictions_count=1)) == ("risky", "contradictions")
+    assert t.tier(dict(ok, hallucinated_count=2, missing_count=5)) == ("risky", "hallucinated")
+    assert t.tier(dict(ok, hallucinated_count=1, missing_count=3)) == ("risky", "missing")
+    assert t.tier({"text_overlap": {"rouge_l_f": 0.39}}) == ("risky", "rouge")
+    assert t.tier({"text_overlap": {"rouge_l_f": 0.4}}) == ("uncertain", "rouge")
+    assert t.tier({}) == ("risky", "rouge")
+    assert Triage({"rouge_high": 0.95}).tier(ok) == ("uncertain", "rouge")
+    assert parse_rules("missing=2, rouge_low=0.3") == dict(RULES, missing=2.0, rouge_low=0.3)
+    with pytest.raises(ValueError):
+        parse_rules("bleu=0.2")
+
+def test_unbudgeted_gate_judges_risky_uncertain_and_calibration(scored):
+    judged, rows = _gate_all(Triage(calibrate=0.0), scored)
+    assert judged == [r["triage"]["tier"] != "clean" for r in rows]
+    assert {r["triage"]["reason"] for r in rows if r["triage"]["tier"] == "clean"} == {"skipped"}
+    judged, rows = _gate_all(Triage(calibrate=1.0), scored)
+    assert all(judged)
+
+def test_calibration_slice_is_deterministic(scored):
+    picks = []
+    for seed in (0, 0, 1):
+        _, rows = _gate_all(Triage(rules={"rouge_low": 0.0, "rouge_high": 0.0, "missing": 99,
+                                          "hallucinated": 99, "contradictions": 99}, calibrate=0.3, seed=seed), scored)
+        assert {r["triage"]["tier"] for r in rows} == {"clean"}
+        picks.append([r["id"] for r in rows if r["triage"]["judged"]])
+    assert picks[0] == picks[1] != picks[2]
+    assert 15 <= len(picks[0]) <= 60
+
+def test_call_budget_is_enforced_in_input_order(scored):
+    free, _ = _gate_all(Triage(calibrate=1.0), scored)
+    t = Triage(calibrate=1.0, max_calls=17)
+    judged, rows = _gate_all(t, scored)
+    assert judged == [True] * 17 + [False] * (len(free) - 17)
+    assert {r["triage"]["reason"] for r in rows[17:]} == {"budget:calls"}
+    b = t.describe()["budget"]
+    assert (b["calls"], b["exhausted"]) == (17, "calls")
+    assert b["prompt_tokens_est"] == sum(_tokens(ex) for ex, _ in scored[:17])
+
+def test_token_budget_is_enforced(scored):
+    limit = sum(_tokens(ex) for ex, _ in scored[:10]) + 1
+    t = Triage(calibrate=1.0, max_tokens=limit)
+    judged, rows = _gate_all(t, scored)
+    assert judged == [True] * 10 + [False] * (len(scored) - 10)
+    assert rows[10]["triage"]["reason"] == "budget:tokens"
+    b = t.describe()["budget"]
+    assert b["prompt_tokens_est"] <= limit and b["exhausted"] == "tokens"
+    # compacted prompts are charged at most their budget
+    t = Triage(calibrate=1.0, max_tokens=400 * 25, prompt_tokens=400)
+    assert sum(_gate_all(t, scored)[0]) == 25 and t.tokens == 400 * 25
+
+def test_time_budget_stops_calls(scored, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr(evalsuite.triage.time, "perf_counter", lambda: float(next(clock)))
+    t = Triage(calibrate=1.0, max_seconds=5)
+    judged, rows = _gate_all(t, scored)
+    # the clock starts at the first call and ticks once per later budget check
+    assert sum(judged) == 6 and not any(judged[6:])
+    assert t.exhausted == "seconds" and rows[-1]["triage"]["reason"] == "budget:seconds"
+
+@pytest.mark.parametrize("concurrency", [0, 2])
+def test_run_respects_the_call_budget(tmp_path, monkeypatch, concurrency):
+    # no API key: the judge returns nothing, but every gated call is still charged
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    path = write_jsonl(tmp_path / "in.jsonl", data_rows("adesouza_spicy", 40))
+    main.run(path, str(tmp_path / "out"), llm_backend="openai", workers=2, chunksize=4,
+             triage=Triage(calibrate=1.0, max_calls=12), judge_concurrency=concurrency)
+    out = outputs(tmp_path / "out")
+    summary = out["summary.json"]["judge_triage"]
+    assert summary["budget"]["calls"] == 12 and summary["budget"]["exhausted"] == "calls"
+    assert summary["num_cases"] == 40
+    rows = [json.loads(line) for line in out["per_case.jsonl"].splitlines()]
+    assert [r["triage"]["judged"] for r in rows] == [True] * 12 + [False] * 28
@@ -0,0 +1,563 @@
+# tools/bench.py
+"""
+Offline benchmark suite: extraction, fact matching, BLEU, ROUGE-L, the HTML dashboard and a
+full main.run, on the bundled data and on synthetic corpora scaled by case count and by note
+length. Results go to a JSON file; `compare` flags regressions against a stored baseline.
+
+  python tools/bench.py run --out bench/base.json
+  python tools/bench.py run --out bench/new.json --only extract_all main_run
+  python tools/bench.py compare bench/base.json bench/new.json --threshold 0.10
+
+Timings are the best of --repeat runs (min is the least noisy estimate on a shared box);
+caches that would make a repeat cheaper than the first run are cleared before each one.
+compare exits 1 when any benchmark is slower than baseline by more than the threshold.
+
+Scenarios put one change next to what it replaced, check both give the same answer (exit 1
+if not), and print a table; --out also writes the rows as JSON:
+
+  python tools/bench.py workers  --input data/adesouza_spicy.gen.jsonl --workers 1 2 4 8
+  python tools/bench.py lexicon  --input data/adesouza.jsonl --sizes 17 1000 10000 50000
+  python tools/bench.py matching --input data/adesouza_spicy.gen.jsonl --concat 1 5 20 50
+  python tools/bench.py rouge    --input data/adesouza_spicy.gen.jsonl data/adesouza_medium.gen.jsonl
+  python tools/bench.py judge    --concurrency 1 4 16 64 --cases 200 --latency lognormal:0.2,0.5 \
+      --p429 0.05 --p5xx 0.02 --malformed 0.05
+
+workers   main.iter_scored at each worker count; every run must reproduce the serial rows
+lexicon   diagnosis/symptom extraction as the lexicon is padded with synthetic terms, vs. the
+          per-term regex scan (up to --regex-max terms)
+matching  FactIndex-backed find_missing/find_hallucinated/prf1 vs. the all-pairs scans, on
+          long cases built by concatenating --concat consecutive cases
+rouge     bit-parallel ROUGE-L (single pair and batch) vs. the (m+1) x (n+1) DP, with peak memory
+judge     AsyncJudge and the per-case judge_dispatch path against tools/fake_judge.py (started
+          in-process) or --base-url, keeping at most N cases in flight. Reports cases/s,
+          requests/s, per-case latency percentiles (retries included), retries, failure and
+          parse-failure rates. The async engine needs aiohttp, the sync one requests (no retries).
+"""
+import argparse, contextlib, glob, io, json, os, pathlib, platform, random, re, subprocess, sys, tempfile
+import threading, time, tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+import main  # noqa: E402
+import evalsuite.judge as judge_mod  # noqa: E402
+from evalsuite.extractors import DIAG_SYMPTOMS, DIAGNOSES, extract_all, extract_diags_symptoms  # noqa: E402
+from evalsuite.lexicon import Lexicon  # noqa: E402
+from evalsuite.matchers import token_set  # noqa: E402
+from evalsuite.metrics import (FactIndex, _fact_match, _is_critical, _tok, bleu, find_hallucinated,  # noqa: E402
+                               find_missing, prf1, rouge_l_f, rouge_l_f_batch)
+from evalsuite.overlap import OverlapScorer  # noqa: E402
+from evalsuite.report import write_dashboard, write_summary  # noqa: E402
+from evalsuite.timing import percentile  # noqa: E402
+from fake_judge import add_fault_args, from_args  # noqa: E402
+
+SCHEMA = 1
+
+# ------------ corpora ------------
+
+def load_rows(path: str, n=None) -> List[Dict[str, Any]]:
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if n is not None and len(rows) >= n:
+                break
+            if line.strip():
+                rows.append(json.loads(line))
+    return rows
+
+def _shuffled(text: str, rng: random.Random) -> str:
+    lines = text.split("\n")
+    rng.shuffle(lines)
+    return "\n".join(lines)
+
+def scale_cases(rows: List[Dict[str, Any]], k: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """k copies of every case; copies after the first get their lines shuffled so no cache sees a repeat."""
+    rng = random.Random(seed)
+    out = list(rows)
+    for c in range(1, k):
+        for r in rows:
+            out.append({"id": f"{r.get('id')}~{c}",
+                        "transcript": _shuffled(r.get("transcript", ""), rng),
+                        "generated_note": _shuffled(r.get("generated_note", ""), rng),
+                        "reference_note": _shuffled(r.get("reference_note", ""), rng)})
+    return out
+
+def scale_length(rows: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """Each case is k consecutive cases glued together: same case count, ~k times the text."""
+    out = []
+    for i in range(len(rows)):
+        group = [rows[(i + j) % len(rows)] for j in range(k)]
+        out.append({"id": f"{rows[i].get('id')}x{k}",
+                    **{key: "\n\n".join(g.get(key, "") for g in group)
+                       for key in ("transcript", "generated_note", "reference_note")}})
+    return out
+
+# ------------ benchmarks ------------
+# each takes the corpus (plus a prepared context) and returns the number of items it processed
+
+def _cold():
+    token_set.cache_clear()
+    main._OVERLAP = OverlapScorer()
+
+def b_extract_all(rows, ctx):
+    n = 0
+    for r in rows:
+        for key in ("transcript", "generated_note", "reference_note"):
+            extract_all(r.get(key, ""))
+            n += 1
+    return n
+
+def b_matching(rows, ctx):
+    for tf, nf, rf in ctx["facts"]:
+        find_missing(tf, nf, note_index=FactIndex(nf))
+        find_hallucinated(tf, nf, transcript_index=FactIndex(tf))
+        prf1(nf, rf)
+    return len(rows)
+
+def b_bleu(rows, ctx):
+    for r in rows:
+        bleu(r.get("generated_note", ""), r.get("reference_note", ""))
+    return len(rows)
+
+def b_rouge_l_f(rows, ctx):
+    for r in rows:
+        rouge_l_f(r.get("generated_note", ""), r.get("reference_note", ""))
+    return len(rows)
+
+def b_write_dashboard(rows, ctx):
+    write_dashboard(ctx["tmp"], ctx["scored"], ctx["summary"])
+    return len(rows)
+
+def b_write_dashboard_compact(rows, ctx):
+    write_dashboard(ctx["tmp"], ctx["scored"], ctx["summary"], mode="compact")
+    return len(rows)
+
+def b_main_run(rows, ctx):
+    out = os.path.join(ctx["tmp"], "run")
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            main.run(ctx["path"], out, checkpoint_every=0)
+        finally:
+            sys.stdout = stdout
+    return len(rows)
+
+BENCHES: Dict[str, Callable] = {
+    "extract_all": b_extract_all,
+    "matching": b_matching,
+    "bleu": b_bleu,
+    "rouge_l_f": b_rouge_l_f,
+    "write_dashboard": b_write_dashboard,
+    "write_dashboard_compact": b_write_dashboard_compact,
+    "main_run": b_main_run,
+}
+
+def prepare(rows: List[Dict[str, Any]], tmp: str, only: List[str]) -> Dict[str, Any]:
+    ctx: Dict[str, Any] = {"tmp": tmp, "path": os.path.join(tmp, "input.jsonl")}
+    with open(ctx["path"], "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    if "matching" in only:
+        ctx["facts"] = [(extract_all(r.get("transcript", "")), extract_all(r.get("generated_note", "")),
+                         extract_all(r.get("reference_note", ""))) for r in rows]
+    if "write_dashboard" in only or "write_dashboard_compact" in only:
+        ctx["scored"] = [main.score_case(r) for r in rows]
+        ctx["summary"] = write_summary(tmp, ctx["scored"])
+    return ctx
+
+def stopwatch(fn, *args) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+def peak_memory(fn, *args) -> int:
+    """Peak traced bytes of a second call; tracemalloc slows allocation-heavy code too much to time it."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def timeit(fn, rows, ctx, repeat: int) -> Dict[str, Any]:
+    times = []
+    items = 0
+    for _ in range(repeat):
+        _cold()
+        t0 = time.perf_counter()
+        items = fn(rows, ctx)
+        times.append(time.perf_counter() - t0)
+    best = min(times)
+    return {"seconds": best, "median": median(times), "repeat": repeat, "items": items,
+            "us_per_item": 1e6 * best / max(1, items)}
+
+# ------------ run / compare ------------
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+def corpora(args) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    out = []
+    paths = args.input or sorted(glob.glob(str(ROOT / "data" / "*.jsonl")))
+    for p in paths:
+        out.append((pathlib.Path(p).name.replace(".jsonl", ""), load_rows(p, args.num_rows)))
+    if paths:
+        base = load_rows(paths[0], args.synth_rows)
+        for k in args.case_scale:
+            out.append((f"synth_cases_x{k}", scale_cases(base, k)))
+        for k in args.length_scale:
+            out.append((f"synth_length_x{k}", scale_length(base, k)))
+    return out
+
+def cmd_run(args) -> int:
+    only = args.only or list(BENCHES)
+    results: Dict[str, Any] = {}
+    for name, rows in corpora(args):
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = prepare(rows, tmp, only)
+            for b in only:
+                res = timeit(BENCHES[b], rows, ctx, args.repeat)
+                results[f"{b}/{name}"] = res
+                print(f"{b:16s} {name:28s} {res['seconds']:8.3f}s  {res['us_per_item']:10.1f} us/item", flush=True)
+    doc = {
+        "schema": SCHEMA,
+        "meta": {"git": _git_rev(), "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": args.repeat},
+        "results": results,
+    }
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"Wrote {len(results)} results -> {args.out}")
+    return 0
+
+def cmd_compare(args) -> int:
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    with open(args.current, "r", encoding="utf-8") as f:
+        cur = json.load(f)["results"]
+    regressions = 0
+    print(f"{'benchmark':46s} {'base':>9s} {'current':>9s} {'change':>8s}")
+    for key in sorted(set(base) & set(cur)):
+        b, c = base[key]["us_per_item"], cur[key]["us_per_item"]
+        change = (c - b) / b if b else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{key:46s} {base[key]['seconds']:8.3f}s {cur[key]['seconds']:8.3f}s {change:+7.1%}{flag}")
+    unmatched = len(set(base) ^ set(cur))
+    if unmatched:
+        print(f"({unmatched} benchmark(s) present in only one file were skipped)")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+# ------------ scenarios ------------
+# each returns (rows for the table / --out, whether the new path matched the old one)
+
+def s_workers(args) -> Tuple[List[Dict[str, Any]], bool]:
+    examples = [ex for p in args.input for ex in load_rows(p)]
+    print(f"{len(examples)} cases, {os.cpu_count()} cpus")
+    serial = None; base_t = None; out = []; ok = True
+    for w in sorted(set(args.workers)):
+        scored = main.iter_scored(examples, workers=w, chunksize=args.chunksize)
+        rows, dt = stopwatch(lambda: [row for _, row in scored])
+        if serial is None:
+            serial, base_t = rows, dt
+        same = rows == serial
+        ok = ok and same
+        out.append({"workers": w, "seconds": round(dt, 4), "cases_per_s": round(len(rows) / dt, 1),
+                    "speedup": round(base_t / dt, 2), "identical": same})
+    return out, ok
+
+def synthetic_terms(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    out = set()
+    while len(out) < n:
+        words = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(rng.randint(1, 3))]
+        out.add(" ".join(words))
+    return sorted(out)
+
+def regex_scan(text: str, terms) -> int:
+    """The per-term scan the lexicon automaton replaced."""
+    lowered = text.lower(); n = 0
+    for term in terms:
+        for _ in re.finditer(rf"\b{re.escape(term)}\b", lowered):
+            n += 1
+    return n
+
+def s_lexicon(args) -> Tuple[List[Dict[str, Any]], bool]:
+    texts = [ex["transcript"] for ex in load_rows(args.input[0])]
+    mb = sum(len(t) for t in texts) / 1e6
+    print(f"{len(texts)} transcripts, {mb:.2f} MB")
+    base = [(t, "diagnosis" if t in DIAGNOSES else "symptom") for t in DIAG_SYMPTOMS]
+    out = []; ok = True
+    for size in args.sizes:
+        extra = synthetic_terms(max(0, size - len(base)))
+        lex, build = stopwatch(Lexicon, base + [(t, "symptom") for t in extra])
+        found, dt = stopwatch(lambda: [len(extract_diags_symptoms(t, lex)) for t in texts])
+        row = {"terms": len(lex), "build_s": round(build, 3), "automaton_mb_s": round(mb / dt, 2)}
+        if size <= args.regex_max:
+            scanned, dt_re = stopwatch(lambda: [regex_scan(t, lex.terms) for t in texts])
+            same = found == scanned
+            ok = ok and same
+            row.update({"regex_mb_s": round(mb / dt_re, 2), "identical": same})
+        out.append(row)
+    return out, ok
+
+def naive_matching(tf, nf, rf):
+    """The all-pairs _fact_match scans find_missing / find_hallucinated / prf1 used to run."""
+    missing = [t for t in tf if _is_critical(t) and not any(_fact_match(t, n) for n in nf)]
+    halluc = [n for n in nf if not any(_fact_match(n, t) for t in tf)]
+    matched = 0; used = set()
+    for p in nf:
+        for j, r in enumerate(rf):
+            if j not in used and _fact_match(p, r):
+                matched += 1; used.add(j); break
+    P = matched / max(1, len(nf)); R = matched / max(1, len(rf))
+    f1 = 0.0 if (P == 0.0 and R == 0.0) else (2 * P * R) / (P + R)
+    return missing, halluc, {"precision": P, "recall": R, "f1": f1}
+
+def s_matching(args) -> Tuple[List[Dict[str, Any]], bool]:
+    rows = load_rows(args.input[0])
+    out = []; ok = True
+    for k in args.concat:
+        cases = []
+        for c in range(args.cases):
+            chunk = [rows[(c * k + i) % len(rows)] for i in range(k)]
+            join = lambda field: "\n\n".join(r.get(field, "") for r in chunk)
+            cases.append((extract_all(join("transcript")), extract_all(join("generated_note")),
+                          extract_all(join("reference_note"))))
+        nfacts = sum(len(t) + len(n) + len(r) for t, n, r in cases) / len(cases)
+        a, t_naive = stopwatch(lambda: [naive_matching(*c) for c in cases])
+        b, t_idx = stopwatch(lambda: [(find_missing(t, n), find_hallucinated(t, n), prf1(n, r)) for t, n, r in cases])
+        same = a == b
+        ok = ok and same
+        out.append({"concat": k, "facts_per_case": round(nfacts), "all_pairs_ms": round(1e3 * t_naive / len(cases), 2),
+                    "indexed_ms": round(1e3 * t_idx / len(cases), 2), "speedup": round(t_naive / t_idx, 1),
+                    "identical": same})
+    return out, ok
+
+def rouge_l_f_dp(candidate: str, reference: str) -> float:
+    """The (m+1) x (n+1) list-of-lists DP rouge_l_f used to run."""
+    c = _tok(candidate); r = _tok(reference)
+    if not c or not r:
+        return 0.0
+    m, n = len(c), len(r)
+    dp = [[0] * (n + 1) for _ in range(m + 1)]
+    for i in range(m):
+        for j in range(n):
+            if c[i] == r[j]:
+                dp[i + 1][j + 1] = dp[i][j] + 1
+            else:
+                dp[i + 1][j + 1] = max(dp[i][j + 1], dp[i + 1][j])
+    lcs = dp[m][n]
+    prec = lcs / m; rec = lcs / n
+    if prec == 0.0 or rec == 0.0:
+        return 0.0
+    return (2 * prec * rec) / (prec + rec)
+
+def s_rouge(args) -> Tuple[List[Dict[str, Any]], bool]:
+    pairs = [(ex.get("generated_note", ""), ex.get("reference_note", ""))
+             for p in args.input for ex in load_rows(p, args.num_rows)]
+    print(f"{len(pairs)} pairs")
+    runs = [("dp_table", lambda: [rouge_l_f_dp(c, r) for c, r in pairs]),
+            ("bit_parallel", lambda: [rouge_l_f(c, r) for c, r in pairs]),
+            ("batch", lambda: rouge_l_f_batch(pairs))]
+    out = []; scores = []; t_dp = None
+    for name, fn in runs:
+        got, dt = stopwatch(fn)
+        t_dp = t_dp or dt
+        scores.append(got)
+        out.append({"impl": name, "seconds": round(dt, 4), "peak_mib": round(peak_memory(fn) / 2**20, 2),
+                    "speedup": round(t_dp / dt, 1)})
+    return out, all(x == scores[0] for x in scores)
+
+def _judge_cases(path: str, n: int) -> List[Tuple[str, str, str]]:
+    rows = [(ex.get("transcript", ""), ex.get("generated_note", ""), ex.get("reference_note", ""))
+            for ex in load_rows(path, n)]
+    if not rows:
+        raise SystemExit(f"no cases in {path}")
+    return [rows[i % len(rows)] for i in range(n)]
+
+def _server_stats(base_url: str) -> Optional[Dict[str, int]]:
+    try:
+        import urllib.request
+        with urllib.request.urlopen(f"{base_url}/stats", timeout=5) as resp:
+            return json.loads(resp.read())
+    except Exception:
+        return None  # not the fake server
+
+def _judge_async(cases, concurrency: int, base_url: str, args) -> Tuple[List[float], int, Dict[str, int]]:
+    judge = judge_mod.AsyncJudge("openrouter", args.model, concurrency=concurrency, base_url=base_url,
+                                 max_retries=args.max_retries, backoff_base=args.backoff_base,
+                                 backoff_cap=args.backoff_cap, timeout=args.timeout)
+    latencies: List[float] = []
+    slots = threading.BoundedSemaphore(concurrency)  # closed loop: at most `concurrency` cases in flight
+
+    def done(_f, t0):
+        latencies.append(time.perf_counter() - t0)
+        slots.release()
+
+    with judge:
+        futs = []
+        for t, n, r in cases:
+            slots.acquire()
+            t0 = time.perf_counter()
+            fut = judge.submit(t, n, r)
+            fut.add_done_callback(lambda f, t0=t0: done(f, t0))
+            futs.append(fut)
+        ok = sum(1 for f in futs if isinstance(f.result(), dict))
+    return latencies, ok, dict(judge.stats)
+
+def _judge_sync(cases, concurrency: int, base_url: str, args) -> Tuple[List[float], int, Dict[str, int]]:
+    judge_mod.OPENROUTER_BASE_URL = base_url
+
+    def one(case):
+        out, dt = stopwatch(lambda: judge_mod.judge_dispatch(*case, backend="openrouter", model_name=args.model))
+        return dt, out
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, cases))
+    ok = sum(1 for _, out in results if isinstance(out, dict))
+    return [lat for lat, _ in results], ok, {"requests": len(cases), "retries": 0}
+
+def _judge_one(engine: str, concurrency: int, cases, base_url: str, args) -> Dict[str, Any]:
+    before = _server_stats(base_url)
+    err = io.StringIO()
+    with contextlib.redirect_stderr(sys.stderr if args.verbose else err):
+        fn = _judge_async if engine == "async" else _judge_sync
+        (latencies, ok, stats), wall = stopwatch(fn, cases, concurrency, base_url, args)
+    # the sync path does not count parse failures; it logs them
+    parse_failures = stats.get("parse_failures", err.getvalue().count("non-JSON"))
+    lat = sorted(latencies)
+    out = {
+        "engine": engine, "concurrency": concurrency, "cases": len(cases), "wall_s": round(wall, 4),
+        "cases_per_s": round(len(cases) / wall, 2), "requests": stats.get("requests"),
+        "requests_per_s": round(stats.get("requests", 0) / wall, 2), "retries": stats.get("retries", 0),
+        "ok": ok, "failure_rate": round((len(cases) - ok) / len(cases), 4),
+        "parse_failure_rate": round(parse_failures / len(cases), 4),
+        **{f"p{q}_ms": round(1000 * percentile(lat, q), 2) for q in (50, 95, 99)},
+    }
+    after = _server_stats(base_url)
+    if before is not None and after is not None:
+        out["server"] = {k: after[k] - before.get(k, 0) for k in after}
+    return out
+
+def s_judge(args) -> Tuple[List[Dict[str, Any]], bool]:
+    os.environ.setdefault("OPENROUTER_API_KEY", "fake")
+    if "async" in args.engine:
+        try:
+            import aiohttp  # type: ignore  # noqa: F401
+        except Exception as e:
+            raise SystemExit(f"aiohttp is required for --engine async: {e}")
+    cases = _judge_cases(args.input[0], args.cases)
+    server = None if args.base_url else from_args(args).start()
+    base_url = (args.base_url or server.url).rstrip("/")
+    try:
+        return [_judge_one(e, c, cases, base_url, args) for e in args.engine for c in args.concurrency], True
+    finally:
+        if server is not None:
+            server.close()
+
+def _judge_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--engine", nargs="+", choices=("async", "sync"), default=["async", "sync"])
+    p.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64])
+    p.add_argument("--cases", type=int, default=200, help="Cases per (engine, concurrency) run, cycled from --input")
+    p.add_argument("--base-url", default=None, help="Judge an existing server instead of the in-process fake")
+    p.add_argument("--model", default="fake-judge")
+    p.add_argument("--max-retries", type=int, default=5)
+    p.add_argument("--backoff-base", type=float, default=0.05, help="Async retry backoff base (s); small for the fake")
+    p.add_argument("--backoff-cap", type=float, default=2.0)
+    p.add_argument("--timeout", type=float, default=120.0)
+    p.add_argument("--verbose", action="store_true", help="Show the judge's per-failure stderr lines")
+    add_fault_args(p)
+
+def _workers_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    p.add_argument("--chunksize", type=int, default=16)
+
+def _lexicon_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--sizes", type=int, nargs="+", default=[17, 1000, 10000, 50000])
+    p.add_argument("--regex-max", type=int, default=1000, help="Skip the regex baseline above this size")
+
+def _matching_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--concat", type=int, nargs="+", default=[1, 5, 20, 50])
+    p.add_argument("--cases", type=int, default=20, help="Long cases per size")
+
+def _rouge_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--num-rows", type=int, default=200, help="Rows per file (the DP baseline is slow)")
+
+# name -> (function, help, default --input, argument setup)
+SCENARIOS: Dict[str, Tuple[Callable, str, str, Callable]] = {
+    "workers": (s_workers, "Process-pool scaling; rows must match the serial run",
+                "data/adesouza_spicy.gen.jsonl", _workers_args),
+    "lexicon": (s_lexicon, "Extraction throughput as the lexicon grows", "data/adesouza.jsonl", _lexicon_args),
+    "matching": (s_matching, "Indexed vs. all-pairs fact matching", "data/adesouza_spicy.gen.jsonl", _matching_args),
+    "rouge": (s_rouge, "Bit-parallel vs. DP ROUGE-L, time and peak memory", "data/adesouza_spicy.gen.jsonl",
+              _rouge_args),
+    "judge": (s_judge, "Judge throughput/latency against the fake judge", "data/adesouza_mild.gen.jsonl",
+              _judge_args),
+}
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    cols = [k for k in rows[0] if not isinstance(rows[0][k], dict)] if rows else []
+    widths = {k: max(len(k), *(len(str(r.get(k, ""))) for r in rows)) for k in cols}
+    print("  ".join(f"{k:>{widths[k]}}" for k in cols))
+    for r in rows:
+        print("  ".join(f"{str(r.get(k, '')):>{widths[k]}}" for k in cols), flush=True)
+
+def cmd_scenario(args) -> int:
+    fn = SCENARIOS[args.cmd][0]
+    rows, ok = fn(args)
+    print_table(rows)
+    if args.out:
+        if os.path.dirname(args.out):
+            os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"schema": SCHEMA, "scenario": args.cmd, "meta": {"git": _git_rev(), "cpus": os.cpu_count()},
+                       "args": {k: v for k, v in vars(args).items() if k != "cmd"}, "results": rows}, f, indent=2)
+        print(f"Wrote {args.out}")
+    if not ok:
+        print("MISMATCH: the new path disagrees with the one it replaced")
+    return 0 if ok else 1
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="Run the benchmarks and write a JSON result file")
+    r.add_argument("--out", default="bench/results.json")
+    r.add_argument("--input", nargs="*", default=None, help="Corpora to time (default: data/*.jsonl)")
+    r.add_argument("--num-rows", type=int, default=None, help="Rows per input file")
+    r.add_argument("--only", nargs="*", choices=list(BENCHES), default=None)
+    r.add_argument("--repeat", type=int, default=3)
+    r.add_argument("--synth-rows", type=int, default=100, help="Cases the synthetic corpora are built from")
+    r.add_argument("--case-scale", type=int, nargs="*", default=[1, 4, 16], help="Synthetic case-count multipliers")
+    r.add_argument("--length-scale", type=int, nargs="*", default=[4, 16], help="Synthetic note-length multipliers")
+    c = sub.add_parser("compare", help="Compare two result files; exit 1 on regressions")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown (per item) to flag")
+    for name, (_, help_, default_input, setup) in SCENARIOS.items():
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("--input", nargs="+", default=[str(ROOT / default_input)])
+        p.add_argument("--out", default=None, help="Also write the results as JSON")
+        setup(p)
+    args = ap.parse_args()
+    if args.cmd in SCENARIOS:
+        sys.exit(cmd_scenario(args))
+    sys.exit(cmd_run(args) if args.cmd == "run" else cmd_compare(args))
+
+if __name__ == "__main__":
+    main_cli()
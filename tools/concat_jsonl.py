@@ -1,32 +1,72 @@
 # tools/concat_jsonl.py
-import sys, os, gzip
+"""
+Concatenates JSONL files, optionally keeping only a deterministic, stratified sample.
+
+  python tools/concat_jsonl.py data/adesouza.gen.jsonl data/omi.gen.jsonl -o data/all.gen.jsonl
+  python tools/concat_jsonl.py data/*.gen.jsonl -o data/smoke.jsonl --sample 200 --sample-by source,gender
+
+For --sample-by, "source" is the input file a row came from unless the row has its own
+`source` field. --tag-source writes it into each row's meta so main.py can stratify by it later.
+"""
+import argparse, json, os, pathlib, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from evalsuite.jsonl import loads, open_compressed  # noqa: E402
+from evalsuite.sampling import ALLOCATIONS, StratifiedSampler, field_value  # noqa: E402
 
 def iter_lines(path: str):
-    opener = gzip.open if path.endswith((".gz", ".gzip")) else open
-    with opener(path, "rt", encoding="utf-8", errors="strict") as f:
+    with open_compressed(path, "rb") as f:
         for line in f:
-            line = line.rstrip("\n")
+            line = line.decode("utf-8", errors="strict").rstrip("\r\n")
             if line:
                 yield line
 
-def main():
-    if len(sys.argv) < 4 or ("-o" not in sys.argv and "--out" not in sys.argv):
-        print("Usage: python tools/concat_jsonl.py <in1> <in2> [<in3> ...] -o <out>", file=sys.stderr)
-        sys.exit(1)
+def source_name(path: str) -> str:
+    name = os.path.basename(path)
+    for ext in (".gz", ".gzip", ".zst", ".jsonl", ".gen"):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return name
 
-    if "-o" in sys.argv:
-        oidx = sys.argv.index("-o")
-    else:
-        oidx = sys.argv.index("--out")
+def tagged(line: str, source: str) -> str:
+    ex = loads(line)
+    meta = ex.get("meta") if isinstance(ex.get("meta"), dict) else {}
+    ex["meta"] = dict(meta, source=source)
+    return json.dumps(ex, ensure_ascii=False)
 
-    out_path = sys.argv[oidx + 1]
-    in_paths = sys.argv[1:oidx]
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("inputs", nargs="+")
+    ap.add_argument("-o", "--out", required=True)
+    ap.add_argument("--sample", type=int, default=None, help="Keep a deterministic sample of N rows")
+    ap.add_argument("--sample-by", default="", help="Comma list of fields to stratify by (source = input file)")
+    ap.add_argument("--sample-seed", type=int, default=0)
+    ap.add_argument("--sample-alloc", choices=ALLOCATIONS, default="proportional")
+    ap.add_argument("--tag-source", action="store_true", help="Record each row's input file stem as meta.source")
+    args = ap.parse_args()
+
+    by = [x.strip() for x in args.sample_by.split(",") if x.strip()]
+    sampler = StratifiedSampler(args.sample, by, args.sample_seed, args.sample_alloc) if args.sample is not None else None
 
-    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-    with open(out_path, "w", encoding="utf-8", newline="\n") as w:
-        for p in in_paths:
+    def rows():
+        for p in args.inputs:
+            src = source_name(p)
             for line in iter_lines(p):
+                yield (tagged(line, src) if args.tag_source else line), src
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8", newline="\n") as w:
+        if sampler is None:
+            for line, _ in rows():
                 w.write(line + "\n")
+            return
+        for line, src in rows():
+            ex = loads(line)
+            sampler.add(ex, item=line, extra={"source": field_value(ex, "source") or src})
+        for line in sampler.sample():
+            w.write(line + "\n")
+    d = sampler.describe()
+    print(f"Sampled {d['sampled']} of {d['population']} rows -> {args.out}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,178 @@
+# tools/fake_judge.py
+"""
+Local OpenAI-compatible stand-in for the judge API, for CI and load tests.
+
+Serves POST /chat/completions (also under /v1) with deterministic rubric scores hashed from
+the request messages, after a sampled latency. A configurable share of requests fails with
+429 (optionally with Retry-After) or 5xx. Another share gets a malformed reply: JSON wrapped
+in prose/markdown (which _safe_parse_json recovers), plain prose, or truncated JSON (both
+parse failures). GET /stats returns what has been served so far.
+
+  python tools/fake_judge.py --port 8799 --latency lognormal:0.3,0.5 --p429 0.05 --p5xx 0.02 --malformed 0.05
+  OPENROUTER_BASE_URL=http://127.0.0.1:8799 OPENROUTER_API_KEY=x python main.py ... --llm-judge openrouter
+
+Latency specs: const:S, uniform:LO,HI, exp:MEAN, lognormal:MEDIAN,SIGMA (seconds).
+"""
+import argparse, hashlib, json, math, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+MALFORMED_KINDS = ("wrapped", "prose", "truncated")
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    kind, _, args = (spec or "const:0").partition(":")
+    p = [float(x) for x in args.split(",") if x.strip()]
+    if kind == "const":
+        return lambda: p[0] if p else 0.0
+    if kind == "uniform":
+        return lambda: rng.uniform(p[0], p[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1.0 / p[0])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(p[0]), p[1])
+    raise ValueError(f"unknown latency spec {spec!r}; expected const:, uniform:, exp: or lognormal:")
+
+def _scores(body: bytes) -> Dict[str, Any]:
+    h = int.from_bytes(hashlib.sha256(body).digest()[:8], "big")
+    return {"completeness": 1 + h % 5, "grounding": 1 + (h // 5) % 5, "clinical_accuracy": 1 + (h // 25) % 5,
+            "rationale": "fake judge"}
+
+def reply_text(scores: Dict[str, Any], kind: Optional[str] = None) -> str:
+    """The assistant message: strict JSON, or one of MALFORMED_KINDS."""
+    s = json.dumps(scores)
+    if kind == "wrapped":
+        return f"Sure! Here is my assessment:\n```json\n{s}\n```"
+    if kind == "prose":
+        return "The note looks mostly complete and grounded; I would rate it fairly well overall."
+    if kind == "truncated":
+        return s[:len(s) // 2]
+    return s
+
+class FakeJudgeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: str = "const:0", p429: float = 0.0,
+                 p5xx: float = 0.0, malformed: float = 0.0, retry_after: Optional[float] = None, seed: int = 0):
+        self.p429, self.p5xx, self.malformed, self.retry_after = p429, p5xx, malformed, retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._latency = latency_sampler(latency, self._rng)
+        self.stats: Dict[str, int] = {"requests": 0, "ok": 0, "429": 0, "5xx": 0,
+                                      **{f"malformed_{k}": 0 for k in MALFORMED_KINDS}}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self):
+        """(latency, fault, 5xx status) for one request, drawn under the lock so runs are reproducible."""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = max(0.0, self._latency())
+            u = self._rng.random()
+            if u < self.p429:
+                fault = "429"
+            elif u < self.p429 + self.p5xx:
+                fault = "5xx"
+            elif u < self.p429 + self.p5xx + self.malformed:
+                fault = f"malformed_{self._rng.choice(MALFORMED_KINDS)}"
+            else:
+                fault = "ok"
+            status = self._rng.choice((500, 502, 503))
+            self.stats[fault] += 1
+        return delay, fault, status
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                out = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    with server._lock:
+                        return self._send(200, dict(server.stats))
+                self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+                    return self._send(404, {"error": "not found"})
+                delay, fault, status = server._draw()
+                time.sleep(delay)
+                if fault == "429":
+                    headers = {"Retry-After": f"{server.retry_after:g}"} if server.retry_after is not None else None
+                    return self._send(429, {"error": {"message": "rate limited"}}, headers)
+                if fault == "5xx":
+                    return self._send(status, {"error": {"message": "upstream error"}})
+                kind = fault[len("malformed_"):] if fault.startswith("malformed_") else None
+                txt = reply_text(_scores(body), kind)
+                self._send(200, {"id": "fake", "object": "chat.completion",
+                                 "choices": [{"index": 0, "message": {"role": "assistant", "content": txt},
+                                              "finish_reason": "stop"}]})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeJudgeServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-judge", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeJudgeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def add_fault_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--latency", default="const:0", help="const:S | uniform:LO,HI | exp:MEAN | lognormal:MEDIAN,SIGMA")
+    ap.add_argument("--p429", type=float, default=0.0, help="Share of requests answered 429")
+    ap.add_argument("--p5xx", type=float, default=0.0, help="Share of requests answered 500/502/503")
+    ap.add_argument("--malformed", type=float, default=0.0, help="Share of replies that are not strict JSON")
+    ap.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with 429s")
+    ap.add_argument("--seed", type=int, default=0)
+
+def from_args(args, host: str = "127.0.0.1", port: int = 0) -> FakeJudgeServer:
+    return FakeJudgeServer(host, port, latency=args.latency, p429=args.p429, p5xx=args.p5xx,
+                           malformed=args.malformed, retry_after=args.retry_after, seed=args.seed)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8799)
+    add_fault_args(ap)
+    args = ap.parse_args()
+    srv = from_args(args, args.host, args.port)
+    print(f"fake judge on {srv.url} (GET /stats for counters); Ctrl-C to stop", flush=True)
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv._httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# tools/merge_shards.py
+"""
+Combines the out dirs of a `main.py --shard i/N` run into one set of reports, identical to
+what a single run over the whole input would have written.
+
+  python main.py --input data/all.gen.jsonl --out out/shard1 --shard 1/4     # one per node
+  python tools/merge_shards.py out/shard* --out out_all
+
+Shards are put back in index order and must all be present and cut from the same input.
+"""
+import argparse, json, os, pathlib, sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from evalsuite.report import DASHBOARD_MODES, merge_runs  # noqa: E402
+
+def shard_order(dirs):
+    """The shard dirs sorted by index, after checking they form one complete i/N set."""
+    info = {}
+    for d in dirs:
+        with open(os.path.join(d, "summary.json"), "r", encoding="utf-8") as f:
+            s = json.load(f).get("shard")
+        if not s:
+            raise SystemExit(f"{d}: not a --shard run (no 'shard' section in summary.json)")
+        info[d] = s
+    first = next(iter(info.values()))
+    same = ("count", "input", "num_rows", "start", "ids")
+    for d, s in info.items():
+        if any(s.get(k) != first.get(k) for k in same):
+            raise SystemExit(f"{d}: shard settings differ from the other shards: {s}")
+    found = sorted(s["index"] for s in info.values())
+    if found != list(range(1, first["count"] + 1)):
+        raise SystemExit(f"expected shards 1..{first['count']} exactly once, got {found}")
+    return sorted(dirs, key=lambda d: info[d]["index"])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("shards", nargs="+", help="Out dirs of the --shard runs, in any order")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--dashboard", choices=DASHBOARD_MODES, default="table")
+    args = ap.parse_args()
+    dirs = shard_order(args.shards)
+    summary = merge_runs(dirs, args.out, dashboard=args.dashboard)
+    print(f"Merged {len(dirs)} shards ({summary['num_cases']} cases) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -9,21 +9,58 @@ Decision on the adesouza row you provided:
   contaminate grounding checks.
 - We **will** keep those as **metadata** in a separate `meta` field (ignored by the
   evaluator), so you still have them for slicing/analysis without affecting the eval.
+
+Rows are streamed from source to output, never collected in memory. `--from` reads a local
+snapshot instead of the Hub: a Parquet/Arrow/JSONL/CSV file or a directory of them (e.g. a
+`save_to_disk` dir or a downloaded repo). Parquet and Arrow are memory-mapped and read in
+record batches, and only the columns that end up in the output are decoded. `--meta` /
+`--drop-meta` pick which meta fields are kept; an output path ending in `.gz` or `.zst` is
+compressed on the fly.
+
+  python tools/prepare_datasets.py --source omi --from snapshots/omi --out data/omi.jsonl.gz --drop-meta messages,messages_nosystem
+  python tools/prepare_datasets.py --source mts --mts-path MTS-Dialog-TrainingSet.csv --out data/mts.jsonl
 """
 import argparse
-import json
-import pathlib
+import csv
 import glob
+import io
+import json
 import os
-from typing import Iterable, Dict, Any, List, Optional
+import pathlib
+import sys
+from typing import Iterable, Dict, Any, Iterator, List, Optional, Sequence
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from evalsuite.jsonl import COMPRESSED, iter_jsonl, open_compressed  # noqa: E402
 
+SNAPSHOT_SUFFIXES = (".parquet", ".arrow", ".jsonl", ".json", ".csv")
 
-def write_jsonl(path: str, rows: Iterable[Dict[str, Any]]):
+# meta field -> source column, per dataset
+ADESOUZA_META = {
+    "age": "age",
+    "patient_name": "patient_name",
+    "gender": "gender",
+    "dob": "dob",
+    "phone": "phone",
+    "health_problem": "health_problem",
+    "doctor_name": "doctor_name",
+    "address": "address",
+    "has_full_patient_data": "full_patient_data",
+}
+OMI_META = {"prompt": "prompt", "messages": "messages", "messages_nosystem": "messages_nosystem"}
+MTS_META = {"source_id": "ID", "section_header": "section_header"}
+
+
+def write_jsonl(path: str, rows: Iterable[Dict[str, Any]]) -> int:
+    """Writes rows as they arrive (gzip/zstd by suffix); returns how many were written."""
     p = pathlib.Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
+    n = 0
+    with open_compressed(str(p), "wb") as f:
         for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            f.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+            n += 1
+    return n
 
 
 def norm_record(idx: int, transcript: str, reference: str, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -38,48 +75,153 @@ def norm_record(idx: int, transcript: str, reference: str, meta: Optional[Dict[s
     return rec
 
 
-def load_adesouza(split: str) -> List[Dict[str, Any]]:
-    """Loader for `adesouza1/soap_notes`"""
+def select_meta(fields: Dict[str, str], keep: Optional[Sequence[str]] = None,
+                drop: Sequence[str] = ()) -> Dict[str, str]:
+    """The subset of a dataset's meta fields to write: `keep` (None = all) minus `drop`."""
+    return {k: col for k, col in fields.items() if (keep is None or k in keep) and k not in drop}
+
+
+# ---- snapshot readers ----
+
+def _pyarrow():
+    try:
+        import pyarrow, pyarrow.ipc, pyarrow.parquet  # type: ignore  # noqa: F401
+    except Exception as e:
+        raise RuntimeError(f"pyarrow is required for Parquet/Arrow snapshots: {e}")
+    return pyarrow
+
+
+def _plain_name(fp: str) -> str:
+    for ext in COMPRESSED:
+        if fp.endswith(ext):
+            return fp[:-len(ext)]
+    return fp
+
+
+def snapshot_files(path: str, split: str) -> List[str]:
+    """
+    The data files of a snapshot, in name order. A directory with a `<split>` subdirectory
+    (DatasetDict.save_to_disk) reads that; otherwise files naming the split
+    ("train-00000-of-00002.parquet") are preferred over the rest.
+    """
+    if os.path.isfile(path):
+        return [path]
+    if os.path.isdir(os.path.join(path, split)):
+        path = os.path.join(path, split)
+    files = sorted(fp for fp in glob.glob(os.path.join(path, "**", "*"), recursive=True)
+                   if os.path.isfile(fp) and _plain_name(fp).endswith(SNAPSHOT_SUFFIXES)
+                   and not os.path.basename(fp).startswith(("state.", "dataset_info.")))
+    in_split = [fp for fp in files if split.lower() in os.path.basename(fp).lower()]
+    files = in_split or files
+    if not files:
+        raise SystemExit(f"no {'/'.join(SNAPSHOT_SUFFIXES)} files under {path}")
+    return files
+
+
+def _batch_rows(batch, columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """Rows of one Arrow record batch, converting only `columns` to Python objects."""
+    names = batch.schema.names
+    data = {c: batch.column(names.index(c)).to_pylist() for c in columns if c in names}
+    for i in range(batch.num_rows):
+        yield {c: v[i] for c, v in data.items()}
+
+
+def _iter_parquet(fp: str, columns: Sequence[str], batch_size: int) -> Iterator[Dict[str, Any]]:
+    pa = _pyarrow()
+    pf = pa.parquet.ParquetFile(fp, memory_map=True)
+    cols = [c for c in columns if c in pf.schema_arrow.names]
+    for batch in pf.iter_batches(batch_size=batch_size, columns=cols):
+        yield from _batch_rows(batch, cols)
+
+
+def _iter_arrow(fp: str, columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    # `datasets` caches and save_to_disk dirs hold Arrow IPC streams; plain .arrow may be the file format
+    pa = _pyarrow()
+    with pa.memory_map(fp, "r") as src:
+        try:
+            reader = pa.ipc.open_file(src)
+            batches: Iterable[Any] = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            src.seek(0)
+            batches = pa.ipc.open_stream(src)
+        for batch in batches:
+            yield from _batch_rows(batch, columns)
+
+
+def _iter_csv(fp: str, columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    csv.field_size_limit(2**31 - 1)  # dialogues can be longer than the 128k default
+    with open_compressed(fp, "rb") as raw:
+        for rec in csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8", newline="")):
+            yield {c: rec.get(c) for c in columns}
+
+
+def iter_snapshot(path: str, split: str, columns: Sequence[str], batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """Rows of a local snapshot restricted to `columns`; missing columns read as absent."""
+    for fp in snapshot_files(path, split):
+        name = _plain_name(fp)
+        if name != fp and name.endswith((".parquet", ".arrow")):
+            raise SystemExit(f"{fp}: Parquet/Arrow snapshots must be uncompressed (they are memory-mapped)")
+        if name.endswith(".parquet"):
+            yield from _iter_parquet(fp, columns, batch_size)
+        elif name.endswith(".arrow"):
+            yield from _iter_arrow(fp, columns)
+        elif name.endswith(".csv"):
+            yield from _iter_csv(fp, columns)
+        else:
+            for ex in iter_jsonl(fp):
+                yield {c: ex.get(c) for c in columns}
+
+
+def iter_source(hub_name: Optional[str], split: str, path: Optional[str], columns: Sequence[str],
+                batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """Rows from a local snapshot if `path` is given, else from the Hub dataset, batch by batch."""
+    if path:
+        yield from iter_snapshot(path, split, columns, batch_size)
+        return
+    if hub_name is None:
+        raise SystemExit("this source has no Hub copy; pass --from with a local snapshot")
     from datasets import load_dataset
-    ds = load_dataset("adesouza1/soap_notes", split=split)
+    ds = load_dataset(hub_name, split=split)
+    ds = ds.select_columns([c for c in columns if c in ds.column_names])
+    for batch in ds.iter(batch_size=batch_size):
+        keys = list(batch)
+        for vals in zip(*(batch[k] for k in keys)):
+            yield dict(zip(keys, vals))
+
 
-    rows: List[Dict[str, Any]] = []
-    for i, ex in enumerate(ds):
+# ---- sources ----
+
+def load_adesouza(split: str, path: Optional[str] = None, meta: Optional[Dict[str, str]] = None,
+                  batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """Loader for `adesouza1/soap_notes`"""
+    meta = ADESOUZA_META if meta is None else meta
+    columns = ["patient_convo", "soap_notes", *meta.values()]
+    for i, ex in enumerate(iter_source("adesouza1/soap_notes", split, path, columns, batch_size)):
         transcript = ex.get("patient_convo") or ""
         reference = ex.get("soap_notes") or ""
         if not reference.strip():
             continue
 
         # Keep other info as metadata only
-        meta: Dict[str, Any] = {
-            "age": ex.get("age"),
-            "patient_name": ex.get("patient_name"),
-            "gender": ex.get("gender"),
-            "dob": ex.get("dob"),
-            "phone": ex.get("phone"),
-            "health_problem": ex.get("health_problem"),
-            "doctor_name": ex.get("doctor_name"),
-            "address": ex.get("address"),
-            "has_full_patient_data": bool(ex.get("full_patient_data")),
-        }
-        rows.append(norm_record(i, transcript, reference, meta))
-    return rows
-
-
-def load_omi(split: str) -> List[Dict[str, Any]]:
+        m: Dict[str, Any] = {k: ex.get(col) for k, col in meta.items()}
+        if "has_full_patient_data" in m:
+            m["has_full_patient_data"] = bool(m["has_full_patient_data"])
+        yield norm_record(i, transcript, reference, m)
+
+
+def load_omi(split: str, path: Optional[str] = None, meta: Optional[Dict[str, str]] = None,
+             batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
     """
     Load the Omi-Health dataset and normalize into our common schema:
       { id, transcript, generated_note, reference_note, meta }
 
     - transcript       <= 'dialogue'
     - reference_note   <= 'soap'
-    - meta             <= { 'prompt', 'messages', 'messages_nosystem' } (kept as-is)
+    - meta             <= { 'prompt', 'messages', 'messages_nosystem' } (kept as-is unless dropped)
     """
-    from datasets import load_dataset
-    ds = load_dataset("omi-health/medical-dialogue-to-soap-summary", split=split)
-
-    rows: List[Dict[str, Any]] = []
-    for i, ex in enumerate(ds):
+    meta = OMI_META if meta is None else meta
+    columns = ["dialogue", "soap", *meta.values()]
+    for i, ex in enumerate(iter_source("omi-health/medical-dialogue-to-soap-summary", split, path, columns, batch_size)):
         # Required fields in this dataset
         dialogue = (ex.get("dialogue") or "").strip()
         soap = (ex.get("soap") or "").strip()
@@ -88,32 +230,66 @@ def load_omi(split: str) -> List[Dict[str, Any]]:
             continue
 
         # Keep auxiliary fields as metadata
-        meta: Dict[str, Any] = {
-            "prompt": ex.get("prompt"),
-            "messages": ex.get("messages"),
-            "messages_nosystem": ex.get("messages_nosystem"),
-        }
+        yield norm_record(i, dialogue, soap, {k: ex.get(col) for k, col in meta.items()})
+
+
+def load_mts(split: str, path: Optional[str] = None, meta: Optional[Dict[str, str]] = None,
+             batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Load MTS-Dialog (MEDIQA-Chat 2023) from a local copy of its CSVs
+    (`ID, section_header, section_text, dialogue`); it is not on the Hub.
+
+    - transcript       <= 'dialogue'
+    - reference_note   <= 'section_text' (one note section per row)
+    - meta             <= { 'source_id': 'ID', 'section_header' }
+    """
+    meta = MTS_META if meta is None else meta
+    columns = ["dialogue", "section_text", *meta.values()]
+    for i, ex in enumerate(iter_source(None, split, path, columns, batch_size)):
+        dialogue = (ex.get("dialogue") or "").strip()
+        section = (ex.get("section_text") or "").strip()
+        if not dialogue or not section:
+            continue
+        yield norm_record(i, dialogue, section, {k: ex.get(col) for k, col in meta.items()})
+
+
+SOURCES = {
+    "adesouza": (load_adesouza, ADESOUZA_META),
+    "omi": (load_omi, OMI_META),
+    "mts": (load_mts, MTS_META),
+}
+
+
+def _names(s: Optional[str]) -> List[str]:
+    return [x.strip() for x in (s or "").split(",") if x.strip()]
 
-        rows.append(norm_record(i, dialogue, soap, meta))
-    return rows
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--source", required=True, choices=["adesouza", "omi", "mts"])
+    ap.add_argument("--source", required=True, choices=list(SOURCES))
     ap.add_argument("--split", default="train")
-    ap.add_argument("--mts-path")
-    ap.add_argument("--out", required=True)
+    ap.add_argument("--from", dest="snapshot", default=None,
+                    help="Local Parquet/Arrow/JSONL/CSV file or directory to read instead of the Hub")
+    ap.add_argument("--mts-path", help="Same as --from, for --source mts")
+    ap.add_argument("--meta", default="all",
+                    help="Meta fields to keep: 'all', 'none', or a comma list (e.g. age,gender)")
+    ap.add_argument("--drop-meta", default="", help="Comma list of meta fields to leave out")
+    ap.add_argument("--batch-size", type=int, default=1024, help="Rows per record batch read from the source")
+    ap.add_argument("--out", required=True, help="Output JSONL; a .gz or .zst suffix compresses it")
     args = ap.parse_args()
 
-    if args.source == "adesouza":
-        rows = load_adesouza(args.split)
-    elif args.source == "omi":
-        rows = load_omi(args.split)
-    else:
-        ap.error("{Provide path to dataset}")
+    loader, fields = SOURCES[args.source]
+    path = args.snapshot or args.mts_path
+    if args.source == "mts" and not path:
+        ap.error("--source mts needs --mts-path (or --from) pointing at the MTS-Dialog CSVs")
+    keep = None if args.meta == "all" else [] if args.meta == "none" else _names(args.meta)
+    unknown = [k for k in (keep or []) + _names(args.drop_meta) if k not in fields]
+    if unknown:
+        ap.error(f"unknown meta fields for {args.source}: {', '.join(unknown)} (have: {', '.join(fields)})")
+    meta = select_meta(fields, keep, _names(args.drop_meta))
 
-    write_jsonl(args.out, rows)
-    print(f"Wrote {len(rows)} rows -> {args.out}")
+    n = write_jsonl(args.out, loader(args.split, path, meta, args.batch_size))
+    print(f"Wrote {n} rows -> {args.out}")
 
 
 if __name__ == "__main__":
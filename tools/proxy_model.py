@@ -1,73 +1,158 @@
 \
-import argparse, json, pathlib, random, re
+"""
+Proxy "model": corrupts reference notes into mild/medium/spicy generated notes.
 
-def load_jsonl(p):
-    with open(p, "r", encoding="utf-8") as f:
-        for line in f:
-            line=line.strip()
-            if line:
-                yield json.loads(line)
+The input is streamed once and every requested mode x seed is written in the same pass, so a
+corpus larger than RAM costs one read and one parse per row. Each case draws from its own RNG
+seeded by (seed, mode, row position), so output is reproducible and independent of --workers.
+
+  python tools/proxy_model.py --input data/omi.jsonl --out data/omi.gen.jsonl --mode mild medium spicy
+  # -> data/omi.gen.mild.jsonl, data/omi.gen.medium.jsonl, data/omi.gen.spicy.jsonl
+"""
+import argparse, json, pathlib, random, re, sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Sequence, Tuple
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from evalsuite.jsonl import loads, open_compressed  # noqa: E402
 
-def write_jsonl(p, rows):
-    p = pathlib.Path(p); p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+MODES = ("mild", "medium", "spicy")
 
-def jitter_numbers(text, jitter=0.03):
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SECTION_BLOCKS = [re.compile(rf"(?ms)^ *{sec}.*?(?=^\s*[SOAP]:|\Z)") for sec in ["S:", "O:", "A:", "P:"]]
+_NEGATIONS = [(re.compile(a, re.I), b) for a, b in [(" no ", " yes "), (" denies ", " reports "), (" without ", " with ")]]
+
+def jitter_numbers(text, jitter=0.03, rng=random):
     def repl(m):
-        x = float(m.group(0)); y = x*(1.0+random.uniform(-jitter,jitter))
+        x = float(m.group(0)); y = x*(1.0+rng.uniform(-jitter,jitter))
         return f"{y:.1f}" if abs(x)>=50 else f"{round(y)}"
-    return re.sub(r"\b\d+(?:\.\d+)?\b", repl, text)
+    return _NUMBER.sub(repl, text)
 
-def maybe_drop_sections(text, p=0.15):
+def maybe_drop_sections(text, p=0.15, rng=random):
     # naive drop of some sections by header tokens
     out = []
-    for sec in ["S:", "O:", "A:", "P:"]:
-        m = re.search(rf"(?ms)^ *{sec}.*?(?=^\s*[SOAP]:|\Z)", text)
+    for block_re in _SECTION_BLOCKS:
+        m = block_re.search(text)
         if not m: 
             continue
         block = m.group(0)
-        if random.random() > p:
+        if rng.random() > p:
             out.append(block.strip())
     return "\n".join(out) if out else text
 
-def flip_negations(text, p=0.2):
-    pairs = [(" no ", " yes "), (" denies ", " reports "), (" without ", " with ")]
-    for a,b in pairs:
-        if random.random() < p:
-            text = re.sub(a, b, text, flags=re.I)
+def flip_negations(text, p=0.2, rng=random):
+    for a,b in _NEGATIONS:
+        if rng.random() < p:
+            text = a.sub(b, text)
     return text
 
-def add_hallucination(text, p=0.2):
-    if random.random() < p:
+def add_hallucination(text, p=0.2, rng=random):
+    if rng.random() < p:
         text += "\nO: Temperature 120 F, SpO2 85%."
     return text
 
-def transform(ref, mode):
+def transform(ref, mode, rng=random):
     t = ref
     if mode == "mild":
-        t = jitter_numbers(t, 0.02); t = maybe_drop_sections(t, 0.10)
+        t = jitter_numbers(t, 0.02, rng); t = maybe_drop_sections(t, 0.10, rng)
     elif mode == "medium":
-        t = jitter_numbers(t, 0.05); t = maybe_drop_sections(t, 0.25); t = flip_negations(t, 0.25)
+        t = jitter_numbers(t, 0.05, rng); t = maybe_drop_sections(t, 0.25, rng); t = flip_negations(t, 0.25, rng)
     else:
-        t = jitter_numbers(t, 0.08); t = maybe_drop_sections(t, 0.35); t = flip_negations(t, 0.4); t = add_hallucination(t, 0.5)
+        t = jitter_numbers(t, 0.08, rng); t = maybe_drop_sections(t, 0.35, rng)
+        t = flip_negations(t, 0.4, rng); t = add_hallucination(t, 0.5, rng)
     return t
 
+def case_rng(seed, mode, ordinal):
+    """The RNG for one (seed, mode, row) -- the same whichever process or order draws it."""
+    return random.Random(f"{seed}/{mode}/{ordinal}")
+
+def corrupt_line(item: Tuple[int, bytes], variants: Sequence[Tuple[str, int]]) -> List[str]:
+    """One input line -> its serialized output line for every (mode, seed) variant."""
+    ordinal, line = item
+    ex = loads(line)
+    ref = ex.get("reference_note","")
+    out = []
+    for mode, seed in variants:
+        ex["generated_note"] = transform(ref, mode, case_rng(seed, mode, ordinal))
+        out.append(json.dumps(ex, ensure_ascii=False) + "\n")
+    return out
+
+def _corrupt_batch(batch, variants):
+    return [corrupt_line(item, variants) for item in batch]
+
+def iter_lines(path) -> Iterator[Tuple[int, bytes]]:
+    """(row position, raw line) for every non-blank line; rows are decoded by the workers."""
+    with open_compressed(path, "rb") as f:
+        ordinal = 0
+        for line in f:
+            line = line.strip()
+            if line:
+                yield ordinal, line
+                ordinal += 1
+
+def iter_corrupted(path, variants, workers=1, chunksize=64) -> Iterator[List[str]]:
+    """Output lines per input row, in input order. The pool sees one window of rows at a time."""
+    items = iter_lines(path)
+    if workers <= 1:
+        for item in items:
+            yield corrupt_line(item, variants)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            window = list(islice(items, workers * chunksize * 4))
+            if not window:
+                break
+            batches = [window[i:i + chunksize] for i in range(0, len(window), chunksize)]
+            for lines in pool.map(_corrupt_batch, batches, [variants] * len(batches)):
+                yield from lines
+
+def output_paths(out, modes: Sequence[str], seeds: Sequence[int]) -> List[str]:
+    """
+    One path per (mode, seed). `out` may use {mode}/{seed}; otherwise ".<mode>" / ".s<seed>" are
+    put before the suffix whenever more than one mode / seed is asked for.
+    """
+    paths = []
+    for mode in modes:
+        for seed in seeds:
+            if "{mode}" in out or "{seed}" in out:
+                paths.append(out.format(mode=mode, seed=seed))
+                continue
+            p = pathlib.Path(out)
+            tag = (f".{mode}" if len(modes) > 1 else "") + (f".s{seed}" if len(seeds) > 1 else "")
+            paths.append(str(p.with_name(p.stem + tag + p.suffix)))
+    if len(set(paths)) != len(paths):
+        raise SystemExit(f"--out {out!r} maps several mode/seed variants to the same file")
+    return paths
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--input", required=True)
-    ap.add_argument("--out", required=True)
-    ap.add_argument("--mode", default="medium", choices=["mild","medium","spicy"])
+    ap.add_argument("--out", required=True, help="Output file; may contain {mode} and {seed}")
+    ap.add_argument("--mode", nargs="+", default=["medium"], choices=MODES, help="One or more modes")
+    ap.add_argument("--seed", nargs="+", type=int, default=[0], help="One or more seeds")
+    ap.add_argument("--workers", type=int, default=1, help="Corrupt rows in a pool of N processes")
+    ap.add_argument("--chunksize", type=int, default=64, help="Rows per task sent to each worker")
     args = ap.parse_args()
 
-    rows = []
-    for ex in load_jsonl(args.input):
-        ref = ex.get("reference_note","")
-        ex["generated_note"] = transform(ref, args.mode)
-        rows.append(ex)
-    write_jsonl(args.out, rows)
-    print(f"wrote {len(rows)} -> {args.out}")
+    modes = list(dict.fromkeys(args.mode)); seeds = list(dict.fromkeys(args.seed))
+    variants = [(m, s) for m in modes for s in seeds]
+    paths = output_paths(args.out, modes, seeds)
+    files = []
+    for p in paths:
+        pathlib.Path(p).parent.mkdir(parents=True, exist_ok=True)
+        files.append(open(p, "w", encoding="utf-8"))
+    n = 0
+    try:
+        for lines in iter_corrupted(args.input, variants, args.workers, args.chunksize):
+            for f, line in zip(files, lines):
+                f.write(line)
+            n += 1
+    finally:
+        for f in files:
+            f.close()
+    for p in paths:
+        print(f"wrote {n} -> {p}")
 
 if __name__ == "__main__":
     main()